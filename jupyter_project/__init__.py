@@ -1,3 +1,5 @@
+import functools
+
 from ._version import __version__
 from .config import JupyterProject
 from .handlers import setup_handlers
@@ -15,7 +17,8 @@ def load_jupyter_server_extension(lab_app):
     lab_app: jupyterlab.labapp.LabApp
         JupyterLab application instance
     """
-    config = JupyterProject(config=lab_app.config)
+    # The configuration and the templates are loaded in background
+    config = functools.partial(JupyterProject, config=lab_app.config)
     setup_handlers(lab_app.web_app, config, lab_app.log)
     lab_app.log.info(
         "Registered jupyter_project extension at URL path /jupyter-project"
@@ -0,0 +1,235 @@
+"""
+Command line application ``jupyter project``.
+
+The ``warmup`` subcommand does ahead of time the expensive first-use work of
+the server extension (fetching the project template, compiling the file
+templates, scanning the templates folders) so it can be baked into images.
+"""
+import asyncio
+import concurrent.futures
+import logging
+import time
+from typing import Any, Callable, Dict, List, NoReturn, Optional
+
+import jsonschema
+from jinja2 import Template
+from jupyter_core.application import JupyterApp, base_aliases
+from traitlets import Integer, TraitError
+
+from ._version import __version__
+from .conda import CondaEnvironments, default_executable, resolve_packages
+from .config import JupyterProject
+from .files import FileTemplate
+from .handlers import _load_file_templates
+from .jinja2 import TemplateCache, create_environment, jinja2_extensions
+from .nbtemplate import load_notebook_template
+from .startup import ExtensionInitializer
+
+logger = logging.getLogger(__name__)
+
+
+def _check_schemas(*schemas: Dict) -> NoReturn:
+    """Check the JSON schemas are valid.
+
+    Args:
+        *schemas (Dict): JSON schemas
+
+    Raises:
+        jsonschema.SchemaError: if a schema is invalid
+    """
+    for schema in schemas:
+        if len(schema) > 0:
+            jsonschema.validators.validator_for(schema).check_schema(schema)
+
+
+def _timed(kind: str, name: str, func: Callable[[], Any]) -> Dict[str, Any]:
+    """Execute a warmup task.
+
+    Args:
+        kind (str): Task kind
+        name (str): Task name
+        func (Callable[[], Any]): Task
+
+    Returns:
+        Dict: {kind, name, duration (in seconds), error}
+    """
+    start = time.perf_counter()
+    error = None
+    try:
+        func()
+    except Exception as e:
+        error = str(e) or repr(e)
+    return {
+        "kind": kind,
+        "name": name,
+        "duration": time.perf_counter() - start,
+        "error": error,
+    }
+
+
+def warmup(
+    config: JupyterProject,
+    jobs: Optional[int] = None,
+    logger: logging.Logger = logger,
+) -> List[Dict[str, Any]]:
+    """Prefetch, compile and verify all templates.
+
+    - The cookiecutter project template is fetched (or refreshed) in the cookiecutter cache
+    - The pool of conda environments is filled if the server provisions them
+    - The templates folders are scanned and their index is saved
+    - The file templates are compiled in parallel and stored in the bytecode cache
+    - The JSON schemas are checked
+
+    Args:
+        config (JupyterProject): Extension configuration
+        jobs (int): Number of threads compiling the file templates; default to the executor default
+        logger (logging.Logger): Logger [optional]
+
+    Returns:
+        List[Dict]: Tasks results {kind, name, duration (in seconds), error}
+    """
+    results = list()
+
+    project = config.project_template
+    if project is not None and project.template is not None:
+        results.append(
+            _timed(
+                "schema",
+                "project_template",
+                lambda: _check_schemas(project.schema, project.configuration_schema),
+            )
+        )
+        results.append(_timed("project", project.template, project.prefetch))
+
+        if (
+            config.conda_provisioning
+            and config.conda_pool_size > 0
+            and project.conda_pkgs is not None
+        ):
+            environments = CondaEnvironments(
+                config.conda_executable or default_executable() or "conda",
+                config.conda_pool_size,
+            )
+            packages = resolve_packages(project.conda_pkgs)
+            results.append(
+                _timed(
+                    "conda",
+                    project.conda_pkgs,
+                    lambda: asyncio.run(environments.fill_pool(packages)),
+                )
+            )
+
+    templates = _load_file_templates(
+        ExtensionInitializer(("file_templates",)), config, logger
+    )
+    for template in config.file_templates:
+        if template.name not in templates:
+            results.append(
+                {
+                    "kind": "files",
+                    "name": template.name,
+                    "duration": 0.0,
+                    "error": "Unable to load the templates.",
+                }
+            )
+
+    env = create_environment(
+        {name: t["loader"] for name, t in templates.items()},
+        cache_dir=config.cache_dir,
+        cache=TemplateCache(config.template_cache_size, config.template_cache_bytes),
+        enable_async=config.template_enable_async,
+    )
+
+    def compile_file(name: str, file: FileTemplate) -> NoReturn:
+        _check_schemas(file.schema)
+        Template(file.default_name, extensions=jinja2_extensions)
+        if file.render_mode == "notebook":
+            load_notebook_template(env, name)
+        else:
+            env.get_template(name)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=jobs or None) as executor:
+        futures = list()
+        for group, template in templates.items():
+            for file in template["files"]:
+                name = f"{group}/{file.template.as_posix()}"
+                futures.append(
+                    executor.submit(
+                        _timed, "file", name, lambda n=name, f=file: compile_file(n, f)
+                    )
+                )
+        results.extend(future.result() for future in futures)
+
+    return results
+
+
+class WarmupApp(JupyterApp):
+    """Prefetch, compile and verify all templates."""
+
+    name = "jupyter-project-warmup"
+    version = __version__
+    description = """Prefetch, compile and verify all jupyter-project templates.
+
+    The configuration is read from the Jupyter server configuration files. The
+    command exits with a non-zero code if a template is broken.
+    """
+
+    aliases = dict(base_aliases, jobs="WarmupApp.jobs")
+
+    jobs = Integer(
+        default_value=0,
+        min=0,
+        help="Number of threads compiling the file templates; 0 to use the default [optional]",
+        config=True,
+    )
+
+    def _config_file_name_default(self) -> str:
+        # Same configuration as the server extension
+        return "jupyter_notebook_config"
+
+    def start(self):
+        try:
+            config = JupyterProject(config=self.config)
+        except TraitError as error:
+            self.log.error(f"Invalid jupyter-project configuration: {error!s}")
+            self.exit(1)
+
+        results = warmup(config, self.jobs, self.log)
+        for result in results:
+            status = "OK" if result["error"] is None else "FAIL"
+            print(
+                f"{status:4s} {result['duration'] * 1000.0:10.1f} ms  {result['kind']:8s} {result['name']}"
+            )
+            if result["error"] is not None:
+                print(f"     {result['error']}")
+
+        failures = sum(result["error"] is not None for result in results)
+        total = sum(result["duration"] for result in results)
+        print(
+            f"{len(results)} tasks, {failures} failures in {total * 1000.0:.1f} ms"
+        )
+        self.exit(1 if failures > 0 else 0)
+
+
+class ProjectApp(JupyterApp):
+    """jupyter-project command line application."""
+
+    name = "jupyter-project"
+    version = __version__
+    description = "Manage the jupyter-project templates."
+
+    subcommands = dict(
+        warmup=(WarmupApp, WarmupApp.description.splitlines()[0]),
+    )
+
+    def start(self):
+        if self.subapp is None:
+            print(
+                f"No subcommand specified. Must specify one of: {list(self.subcommands)}"
+            )
+            self.print_subcommands()
+            self.exit(1)
+        super().start()
+
+
+main = ProjectApp.launch_instance
@@ -0,0 +1,268 @@
+import hashlib
+import io
+import mmap
+import os
+import pathlib
+import shutil
+import struct
+import tarfile
+import tempfile
+import zipfile
+import zlib
+from typing import List, NoReturn
+
+# Suffixes of the files handled as archive
+ARCHIVE_SUFFIXES = (".zip", ".tar", ".tar.gz", ".tgz", ".tar.bz2", ".tar.xz")
+
+
+def is_archive(path: pathlib.Path) -> bool:
+    """Test if a path is an archive file.
+
+    Args:
+        path (pathlib.Path): Path to test
+
+    Returns:
+        bool: Whether the path is an archive file or not
+    """
+    return path.name.lower().endswith(ARCHIVE_SUFFIXES) and path.is_file()
+
+
+def _normalize_name(name: str) -> str:
+    while name.startswith("./"):
+        name = name[2:]
+    return name
+
+
+class _MappedFile(io.RawIOBase):
+    """Read-only file object over a memory map with its own position."""
+
+    def __init__(self, data: mmap.mmap):
+        self._data = data
+        self._position = 0
+
+    def readable(self) -> bool:
+        return True
+
+    def seekable(self) -> bool:
+        return True
+
+    def tell(self) -> int:
+        return self._position
+
+    def seek(self, offset: int, whence: int = io.SEEK_SET) -> int:
+        if whence == io.SEEK_CUR:
+            offset += self._position
+        elif whence == io.SEEK_END:
+            offset += len(self._data)
+        self._position = max(offset, 0)
+        return self._position
+
+    def readinto(self, buffer) -> int:
+        data = self._data[self._position : self._position + len(buffer)]
+        buffer[: len(data)] = data
+        self._position += len(data)
+        return len(data)
+
+
+class Archive:
+    """Read-only access to the files of a zip or tar archive.
+
+    The archive is memory-mapped and its members are indexed once at
+    opening; i.e. the zip central directory or the tar headers. Members of
+    an uncompressed archive are then read directly from the mapped memory.
+    Compressed tar archives cannot be accessed randomly: only their headers
+    are kept when indexing and a member is read by decompressing the archive
+    up to it. So the zip or uncompressed tar archives are to be preferred for
+    frequently read members.
+    """
+
+    def __init__(self, path: pathlib.Path):
+        """Open and index an archive.
+
+        Args:
+            path (pathlib.Path): Archive path
+
+        Raises:
+            ValueError: if the file is not a valid archive
+        """
+        self.path = pathlib.Path(path)
+        self.mtime = self.path.stat().st_mtime_ns
+        # Member name -> zip info or (offset, size) in the mapped tar archive or tar info
+        self._members = dict()
+
+        with self.path.open("rb") as f:
+            try:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+            except ValueError:  # Empty file
+                raise ValueError(f"{self.path!s} is not a valid archive.")
+
+        try:
+            if zipfile.is_zipfile(self._mmap):
+                self._index_zip()
+            else:
+                self._index_tar()
+        except (tarfile.TarError, zipfile.BadZipFile, EOFError, OSError) as error:
+            self.close()
+            raise ValueError(f"{self.path!s} is not a valid archive: {error!s}")
+
+    def _index_zip(self) -> NoReturn:
+        with zipfile.ZipFile(self._mmap) as archive:
+            for info in archive.infolist():
+                if not info.is_dir():
+                    self._members[_normalize_name(info.filename)] = info
+
+    def _read_zip(self, info: zipfile.ZipInfo) -> bytes:
+        encrypted = info.flag_bits & 0x1
+        if encrypted or info.compress_type not in (
+            zipfile.ZIP_STORED,
+            zipfile.ZIP_DEFLATED,
+        ):
+            with zipfile.ZipFile(self.path) as archive:
+                return archive.read(info)
+
+        # The data follows the local file header; its size is
+        # 30 bytes + the name and extra field lengths stored at bytes 26 to 30.
+        offset = info.header_offset
+        name_length, extra_length = struct.unpack(
+            "<HH", self._mmap[offset + 26 : offset + 30]
+        )
+        start = offset + 30 + name_length + extra_length
+        data = self._mmap[start : start + info.compress_size]
+        if info.compress_type == zipfile.ZIP_DEFLATED:
+            data = zlib.decompress(data, -zlib.MAX_WBITS)
+        return data
+
+    def _index_tar(self) -> NoReturn:
+        self._mmap.seek(0)
+        try:
+            with tarfile.open(fileobj=self._mmap, mode="r:") as tar:
+                for info in tar:
+                    if info.isfile():
+                        self._members[_normalize_name(info.name)] = (
+                            info.offset_data,
+                            info.size,
+                        )
+            return
+        except tarfile.ReadError:
+            # Compressed archive
+            self._mmap.seek(0)
+
+        with tarfile.open(fileobj=self._mmap, mode="r:*") as tar:
+            for info in tar:
+                if info.isfile():
+                    self._members[_normalize_name(info.name)] = info
+
+    def _read_compressed_tar(self, info: tarfile.TarInfo) -> bytes:
+        # Independent file position as the members may be read concurrently
+        view = io.BufferedReader(_MappedFile(self._mmap))
+        with tarfile.open(fileobj=view, mode="r:*") as tar:
+            return tar.extractfile(info).read()
+
+    def close(self) -> NoReturn:
+        """Release the archive."""
+        self._mmap.close()
+
+    def names(self) -> List[str]:
+        """List the archive files.
+
+        Returns:
+            List[str]: Posix path of the archive files
+        """
+        return sorted(self._members)
+
+    def read(self, name: str) -> bytes:
+        """Read an archive file.
+
+        Args:
+            name (str): Posix path of the file within the archive
+
+        Returns:
+            bytes: File content
+
+        Raises:
+            KeyError: if the file does not exist in the archive
+        """
+        member = self._members[name]
+        if isinstance(member, zipfile.ZipInfo):
+            return self._read_zip(member)
+        elif isinstance(member, tuple):
+            offset, size = member
+            return self._mmap[offset : offset + size]
+        else:
+            return self._read_compressed_tar(member)
+
+    def extract(self, destination: pathlib.Path) -> NoReturn:
+        """Extract all archive files in a folder.
+
+        Args:
+            destination (pathlib.Path): Destination folder
+
+        Raises:
+            ValueError: if a file would be extracted outside of destination
+        """
+        root = pathlib.Path(destination).resolve()
+        targets = dict()
+        for name in self._members:
+            target = (root / name).resolve()
+            if root not in target.parents:
+                raise ValueError(f"Archive file '{name}' is outside the archive root.")
+            targets[name] = target
+
+        compressed = any(
+            isinstance(member, tarfile.TarInfo) for member in self._members.values()
+        )
+        if compressed:
+            # Decompressed in a single pass
+            self._mmap.seek(0)
+            with tarfile.open(fileobj=self._mmap, mode="r:*") as tar:
+                for info in tar:
+                    name = _normalize_name(info.name)
+                    if info.isfile() and name in targets:
+                        target = targets[name]
+                        target.parent.mkdir(parents=True, exist_ok=True)
+                        with target.open("wb") as f:
+                            shutil.copyfileobj(tar.extractfile(info), f)
+        else:
+            for name, target in targets.items():
+                target.parent.mkdir(parents=True, exist_ok=True)
+                target.write_bytes(self.read(name))
+
+
+def extract_archive(path: pathlib.Path, cache_dir: pathlib.Path) -> pathlib.Path:
+    """Extract an archive in a cache folder if it is not already extracted.
+
+    The extraction folder depends on the archive path and modification time;
+    so a new version of the archive is extracted again.
+
+    Args:
+        path (pathlib.Path): Archive path
+        cache_dir (pathlib.Path): Folder in which the archive is extracted
+
+    Returns:
+        pathlib.Path: Extraction folder
+    """
+    path = pathlib.Path(path).absolute()
+    key = hashlib.sha1(
+        f"{path.as_posix()}:{path.stat().st_mtime_ns}".encode("utf-8")
+    ).hexdigest()[:12]
+    stem = path.name.split(".")[0]
+    destination = pathlib.Path(cache_dir) / f"{stem}-{key}"
+
+    if not destination.exists():
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        staging = pathlib.Path(tempfile.mkdtemp(prefix=".", dir=destination.parent))
+        try:
+            archive = Archive(path)
+            try:
+                archive.extract(staging)
+            finally:
+                archive.close()
+            os.replace(staging, destination)
+        except OSError:
+            # Another process may have extracted the archive concurrently
+            if not destination.exists():
+                raise
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+    return destination
@@ -0,0 +1,400 @@
+"""
+Provision the project conda environments on the server.
+
+The environments are created in background jobs with the conda executable.
+For the template ``conda_pkgs`` specification, a pool of environments is
+created in advance; a new project takes one of them by renaming it rather
+than waiting for a full solve and install.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import re
+import shutil
+import uuid
+from typing import Any, Dict, List, NoReturn, Optional
+
+logger = logging.getLogger(__name__)
+
+# Conda environment specification file of a project
+ENVIRONMENT_FILE = "environment.yml"
+# Characters not allowed in an environment name
+FORBIDDEN_ENV_CHAR = re.compile(r"[/\s:#]")
+# Environment types known by jupyter_conda -> packages
+ENVIRONMENT_TYPES = {
+    "python3": ["python=3", "ipykernel"],
+    "r": ["r-base", "r-essentials"],
+}
+# Prefix of the environments names in the pool
+POOL_PREFIX = "_jupyter_project_pool_"
+# File storing the specification hash in the environment conda-meta folder
+SPEC_FILENAME = "jupyter-project.json"
+
+
+class CondaError(RuntimeError):
+    """Error raised when a conda command fails."""
+
+
+def environment_name(configuration: Dict[str, Any]) -> str:
+    """Get the conda environment name of a project.
+
+    The name is the one used by the frontend: the ``environment`` configuration
+    entry or the project name without forbidden characters; in lower case.
+
+    Args:
+        configuration (Dict): Project configuration
+
+    Returns:
+        str: Environment name
+    """
+    name = configuration.get("environment") or FORBIDDEN_ENV_CHAR.sub(
+        "_", configuration["name"]
+    )
+    return name.lower()
+
+
+def resolve_packages(conda_pkgs: str) -> List[str]:
+    """Get the packages of a ``conda_pkgs`` specification.
+
+    Args:
+        conda_pkgs (str): Environment type or space separated list of packages
+
+    Returns:
+        List[str]: Sorted packages
+    """
+    return sorted(ENVIRONMENT_TYPES.get(conda_pkgs, conda_pkgs.split()))
+
+
+def spec_hash(packages: List[str] = None, environment_file: bytes = None) -> str:
+    """Hash an environment specification.
+
+    Args:
+        packages (List[str]): Packages of the environment
+        environment_file (bytes): Content of the environment specification file; it takes precedence over packages
+
+    Returns:
+        str: Specification hash
+    """
+    if environment_file is not None:
+        content = b"file:" + environment_file
+    else:
+        content = b"packages:" + json.dumps(sorted(packages or [])).encode("utf-8")
+    return hashlib.sha256(content).hexdigest()
+
+
+class CondaEnvironments:
+    """Create the conda environments of the projects in background jobs.
+
+    An environment is reused if it was created by this class with the same
+    specification hash; the one named after the project is preferred. Only
+    the latter is reused if the project is installed in the environment, so
+    projects never share their installed packages. The environments not
+    created by this class are never used. Otherwise, for the
+    packages specification, one environment of the pool is renamed (or cloned
+    if renaming is not supported); a new one is created in the background to
+    refill the pool. Environments specified by a file are created.
+    """
+
+    def __init__(self, executable: str, pool_size: int = 1):
+        """Initialize the environments provisioner
+
+        Args:
+            executable (str): Conda executable
+            pool_size (int): Number of environments created in advance per packages specification
+        """
+        self.executable = executable
+        self.pool_size = pool_size
+        # Specification hash -> lock on the environments of that specification
+        self._locks = dict()
+        # Specification hash -> pool filling job
+        self._fill_jobs = dict()
+
+    def _lock(self, hash: str) -> asyncio.Lock:
+        if hash not in self._locks:
+            self._locks[hash] = asyncio.Lock()
+        return self._locks[hash]
+
+    async def _run(self, *args: str) -> str:
+        """Execute a conda command.
+
+        Args:
+            args (str): Command arguments
+
+        Returns:
+            str: Command standard output
+
+        Raises:
+            CondaError: if the command fails
+        """
+        logger.debug(f"Executing conda {' '.join(args)}")
+        try:
+            process = await asyncio.create_subprocess_exec(
+                self.executable,
+                *args,
+                stdout=asyncio.subprocess.PIPE,
+                stderr=asyncio.subprocess.PIPE,
+            )
+        except OSError as error:
+            raise CondaError(f"Unable to execute conda: {error!s}")
+        stdout, stderr = await process.communicate()
+        if process.returncode != 0:
+            message = stderr.decode("utf-8", errors="replace").strip()
+            try:
+                message = json.loads(stdout)["message"]
+            except (ValueError, KeyError, TypeError):
+                pass
+            raise CondaError(
+                f"conda {args[0]} failed with code {process.returncode}: {message}"
+            )
+        return stdout.decode("utf-8", errors="replace")
+
+    async def list(self) -> Dict[str, pathlib.Path]:
+        """List the conda environments.
+
+        Returns:
+            Dict[str, pathlib.Path]: Environment name -> prefix
+        """
+        output = await self._run("env", "list", "--json")
+        try:
+            prefixes = json.loads(output)["envs"]
+        except (ValueError, KeyError) as error:
+            raise CondaError(f"Unexpected conda env list output: {error!s}")
+        return {pathlib.Path(p).name: pathlib.Path(p) for p in prefixes}
+
+    @staticmethod
+    def get_hash(prefix: pathlib.Path) -> Optional[str]:
+        """Get the specification hash of an environment.
+
+        Args:
+            prefix (pathlib.Path): Environment prefix
+
+        Returns:
+            Optional[str]: Specification hash; None if the environment was not provisioned by this class
+        """
+        try:
+            content = (prefix / "conda-meta" / SPEC_FILENAME).read_text()
+            return json.loads(content)["hash"]
+        except (OSError, ValueError, KeyError, TypeError):
+            return None
+
+    @staticmethod
+    def _set_hash(prefix: pathlib.Path, hash: str) -> NoReturn:
+        meta = prefix / "conda-meta"
+        meta.mkdir(parents=True, exist_ok=True)
+        (meta / SPEC_FILENAME).write_text(json.dumps({"hash": hash}))
+
+    async def _create(self, name: str, packages: List[str], hash: str) -> NoReturn:
+        await self._run(
+            "create", "--yes", "--quiet", "--json", "--name", name, *packages
+        )
+        prefix = (await self.list())[name]
+        self._set_hash(prefix, hash)
+
+    async def _take_from_pool(self, name: str, hash: str) -> bool:
+        """Rename an environment of the pool.
+
+        Args:
+            name (str): New environment name
+            hash (str): Specification hash
+
+        Returns:
+            bool: Whether an environment of the pool was available
+        """
+        pool_prefix = f"{POOL_PREFIX}{hash[:12]}_"
+        async with self._lock(hash):
+            environments = await self.list()
+            pool = sorted(
+                n
+                for n, prefix in environments.items()
+                if n.startswith(pool_prefix) and self.get_hash(prefix) == hash
+            )
+            if len(pool) == 0:
+                return False
+
+            source = pool[0]
+            try:
+                await self._run("rename", "--yes", "--name", source, name)
+            except CondaError as error:
+                logger.debug(f"Fail to rename {source}; cloning it instead: {error!s}")
+                await self._run(
+                    "create",
+                    "--yes",
+                    "--quiet",
+                    "--json",
+                    "--offline",
+                    "--name",
+                    name,
+                    "--clone",
+                    source,
+                )
+                await self._run("env", "remove", "--yes", "--json", "--name", source)
+            prefix = (await self.list())[name]
+            self._set_hash(prefix, hash)
+            return True
+
+    async def fill_pool(self, packages: List[str]) -> int:
+        """Create the missing environments of the pool of a packages specification.
+
+        Args:
+            packages (List[str]): Packages of the environments
+
+        Returns:
+            int: Number of created environments
+        """
+        hash = spec_hash(packages)
+        pool_prefix = f"{POOL_PREFIX}{hash[:12]}_"
+        created = 0
+        while True:
+            async with self._lock(hash):
+                environments = await self.list()
+                count = sum(
+                    1
+                    for n, prefix in environments.items()
+                    if n.startswith(pool_prefix) and self.get_hash(prefix) == hash
+                )
+                if count >= self.pool_size:
+                    return created
+                name = pool_prefix + uuid.uuid4().hex[:8]
+            # Do not hold the lock during the creation so projects can take
+            # the ready environments
+            await self._create(name, packages, hash)
+            created += 1
+
+    def start_fill_pool(self, packages: List[str]) -> Optional[asyncio.Task]:
+        """Refill the pool of a packages specification in a background job.
+
+        Args:
+            packages (List[str]): Packages of the environments
+
+        Returns:
+            Optional[asyncio.Task]: The job; None if the pool is disabled
+        """
+        if self.pool_size == 0:
+            return None
+
+        hash = spec_hash(packages)
+        job = self._fill_jobs.get(hash)
+        if job is not None and not job.done():
+            return job
+
+        async def fill():
+            try:
+                created = await self.fill_pool(packages)
+            except CondaError as error:
+                logger.warning(f"Fail to fill the conda environments pool: {error!s}")
+            else:
+                if created:
+                    logger.info(f"{created} conda environment(s) added to the pool.")
+
+        job = self._fill_jobs[hash] = asyncio.ensure_future(fill())
+        return job
+
+    async def provision(
+        self,
+        project: pathlib.Path,
+        configuration: Dict[str, Any],
+        conda_pkgs: Optional[str],
+        editable_install: bool = False,
+    ) -> Dict[str, Any]:
+        """Provide the conda environment of a project.
+
+        Args:
+            project (pathlib.Path): Project folder
+            configuration (Dict): Project configuration
+            conda_pkgs (Optional[str]): Environment type or space separated list of packages
+            editable_install (bool): Install the project in pip editable mode
+
+        Returns:
+            Dict: {environment: name, reused: whether an existing environment is used, pooled: whether it comes from the pool}
+
+        Raises:
+            CondaError: if the environment cannot be created
+        """
+        name = environment_name({"name": project.name, **configuration})
+        environment_file = project / ENVIRONMENT_FILE
+        try:
+            file_content = environment_file.read_bytes()
+        except FileNotFoundError:
+            file_content = None
+        if file_content is None and conda_pkgs is None:
+            raise CondaError("No conda environment specification.")
+
+        packages = None if file_content is not None else resolve_packages(conda_pkgs)
+        hash = spec_hash(packages, file_content)
+        install = editable_install and any(
+            (project / f).exists() for f in ("setup.py", "pyproject.toml")
+        )
+
+        environments = await self.list()
+        if name in environments:
+            existing = self.get_hash(environments[name])
+            if existing is None:
+                raise CondaError(
+                    f"Environment '{name}' already exists and was not provisioned by the server."
+                )
+            if existing != hash:
+                raise CondaError(
+                    f"Environment '{name}' already exists with another specification."
+                )
+            return {"environment": name, "reused": True, "pooled": False}
+
+        reused = pooled = False
+        matching = (
+            # The environment name is imposed by the configuration or the
+            # project is installed in it
+            list()
+            if "environment" in configuration or install
+            else sorted(
+                n
+                for n, prefix in environments.items()
+                if not n.startswith(POOL_PREFIX) and self.get_hash(prefix) == hash
+            )
+        )
+        if len(matching) > 0:
+            name = matching[0]
+            reused = True
+        elif file_content is not None:
+            await self._run(
+                "env",
+                "create",
+                "--quiet",
+                "--json",
+                "--name",
+                name,
+                "--file",
+                str(environment_file),
+            )
+            self._set_hash((await self.list())[name], hash)
+        else:
+            pooled = self.pool_size > 0 and await self._take_from_pool(name, hash)
+            if not pooled:
+                await self._create(name, packages, hash)
+            self.start_fill_pool(packages)
+
+        if install:
+            await self._run(
+                "run",
+                "--name",
+                name,
+                "python",
+                "-m",
+                "pip",
+                "install",
+                "--no-deps",
+                "--editable",
+                str(project),
+            )
+
+        return {"environment": name, "reused": reused, "pooled": pooled}
+
+
+def default_executable() -> Optional[str]:
+    """Get the default conda executable.
+
+    Returns:
+        Optional[str]: $CONDA_EXE or conda found on the PATH; None if not found
+    """
+    return os.environ.get("CONDA_EXE") or shutil.which("conda")
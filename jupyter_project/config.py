@@ -1,4 +1,7 @@
-from traitlets import List, Unicode
+import os
+
+from jupyter_core.paths import jupyter_data_dir
+from traitlets import Bool, Enum, Float, Integer, List, Unicode, default
 from traitlets.config import Configurable
 
 from .autoinstance import AutoInstance
@@ -9,6 +12,35 @@ from .project import ProjectTemplate
 class JupyterProject(Configurable):
     """Configuration for jupyter-project server extension."""
 
+    cache_dir = Unicode(
+        help="Folder in which the server extension caches are stored [optional]",
+        config=True,
+    )
+
+    conda_executable = Unicode(
+        help="Conda executable provisioning the projects environments; default to $CONDA_EXE or conda on the PATH [optional]",
+        config=True,
+    )
+
+    conda_pool_size = Integer(
+        default_value=1,
+        min=0,
+        help="Number of environments created in advance for the project template 'conda_pkgs'; a new project environment is renamed from it [optional]",
+        config=True,
+    )
+
+    conda_provisioning = Bool(
+        default_value=False,
+        help="Create the conda environment of the new and imported projects on the server in background jobs rather than from the frontend [optional]",
+        config=True,
+    )
+
+    events_poll_interval = Float(
+        default_value=1.0,
+        help="Polling interval in seconds of the opened projects configuration file if watchdog is not installed [optional]",
+        config=True,
+    )
+
     file_templates = List(
         default_value=list(),
         trait=AutoInstance(FileTemplateLoader),
@@ -16,9 +48,75 @@ class JupyterProject(Configurable):
         config=True,
     )
 
+    kernel_prespawn_timeout = Float(
+        default_value=0.0,
+        min=0.0,
+        help="Start a kernel in the project environment when a project is opened; it is shut down if no notebook of the project default folder adopts it within this duration (in seconds); 0 to disable [optional]",
+        config=True,
+    )
+
     project_template = AutoInstance(
         ProjectTemplate,
         allow_none=True,
         help="The project template options",
         config=True,
     )
+
+    schemas_dir = Unicode(
+        help="Folder in which the relative `$ref` of the templates JSON schemas are resolved; default to the server working directory [optional]",
+        config=True,
+    )
+
+    session_timeout = Float(
+        default_value=86400.0,
+        min=0.0,
+        help="Duration in seconds after which the project session of an inactive browser tab expires: its kernel filter is removed and its prespawned kernel is released; 0 to disable [optional]",
+        config=True,
+    )
+
+    slow_request_threshold = Float(
+        default_value=0.0,
+        help="Requests lasting longer than this duration (in seconds) are logged with their timing breakdown as JSON; 0 to disable [optional]",
+        config=True,
+    )
+
+    template_cache_bytes = Integer(
+        default_value=0,
+        min=0,
+        help="Maximal approximate size in bytes of the compiled file templates kept in cache; 0 for no limit [optional]",
+        config=True,
+    )
+
+    template_cache_size = Integer(
+        default_value=400,
+        min=1,
+        help="Maximal number of compiled file templates kept in cache [optional]",
+        config=True,
+    )
+
+    template_enable_async = Bool(
+        default_value=False,
+        help="Render the file templates asynchronously on the IOLoop rather than in a thread; asynchronous globals and filters are awaited [optional]",
+        config=True,
+    )
+
+    trace_exporter = Enum(
+        values=["console", "file"],
+        default_value=None,
+        allow_none=True,
+        help="Export the trace spans of the project and file generations to the server log ('console') or to 'trace_file' ('file') [optional]",
+        config=True,
+    )
+
+    trace_file = Unicode(
+        help="File to which the trace spans are appended as JSON lines if 'trace_exporter' is 'file' [optional]",
+        config=True,
+    )
+
+    @default("cache_dir")
+    def _default_cache_dir(self) -> str:
+        return os.path.join(jupyter_data_dir(), "jupyter_project")
+
+    @default("trace_file")
+    def _default_trace_file(self) -> str:
+        return os.path.join(self.cache_dir, "traces.jsonl")
@@ -0,0 +1,260 @@
+import asyncio
+import logging
+import pathlib
+from typing import Any, Dict, NoReturn, Optional, Tuple
+
+import tornado.ioloop
+from jsonschema.exceptions import ValidationError
+
+from .mergepatch import merge_diff
+from .project import ProjectTemplate
+
+try:
+    from watchdog.events import FileSystemEventHandler
+    from watchdog.observers import Observer
+except ImportError:
+    FileSystemEventHandler = object  # noqa
+    Observer = None  # noqa
+
+logger = logging.getLogger(__name__)
+
+# Maximal number of events waiting to be sent to a client
+MAX_PENDING_EVENTS = 100
+
+
+class _ConfigurationEventHandler(FileSystemEventHandler):
+    """watchdog handler forwarding the configuration file events to the watcher."""
+
+    def __init__(self, watcher: "ProjectsWatcher", key: str):
+        super().__init__()
+        self.watcher = watcher
+        self.key = key
+
+    def on_any_event(self, event):
+        filename = self.watcher.template.configuration_filename
+        paths = (event.src_path, getattr(event, "dest_path", ""))
+        if any(pathlib.Path(p).name == filename for p in paths if p):
+            # Called from the observer thread
+            self.watcher.loop.add_callback(self.watcher.check, self.key)
+
+
+class ProjectsWatcher:
+    """Watch the configuration file of the opened projects and broadcast changes.
+
+    A single watcher is shared by all clients. Each opened project is watched
+    once whatever the number of sessions having opened it. If `watchdog` is
+    installed, the file system notifications are used; otherwise the
+    configuration files are polled.
+
+    Events are broadcasted to the subscribers as (event type, data) tuples:
+
+    - ("created", {"path": str, "project": Dict}): a project was created
+    - ("changed", {"path": str, "diff": Dict}): a project configuration changed;
+      the diff is a JSON merge patch (RFC 7386) from the previous configuration
+    - ("deleted", {"path": str}): a project was deleted
+    """
+
+    def __init__(self, template: ProjectTemplate, poll_interval: float = 1.0):
+        """Initialize the watcher
+
+        Args:
+            template (ProjectTemplate): Project template
+            poll_interval (float): Polling interval in seconds if `watchdog` is not available
+        """
+        self.template = template
+        self.poll_interval = poll_interval
+        self.loop = None
+        # Project absolute path -> watched project
+        self._projects = dict()
+        # Session id -> project absolute path
+        self._sessions = dict()
+        self._subscribers = set()
+        # Projects being checked
+        self._pending = set()
+        # Projects changed while being checked
+        self._dirty = set()
+        self._observer = None
+        self._poller = None
+
+    def subscribe(self) -> asyncio.Queue:
+        """Subscribe to the projects events.
+
+        Returns:
+            asyncio.Queue: Queue receiving the (event type, data) tuples
+        """
+        queue = asyncio.Queue(maxsize=MAX_PENDING_EVENTS)
+        self._subscribers.add(queue)
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue) -> NoReturn:
+        """Unsubscribe from the projects events.
+
+        Args:
+            queue (asyncio.Queue): Subscriber queue
+        """
+        self._subscribers.discard(queue)
+
+    def publish(self, event: str, data: Dict[str, Any]) -> NoReturn:
+        """Broadcast an event to all subscribers.
+
+        Args:
+            event (str): Event type
+            data (Dict): Event data
+        """
+        for queue in self._subscribers:
+            try:
+                queue.put_nowait((event, data))
+            except asyncio.QueueFull:
+                logger.debug(f"Event '{event}' dropped for a slow subscriber.")
+
+    def open(
+        self,
+        session: str,
+        path: str,
+        fullpath: pathlib.Path,
+        configuration: Dict[str, Any],
+    ) -> NoReturn:
+        """Watch a project opened by a session.
+
+        Args:
+            session (str): Session id
+            path (str): Project path relative to the server root
+            fullpath (pathlib.Path): Project absolute path
+            configuration (Dict): Current project configuration
+        """
+        self.close(session)
+        if len(self.template.configuration_filename) == 0:
+            return
+
+        self.loop = self.loop or tornado.ioloop.IOLoop.current()
+        key = str(fullpath)
+        project = self._projects.get(key)
+        if project is None:
+            project = {
+                "path": path,
+                "configuration": dict(configuration),
+                "sessions": set(),
+                "stat": self._stat(key),
+                "watch": None,
+            }
+            self._projects[key] = project
+            self._start_watch(key)
+        project["sessions"].add(session)
+        self._sessions[session] = key
+
+    def close(self, session: str) -> NoReturn:
+        """Stop watching the project opened by a session.
+
+        Args:
+            session (str): Session id
+        """
+        key = self._sessions.pop(session, None)
+        if key is not None and key in self._projects:
+            sessions = self._projects[key]["sessions"]
+            sessions.discard(session)
+            if len(sessions) == 0:
+                self._forget(key)
+
+    def forget(self, fullpath: pathlib.Path) -> NoReturn:
+        """Stop watching a project for all sessions.
+
+        Args:
+            fullpath (pathlib.Path): Project absolute path
+        """
+        key = str(fullpath)
+        if key in self._projects:
+            for session in self._projects[key]["sessions"]:
+                self._sessions.pop(session, None)
+            self._forget(key)
+
+    def _forget(self, key: str) -> NoReturn:
+        project = self._projects.pop(key)
+        if project["watch"] is not None:
+            try:
+                self._observer.unschedule(project["watch"])
+            except KeyError:
+                pass
+        if len(self._projects) == 0 and self._poller is not None:
+            self._poller.stop()
+            self._poller = None
+
+    def _start_watch(self, key: str) -> NoReturn:
+        if Observer is not None:
+            if self._observer is None:
+                self._observer = Observer()
+                self._observer.daemon = True
+                self._observer.start()
+            try:
+                self._projects[key]["watch"] = self._observer.schedule(
+                    _ConfigurationEventHandler(self, key), key, recursive=False
+                )
+                return
+            except OSError as error:
+                logger.debug(f"Unable to watch {key}; fallback to polling: {error!s}")
+
+        if self._poller is None:
+            self._poller = tornado.ioloop.PeriodicCallback(
+                self._poll, self.poll_interval * 1000
+            )
+            self._poller.start()
+
+    def _stat(self, key: str) -> Optional[Tuple[int, int]]:
+        try:
+            stat = (pathlib.Path(key) / self.template.configuration_filename).stat()
+        except OSError:
+            return None
+        return stat.st_mtime_ns, stat.st_size
+
+    def _poll(self) -> NoReturn:
+        for key, project in self._projects.items():
+            if project["watch"] is None:
+                stat = self._stat(key)
+                if stat != project["stat"]:
+                    project["stat"] = stat
+                    self.loop.add_callback(self.check, key)
+
+    async def check(self, key: str) -> NoReturn:
+        """Check a project configuration and publish its changes.
+
+        If the project is already being checked, it is checked again once the
+        running check is over.
+
+        Args:
+            key (str): Project absolute path
+        """
+        if key in self._pending:
+            self._dirty.add(key)
+            return
+
+        self._pending.add(key)
+        try:
+            self._dirty.add(key)
+            while key in self._dirty:
+                self._dirty.discard(key)
+                await self._check(key)
+        finally:
+            self._pending.discard(key)
+            self._dirty.discard(key)
+
+    async def _check(self, key: str) -> NoReturn:
+        project = self._projects.get(key)
+        if project is None:
+            return
+
+        fullpath = pathlib.Path(key)
+        try:
+            configuration = await self.loop.run_in_executor(
+                None, self.template.get_configuration, fullpath
+            )
+        except (ValidationError, ValueError):
+            configuration_file = fullpath / self.template.configuration_filename
+            if key in self._projects and not configuration_file.exists():
+                self.forget(fullpath)
+                self.publish("deleted", {"path": project["path"]})
+            # Else invalid or partially written configuration; wait for the next change
+            return
+
+        diff = merge_diff(project["configuration"], configuration)
+        if len(diff) > 0:
+            project["configuration"] = configuration
+            self.publish("changed", {"path": project["path"], "diff": diff})
@@ -0,0 +1,210 @@
+"""
+Stream a project folder as a zip or tar.gz archive.
+
+The archive is generated chunk by chunk so neither the memory nor the disk
+usage grows with the project size.
+"""
+import fnmatch
+import os
+import pathlib
+import stat
+import tarfile
+import zipfile
+import zlib
+from typing import Iterator, Sequence, Tuple
+
+# Size in bytes of the chunks read from the project files
+CHUNK_SIZE = 256 * 1024
+# Export format -> (Content type, File extension)
+EXPORT_FORMATS = {
+    "tar.gz": ("application/gzip", ".tar.gz"),
+    "zip": ("application/zip", ".zip"),
+}
+
+
+def _is_ignored(name: str, relative: str, ignore: Sequence[str]) -> bool:
+    return any(
+        fnmatch.fnmatch(name, pattern) or fnmatch.fnmatch(relative, pattern)
+        for pattern in ignore
+    )
+
+
+def iter_project_files(
+    root: pathlib.Path, ignore: Sequence[str] = tuple()
+) -> Iterator[Tuple[pathlib.Path, str]]:
+    """Walk the folders and files of a project.
+
+    Symbolic links are skipped so no file outside of the project is exported.
+
+    Args:
+        root (pathlib.Path): Project folder
+        ignore (Sequence[str]): Glob patterns matched against the names and the
+            posix paths relative to the root of the entries to skip
+
+    Returns:
+        Iterator[Tuple[pathlib.Path, str]]: (Entry path, posix path relative to the root)
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        current = pathlib.Path(dirpath)
+        prefix = current.relative_to(root).as_posix()
+        prefix = "" if prefix == "." else prefix + "/"
+
+        kept = list()
+        for name in sorted(dirnames):
+            path = current / name
+            relative = prefix + name
+            if path.is_symlink() or _is_ignored(name, relative, ignore):
+                continue
+            kept.append(name)
+            yield path, relative
+        # Prune the ignored folders
+        dirnames[:] = kept
+
+        for name in sorted(filenames):
+            path = current / name
+            relative = prefix + name
+            if path.is_symlink() or _is_ignored(name, relative, ignore):
+                continue
+            yield path, relative
+
+
+class _ChunksBuffer:
+    """Unseekable file object accumulating the written data until popped."""
+
+    def __init__(self):
+        self._chunks = list()
+        self._position = 0
+
+    def write(self, data: bytes) -> int:
+        self._chunks.append(bytes(data))
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def flush(self):
+        pass
+
+    def pop(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _read_chunks(path: pathlib.Path, chunk_size: int) -> Iterator[bytes]:
+    with path.open("rb") as f:
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                break
+            yield chunk
+
+
+def _stream_zip(
+    entries: Iterator[Tuple[pathlib.Path, str]], chunk_size: int
+) -> Iterator[bytes]:
+    buffer = _ChunksBuffer()
+    # The stream is not seekable so the sizes and CRC are written after each file
+    with zipfile.ZipFile(buffer, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for path, name in entries:
+            try:
+                info = zipfile.ZipInfo.from_file(path, name)
+            except FileNotFoundError:
+                # Removed since the folder was listed
+                continue
+            if info.is_dir():
+                archive.writestr(info, b"")
+            else:
+                info.compress_type = zipfile.ZIP_DEFLATED
+                with archive.open(info, "w") as dest:
+                    for chunk in _read_chunks(path, chunk_size):
+                        dest.write(chunk)
+                        data = buffer.pop()
+                        if data:
+                            yield data
+            yield buffer.pop()
+    yield buffer.pop()
+
+
+def _stream_tar_gz(
+    entries: Iterator[Tuple[pathlib.Path, str]], chunk_size: int
+) -> Iterator[bytes]:
+    # wbits=31 produces the gzip header and trailer
+    compressor = zlib.compressobj(6, zlib.DEFLATED, 31)
+    offset = 0
+    for path, name in entries:
+        try:
+            status = path.stat()
+        except FileNotFoundError:
+            # Removed since the folder was listed
+            continue
+        info = tarfile.TarInfo(name)
+        info.mtime = status.st_mtime
+        info.mode = status.st_mode & 0o7777
+        if stat.S_ISDIR(status.st_mode):
+            info.type = tarfile.DIRTYPE
+        else:
+            info.size = status.st_size
+        header = info.tobuf(tarfile.PAX_FORMAT, "utf-8", "surrogateescape")
+        offset += len(header)
+        yield compressor.compress(header)
+
+        if info.isdir():
+            continue
+
+        size = 0
+        for chunk in _read_chunks(path, chunk_size):
+            # Ignore data appended after the header was written
+            chunk = chunk[: info.size - size]
+            size += len(chunk)
+            yield compressor.compress(chunk)
+            if size >= info.size:
+                break
+        # Fill truncated files and pad the data to a full block
+        padding = info.size - size + (-info.size) % tarfile.BLOCKSIZE
+        offset += info.size + (-info.size) % tarfile.BLOCKSIZE
+        while padding > 0:
+            length = min(padding, chunk_size)
+            yield compressor.compress(tarfile.NUL * length)
+            padding -= length
+
+    # End of archive: two empty blocks then padding to a full record
+    end = 2 * tarfile.BLOCKSIZE
+    end += (-(offset + end)) % tarfile.RECORDSIZE
+    yield compressor.compress(tarfile.NUL * end) + compressor.flush()
+
+
+def stream_archive(
+    root: pathlib.Path,
+    format: str,
+    ignore: Sequence[str] = tuple(),
+    chunk_size: int = CHUNK_SIZE,
+) -> Iterator[bytes]:
+    """Generate an archive of a project folder chunk by chunk.
+
+    The archive entries are prefixed by the project folder name. At most one
+    chunk of each file is held in memory.
+
+    Args:
+        root (pathlib.Path): Project folder
+        format (str): Archive format; one of EXPORT_FORMATS
+        ignore (Sequence[str]): Glob patterns of the entries to skip
+        chunk_size (int): Size of the chunks read from the files
+
+    Returns:
+        Iterator[bytes]: Archive chunks; some may be empty
+
+    Raises:
+        ValueError: if the format is not supported
+    """
+    if format not in EXPORT_FORMATS:
+        raise ValueError(f"Unsupported export format '{format}'.")
+
+    entries = (
+        (path, f"{root.name}/{name}") for path, name in iter_project_files(root, ignore)
+    )
+    if format == "zip":
+        return _stream_zip(entries, chunk_size)
+    else:
+        return _stream_tar_gz(entries, chunk_size)
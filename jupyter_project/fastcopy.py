@@ -0,0 +1,279 @@
+"""
+Fast copy of the files that cookiecutter copies without rendering.
+
+cookiecutter copies binary files and the paths matching ``_copy_without_render``
+with ``shutil.copyfile`` and ``shutil.copytree``. Those calls are redirected
+(only while a project is rendered and for its thread) to :py:func:`clone_file` that
+materialises the file with a copy-on-write clone, a hard link or a kernel-side
+copy instead of streaming the content through Python. The copies keep the
+source modification time and are recorded, so they can be identified without
+reading their content.
+"""
+import concurrent.futures
+import contextlib
+import errno
+import logging
+import os
+import shutil
+import stat
+import threading
+from typing import Callable, Iterator, NoReturn, Optional, Set, Tuple
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None  # noqa
+
+import cookiecutter.generate
+
+logger = logging.getLogger(__name__)
+
+# Linux ioctl request to clone a file: _IOW(0x94, 9, int)
+FICLONE = 0x40049409
+# Copy modes
+COPY_MODES = ("copy", "reflink", "hardlink")
+
+_settings = threading.local()
+
+
+def _reflink(src: str, dst: str) -> bool:
+    if fcntl is None:
+        return False
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        try:
+            fcntl.ioctl(fdst.fileno(), FICLONE, fsrc.fileno())
+        except OSError:
+            return False
+    return True
+
+
+def _hardlink(src: str, dst: str) -> bool:
+    try:
+        if os.path.lexists(dst):
+            os.unlink(dst)
+        os.link(src, dst)
+    except OSError:
+        return False
+    return True
+
+
+def _copy_file_range(src: str, dst: str) -> bool:
+    if not hasattr(os, "copy_file_range"):
+        return False
+
+    with open(src, "rb") as fsrc, open(dst, "wb") as fdst:
+        size = os.fstat(fsrc.fileno()).st_size
+        copied = 0
+        try:
+            while copied < size:
+                sent = os.copy_file_range(
+                    fsrc.fileno(), fdst.fileno(), size - copied
+                )
+                if sent == 0:
+                    break
+                copied += sent
+        except OSError as error:
+            if error.errno in (errno.EXDEV, errno.ENOSYS, errno.EINVAL, errno.EOPNOTSUPP):
+                return False
+            raise
+    return copied == size
+
+
+def clone_file(src: str, dst: str, hardlink: bool = False) -> str:
+    """Create dst with the content of src using the cheapest available method.
+
+    The methods tried are in order: reflink (copy-on-write clone), hard link
+    (only if ``hardlink`` is True and on the same filesystem), kernel-side
+    ``copy_file_range`` and ``shutil.copyfile``.
+
+    Args:
+        src (str): Source file
+        dst (str): Destination file
+        hardlink (bool): Whether a hard link may be used or not
+
+    Returns:
+        str: Destination file
+
+    Raises:
+        shutil.SpecialFileError: if src is not a regular file (e.g. a named pipe or a device)
+    """
+    # Opening a named pipe or a device may block or read an endless stream
+    if not stat.S_ISREG(os.stat(src).st_mode):
+        raise shutil.SpecialFileError(f"{src} is not a regular file.")
+    if _reflink(src, dst):
+        return dst
+    if hardlink and _hardlink(src, dst):
+        return dst
+    if _copy_file_range(src, dst):
+        return dst
+    return shutil.copyfile(src, dst)
+
+
+def clone_tree(
+    src: str, dst: str, mode: str = "reflink", max_workers: Optional[int] = None
+) -> str:
+    """Duplicate a folder tree.
+
+    The folders are created first, then the files are cloned in parallel with
+    :py:func:`clone_file` (or copied with ``shutil.copyfile`` if mode is 'copy').
+    The symbolic links are recreated as is; the other special files (named
+    pipes, devices, sockets) are skipped.
+
+    Args:
+        src (str): Source folder
+        dst (str): Destination folder
+        mode (str): One of 'copy', 'reflink' or 'hardlink'
+        max_workers (int): Maximal number of files copied concurrently [optional]
+
+    Returns:
+        str: Destination folder
+    """
+    if mode not in COPY_MODES:
+        raise ValueError(f"Unknown copy mode '{mode}'.")
+
+    folders = list()
+    files = list()
+    for dirpath, dirnames, filenames in os.walk(src):
+        target = os.path.normpath(os.path.join(dst, os.path.relpath(dirpath, src)))
+        os.makedirs(target, exist_ok=True)
+        folders.append((dirpath, target))
+        for name in dirnames + filenames:
+            source = os.path.join(dirpath, name)
+            if os.path.islink(source):
+                os.symlink(os.readlink(source), os.path.join(target, name))
+            elif name in filenames:
+                if stat.S_ISREG(os.lstat(source).st_mode):
+                    files.append((source, os.path.join(target, name)))
+                else:
+                    logger.debug(f"Special file {source} skipped.")
+
+    def copy(paths: Tuple[str, str]):
+        source, target = paths
+        if mode == "copy":
+            shutil.copyfile(source, target)
+        else:
+            clone_file(source, target, hardlink=mode == "hardlink")
+        shutil.copystat(source, target)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers=max_workers) as executor:
+        for _ in executor.map(copy, files):
+            pass
+
+    # The folders modification times are changed by the files creation
+    for source, target in reversed(folders):
+        shutil.copystat(source, target)
+    return dst
+
+
+class _ShutilProxy:
+    """Proxy of the shutil module used by cookiecutter.generate."""
+
+    def __getattr__(self, name: str):
+        return getattr(shutil, name)
+
+    @staticmethod
+    def copyfile(src: str, dst: str, *, follow_symlinks: bool = True) -> str:
+        copied = getattr(_settings, "copied", None)
+        # Other threads and symbolic links are left to shutil
+        if copied is None or (not follow_symlinks and os.path.islink(src)):
+            return shutil.copyfile(src, dst, follow_symlinks=follow_symlinks)
+        mode = _settings.mode
+        if mode == "copy":
+            shutil.copyfile(src, dst)
+        else:
+            clone_file(src, dst, hardlink=mode == "hardlink")
+        # Same modification time whatever the render; already set for a hard link
+        source = os.stat(src)
+        if os.stat(dst).st_mtime_ns != source.st_mtime_ns:
+            os.utime(dst, ns=(source.st_atime_ns, source.st_mtime_ns))
+        copied.add(os.path.abspath(dst))
+        return dst
+
+    @staticmethod
+    def copytree(src: str, dst: str, **kwargs) -> str:
+        if getattr(_settings, "copied", None) is not None:
+            kwargs.setdefault("copy_function", _copy2)
+        return shutil.copytree(src, dst, **kwargs)
+
+
+def _copy2(src: str, dst: str) -> str:
+    _ShutilProxy.copyfile(src, dst)
+    shutil.copystat(src, dst)
+    return dst
+
+
+def _is_binary(is_binary: Callable[[str], bool]) -> Callable[[str], bool]:
+    def wrapper(filename: str) -> bool:
+        size_limit = getattr(_settings, "size_limit", 0)
+        if size_limit > 0:
+            try:
+                if os.stat(filename).st_size > size_limit:
+                    logger.debug(f"Copy {filename} without rendering due to its size.")
+                    return True
+            except OSError:
+                pass
+        return is_binary(filename)
+
+    return wrapper
+
+
+_install_lock = threading.Lock()
+# Number of running renders
+_install_count = 0
+# Original (shutil, is_binary) of cookiecutter.generate while patched
+_originals = None
+
+
+def _install() -> NoReturn:
+    global _install_count, _originals
+    with _install_lock:
+        if _install_count == 0:
+            _originals = (cookiecutter.generate.shutil, cookiecutter.generate.is_binary)
+            cookiecutter.generate.shutil = _ShutilProxy()
+            cookiecutter.generate.is_binary = _is_binary(_originals[1])
+        _install_count += 1
+
+
+def _uninstall() -> NoReturn:
+    global _install_count, _originals
+    with _install_lock:
+        _install_count -= 1
+        if _install_count == 0:
+            cookiecutter.generate.shutil, cookiecutter.generate.is_binary = _originals
+            _originals = None
+
+
+@contextlib.contextmanager
+def static_files_copy(
+    mode: str = "reflink", size_limit: int = 0
+) -> Iterator[Set[str]]:
+    """Context manager setting how cookiecutter copies the files it does not render.
+
+    The settings apply only to the current thread. cookiecutter is patched
+    only while a context is opened; the other callers (and threads) get the
+    shutil behavior.
+
+    Args:
+        mode (str): One of 'copy', 'reflink' or 'hardlink'
+        size_limit (int): Files bigger than this size (in bytes) are not rendered; 0 to disable
+
+    Yields:
+        Set[str]: Absolute paths of the files copied without rendering; filled while rendering
+    """
+    if mode not in COPY_MODES:
+        raise ValueError(f"Unknown copy mode '{mode}'.")
+
+    previous = (
+        getattr(_settings, "mode", "copy"),
+        getattr(_settings, "size_limit", 0),
+        getattr(_settings, "copied", None),
+    )
+    copied = set()
+    _install()
+    _settings.mode, _settings.size_limit, _settings.copied = mode, size_limit, copied
+    try:
+        yield copied
+    finally:
+        _settings.mode, _settings.size_limit, _settings.copied = previous
+        _uninstall()
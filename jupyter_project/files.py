@@ -1,5 +1,5 @@
 """
- Simple regex validation for an SVG string taken from:
+ SVG string validation following the rules of:
  https://github.com/sindresorhus/is-svg
  
  MIT License
@@ -12,21 +12,97 @@
  
  THE SOFTWARE IS PROVIDED "AS IS", WITHOUT WARRANTY OF ANY KIND, EXPRESS OR IMPLIED, INCLUDING BUT NOT LIMITED TO THE WARRANTIES OF MERCHANTABILITY, FITNESS FOR A PARTICULAR PURPOSE AND NONINFRINGEMENT. IN NO EVENT SHALL THE AUTHORS OR COPYRIGHT HOLDERS BE LIABLE FOR ANY CLAIM, DAMAGES OR OTHER LIABILITY, WHETHER IN AN ACTION OF CONTRACT, TORT OR OTHERWISE, ARISING FROM, OUT OF OR IN CONNECTION WITH THE SOFTWARE OR THE USE OR OTHER DEALINGS IN THE SOFTWARE.
 """
+import logging
 import pathlib
-import re
-from typing import Dict
+from typing import Dict, List as TList
+from xml.parsers import expat
 
-from traitlets import HasTraits, List, TraitError, Unicode, validate
+from traitlets import Enum, HasTraits, List, TraitError, Unicode, validate
 from traitlets.utils.bunch import Bunch
 
 from .autoinstance import AutoInstance
+from .index import TemplatesIndex
 from .traits import JSONSchema, Path
 
+logger = logging.getLogger(__name__)
 
-SVG_PATTERN = re.compile(
-    r"^\s*(?:<\?xml[^>]*>\s*)?(?:<!doctype svg[^>]*\s*(?:\[?(?:\s*<![^>]*>\s*)*\]?)*[^>]*>\s*)?(?:<svg[^>]*>.*<\/svg>|<svg[^/>]*\/\s*>)\s*$",
-    re.IGNORECASE | re.DOTALL,
-)
+# Maximal number of characters accepted for an SVG icon
+SVG_MAX_SIZE = 1024 * 1024
+# Number of characters fed at once to the XML parser
+_SVG_CHUNK_SIZE = 64 * 1024
+
+
+class _InvalidSVG(Exception):
+    """Internal exception raised to stop parsing an invalid SVG."""
+
+
+class _SVGValidator:
+    """Incremental SVG validator.
+
+    The string is fed by chunks to an expat parser; so the validation is
+    linear in the input size and stops as soon as an invalid token is found.
+    An SVG is accepted if, apart from an optional XML declaration and an
+    optional ``svg`` doctype, the document is only made of a well-formed
+    ``svg`` root element.
+    """
+
+    def __init__(self):
+        self._root_started = False
+        self._depth = 0
+        self._parser = expat.ParserCreate()
+        self._parser.SetParamEntityParsing(expat.XML_PARAM_ENTITY_PARSING_NEVER)
+        self._parser.StartDoctypeDeclHandler = self._start_doctype
+        self._parser.StartElementHandler = self._start_element
+        self._parser.EndElementHandler = self._end_element
+        self._parser.CommentHandler = self._outside_root
+        self._parser.ProcessingInstructionHandler = self._outside_root
+
+    @staticmethod
+    def _is_svg_name(name: str) -> bool:
+        return name.lower() == "svg"
+
+    def _start_doctype(self, name: str, *args):
+        if not self._is_svg_name(name):
+            raise _InvalidSVG()
+
+    def _start_element(self, name: str, attributes: Dict[str, str]):
+        if not self._root_started:
+            if not self._is_svg_name(name):
+                raise _InvalidSVG()
+            self._root_started = True
+        self._depth += 1
+
+    def _end_element(self, name: str):
+        self._depth -= 1
+
+    def _outside_root(self, *args):
+        # Comments and processing instructions are only allowed within the root
+        if self._depth == 0:
+            raise _InvalidSVG()
+
+    def validate(self, value: str) -> bool:
+        try:
+            for start in range(0, len(value), _SVG_CHUNK_SIZE):
+                self._parser.Parse(value[start : start + _SVG_CHUNK_SIZE], False)
+            self._parser.Parse("", True)
+        except (_InvalidSVG, expat.ExpatError):
+            return False
+        return self._root_started
+
+
+def is_svg(value: str, max_size: int = SVG_MAX_SIZE) -> bool:
+    """Test if a string is a valid SVG image.
+
+    Args:
+        value (str): String to test
+        max_size (int): Maximal number of characters accepted
+
+    Returns:
+        bool: Whether the string is a SVG image or not
+    """
+    if len(value) > max_size:
+        return False
+    return _SVGValidator().validate(value.strip())
 
 
 class FileTemplate(HasTraits):
@@ -44,6 +120,12 @@ class FileTemplate(HasTraits):
         help="Template icon to display in the frontend [optional]",
         config=True,
     )
+    render_mode = Enum(
+        ("text", "notebook"),
+        default_value="text",
+        help="How the template is rendered: 'text' (the whole file) or 'notebook' (each cell of a notebook template containing Jinja2 syntax; the other cells are copied) [optional]",
+        config=True,
+    )
     schema = JSONSchema(
         help="JSON schema list describing the templates parameters [optional]", config=True
     )
@@ -59,7 +141,13 @@ class FileTemplate(HasTraits):
         if self is other:
             return True
 
-        for attr in ("default_name", "destination", "schema", "template"):
+        for attr in (
+            "default_name",
+            "destination",
+            "render_mode",
+            "schema",
+            "template",
+        ):
             if getattr(self, attr) != getattr(other, attr):
                 return False
         return True
@@ -73,7 +161,7 @@ class FileTemplate(HasTraits):
     @validate("icon")
     def _valid_icon(self, proposal: Bunch) -> str:
         if proposal["value"] is not None:
-            if SVG_PATTERN.match(proposal["value"]) is None:
+            if not is_svg(proposal["value"]):
                 raise TraitError("'icon' is not a valid SVG.")
         return proposal["value"]
 
@@ -89,10 +177,13 @@ class FileTemplateLoader(HasTraits):
 
     files = List(
         trait=AutoInstance(FileTemplate),
-        minlen=1,
         help="List of template files",
         config=True,
     )
+    glob = Unicode(
+        help="Glob pattern to discover template files within 'location' [optional]",
+        config=True,
+    )
     location = Unicode(help="Templates path", config=True)
     module = Unicode(
         help="Python package containing the templates 'location' [optional]",
@@ -105,11 +196,11 @@ class FileTemplateLoader(HasTraits):
         # Force checking the default value as they are not valid
         self._valid_name({"value": self.name})
         self._valid_location({"value": self.location})
-        if len(self.files) == 0:
-            raise TraitError("'files' cannot be empty.")
+        if len(self.files) == 0 and len(self.glob) == 0:
+            raise TraitError("'files' cannot be empty if 'glob' is not set.")
 
     def __eq__(self, other: "FileTemplateLoader") -> bool:
-        for attr in ("files", "location", "module", "name"):
+        for attr in ("files", "glob", "location", "module", "name"):
             if getattr(self, attr) != getattr(other, attr):
                 return False
         return True
@@ -125,3 +216,36 @@ class FileTemplateLoader(HasTraits):
         if len(proposal["value"]) == 0:
             raise TraitError("'location' cannot be empty.")
         return proposal["value"]
+
+    def discover_files(
+        self, directory: pathlib.Path, index: TemplatesIndex = None
+    ) -> TList[FileTemplate]:
+        """Discover the template files matching 'glob' in the templates directory.
+
+        The template metadata (e.g. 'schema', 'default_name' or 'icon') are read
+        from the sidecar file ``<template>.meta.json``. Templates already listed
+        in 'files' are skipped.
+
+        Args:
+            directory (pathlib.Path): Templates directory
+            index (TemplatesIndex): Index caching the directory scan [optional]
+
+        Returns:
+            List[FileTemplate]: Discovered templates
+        """
+        if len(self.glob) == 0:
+            return list()
+
+        index = index or TemplatesIndex()
+        known = {file.template for file in self.files}
+        discovered = list()
+        for template, metadata in index.glob(directory, self.glob).items():
+            if pathlib.Path(template) in known:
+                continue
+            try:
+                discovered.append(FileTemplate(**metadata, template=template))
+            except (TraitError, TypeError) as error:
+                logger.warning(
+                    f"Template '{self.name}/{template}' skipped due to invalid metadata: {error!s}"
+                )
+        return discovered
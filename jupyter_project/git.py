@@ -0,0 +1,228 @@
+"""
+Initialize a project folder as git repository with an initial commit.
+
+All files are written in the object store at once by ``git fast-import``
+as a single pack, rather than one loose object per file with ``git add``.
+"""
+import getpass
+import logging
+import os
+import pathlib
+import shutil
+import socket
+import stat
+import subprocess
+import time
+from typing import IO, Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Size in bytes of the chunks copied from the files to git
+CHUNK_SIZE = 256 * 1024
+
+
+class GitError(RuntimeError):
+    """Error raised when a git command fails."""
+
+
+def _git(root: pathlib.Path, *args: str) -> bytes:
+    """Execute a git command in a folder.
+
+    Args:
+        root (pathlib.Path): Working directory
+        args (str): Command arguments
+
+    Returns:
+        bytes: Standard output
+
+    Raises:
+        GitError: if the command fails
+    """
+    try:
+        process = subprocess.run(
+            ["git", *args],
+            cwd=str(root),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except OSError as error:
+        raise GitError(f"Unable to execute git: {error!s}")
+    if process.returncode != 0:
+        message = process.stderr.decode("utf-8", errors="replace").strip()
+        raise GitError(
+            f"git {args[0]} failed with code {process.returncode}: {message}"
+        )
+    return process.stdout
+
+
+def _identity(root: pathlib.Path) -> str:
+    """Get the committer identity "Name <email>".
+
+    Args:
+        root (pathlib.Path): Repository folder
+
+    Returns:
+        str: Configured identity or one built from the user and host names
+    """
+    try:
+        ident = _git(root, "var", "GIT_COMMITTER_IDENT").decode("utf-8").strip()
+        # Remove the timestamp and timezone
+        return ident.rsplit(" ", 2)[0]
+    except GitError:
+        user = getpass.getuser()
+        return f"{user} <{user}@{socket.gethostname()}>"
+
+
+def _quote(name: str) -> bytes:
+    """Quote a path for git fast-import if needed."""
+    path = name.encode("utf-8", errors="surrogateescape")
+    if path.startswith(b'"') or b"\n" in path:
+        path = b'"%s"' % (
+            path.replace(b"\\", b"\\\\").replace(b'"', b'\\"').replace(b"\n", b"\\n")
+        )
+    return path
+
+
+def _write_blob(stream: IO[bytes], mark: int, path: pathlib.Path) -> int:
+    """Write a file content as blob in a git fast-import stream.
+
+    Args:
+        stream (IO[bytes]): git fast-import input
+        mark (int): Blob mark
+        path (pathlib.Path): File path
+
+    Returns:
+        int: File mode
+
+    Raises:
+        OSError: if the file cannot be read; nothing is written then
+        GitError: if the file size changed while it was written
+    """
+    mode = path.lstat().st_mode
+    if stat.S_ISLNK(mode):
+        data = os.fsencode(os.readlink(path))
+        stream.write(b"blob\nmark :%d\ndata %d\n" % (mark, len(data)))
+        stream.write(data)
+    else:
+        with path.open("rb") as f:
+            size = os.fstat(f.fileno()).st_size
+            stream.write(b"blob\nmark :%d\ndata %d\n" % (mark, size))
+            remaining = size
+            while remaining > 0:
+                chunk = f.read(min(CHUNK_SIZE, remaining))
+                if not chunk:
+                    break
+                stream.write(chunk)
+                remaining -= len(chunk)
+            # The announced size cannot be honored; the import must be aborted
+            if remaining > 0 or f.read(1):
+                raise GitError(f"File {path!s} changed while being committed.")
+    stream.write(b"\n")
+    return mode
+
+
+def init_repository(
+    root: pathlib.Path, message: str, exclude: Iterable[str] = ()
+) -> Optional[str]:
+    """Initialize a folder as git repository and commit all its files.
+
+    The files ignored by .gitignore are not committed.
+
+    Args:
+        root (pathlib.Path): Folder to initialize
+        message (str): Commit message
+        exclude (Iterable[str]): Patterns of files never committed; added to the repository exclude file [optional]
+
+    Returns:
+        Optional[str]: Commit hash; None if there is no file to commit
+
+    Raises:
+        GitError: if a git command fails
+    """
+    if shutil.which("git") is None:
+        raise GitError("git executable not found.")
+
+    _git(root, "init", "--quiet")
+    ref = _git(root, "symbolic-ref", "HEAD").decode("utf-8").strip()
+    exclude = list(exclude)
+    if len(exclude) > 0:
+        exclude_file = root / os.fsdecode(
+            _git(root, "rev-parse", "--git-path", "info/exclude").strip()
+        )
+        exclude_file.parent.mkdir(parents=True, exist_ok=True)
+        with exclude_file.open("a") as f:
+            f.writelines(f"{pattern}\n" for pattern in exclude)
+    output = _git(root, "ls-files", "--others", "--exclude-standard", "-z")
+    names = sorted(
+        name
+        for name in output.decode("utf-8", errors="surrogateescape").split("\0")
+        # Nested repositories are listed as folders
+        if name and not name.endswith("/")
+    )
+    if len(names) == 0:
+        return None
+
+    identity = _identity(root)
+    timestamp = int(time.time())
+    timezone = time.strftime("%z") or "+0000"
+
+    try:
+        process = subprocess.Popen(
+            # Keep a single pack even for a few objects
+            [
+                "git",
+                "-c",
+                "fastimport.unpackLimit=0",
+                "fast-import",
+                "--quiet",
+                "--done",
+            ],
+            cwd=str(root),
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.PIPE,
+        )
+    except OSError as error:
+        raise GitError(f"Unable to execute git: {error!s}")
+
+    entries = list()
+    try:
+        stream = process.stdin
+        for name in names:
+            mark = len(entries) + 1
+            try:
+                mode = _write_blob(stream, mark, root / name)
+            except (FileNotFoundError, IsADirectoryError):
+                continue  # Removed or replaced in between
+            if stat.S_ISLNK(mode):
+                file_mode = b"120000"
+            elif mode & stat.S_IXUSR:
+                file_mode = b"100755"
+            else:
+                file_mode = b"100644"
+            entries.append(b"M %s :%d %s\n" % (file_mode, mark, _quote(name)))
+
+        message_bytes = message.encode("utf-8")
+        header = (
+            f"commit {ref}\n"
+            f"author {identity} {timestamp} {timezone}\n"
+            f"committer {identity} {timestamp} {timezone}\n"
+        ).encode("utf-8")
+        stream.write(header)
+        stream.write(b"data %d\n" % len(message_bytes) + message_bytes + b"\n")
+        stream.writelines(entries)
+        stream.write(b"\ndone\n")
+    except BrokenPipeError:
+        pass  # The error is reported by the exit code
+    finally:
+        # Flush and close the input then wait for the end of the import
+        _, stderr = process.communicate()
+    if process.returncode != 0:
+        message = stderr.decode("utf-8", errors="replace").strip()
+        raise GitError(
+            f"git fast-import failed with code {process.returncode}: {message}"
+        )
+
+    # Fill the index from the commit so the files are seen as unmodified
+    _git(root, "reset", "--quiet", "--mixed")
+    return _git(root, "rev-parse", "HEAD").decode("utf-8").strip()
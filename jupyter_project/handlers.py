@@ -1,17 +1,30 @@
+import asyncio
 import functools
+import importlib
+import inspect
 import json
 import logging
-from pathlib import Path
+from pathlib import Path, PurePosixPath
 from shutil import rmtree
-from typing import Any, Dict
+from typing import (
+    Any,
+    Callable,
+    Dict,
+    List,
+    NoReturn,
+    Optional,
+    Tuple,
+    Type,
+    Union,
+)
 from urllib.parse import quote
+import uuid
 
 from cookiecutter.exceptions import CookiecutterException
 from jinja2 import (
     Environment,
     FileSystemLoader,
     PackageLoader,
-    PrefixLoader,
     Template,
     TemplateError,
 )
@@ -20,89 +33,358 @@ from jupyter_client.jsonutil import date_default
 from notebook.base.handlers import APIHandler, path_regex
 from notebook.utils import url_path_join, url2path
 import tornado
+from tornado.escape import utf8
+from tornado.iostream import StreamClosedError
+from tornado.routing import PathMatches
 
+from .archive import is_archive
+from .conda import (
+    CondaEnvironments,
+    CondaError,
+    default_executable,
+    resolve_packages,
+)
 from .config import JupyterProject, ProjectTemplate
-from .jinja2 import jinja2_extensions
+from .events import ProjectsWatcher
+from .export import EXPORT_FORMATS, stream_archive
+from .git import GitError, init_repository
+from .importer import ArchiveImporter
+from .index import TemplatesIndex
+from .jinja2 import (
+    ArchiveLoader,
+    TemplateCache,
+    create_environment,
+    jinja2_extensions,
+)
+from .kernels import (
+    SESSION_COOKIE,
+    KernelFilter,
+    KernelPrespawner,
+    get_session_id,
+    kernelspecs_transform,
+)
+from .locks import PathLocks
+from .manifest import MANIFEST_FILENAME
+from .nbtemplate import NotebookTemplate, load_notebook_template
+from .schemas import SchemaBundler
+from .startup import PENDING, DeferredRouter, ExtensionInitializer
+from .timing import RequestTimer
+from .tracing import FileExporter, LogExporter, Tracer, bind_context, span
+from .usage import DiskUsage
 
 NAMESPACE = "jupyter-project"
+# Interval in seconds between keep alive comments sent on the events stream
+EVENTS_KEEPALIVE = 15.0
+# Stages of the extension initialization
+INIT_STAGES = ("configuration", "file_templates", "file_handlers", "project_template")
+# Delay in seconds suggested to the clients while the extension is initializing
+RETRY_AFTER = 1
+
+
+def _etag_matches(if_match: str, etag: str) -> bool:
+    """Test if an entity tag matches a If-Match header value.
+
+    Args:
+        if_match (str): If-Match header value
+        etag (str): Current entity tag
+
+    Returns:
+        bool: Whether the tag matches (strong comparison)
+    """
+    tags = [tag.strip() for tag in if_match.split(",")]
+    return "*" in tags or etag in tags
+
+
+class _TimedHandler(APIHandler):
+    """Base handler logging the requests slower than a threshold.
+
+    The log line is a JSON object with the time spent in each request phase
+    recorded by the handler timer.
+    """
+
+    def initialize(self, slow_request_threshold: float = 0.0):
+        """Initialize request handler
+
+        Args:
+            slow_request_threshold (float): Requests lasting longer (in seconds) are logged; 0 to disable.
+        """
+        self.slow_request_threshold = slow_request_threshold
+        self.timer = RequestTimer()
+        self.result_size = 0
+
+    def _get_template_name(self) -> Optional[str]:
+        """Get the name of the template used by the request."""
+        return None
+
+    def write(self, chunk):
+        if isinstance(chunk, (bytes, str)):
+            self.result_size += len(utf8(chunk))
+        super().write(chunk)
+
+    def on_finish(self):
+        super().on_finish()
+        duration = self.request.request_time()
+        if 0.0 < self.slow_request_threshold <= duration:
+            phases = {"queued": 0.0, "render": 0.0, "filesystem": 0.0}
+            phases.update(self.timer.breakdown())
+            record = {
+                "event": "jupyter_project.slow_request",
+                "handler": type(self).__name__,
+                "method": self.request.method,
+                "path": self.request.path,
+                "status": self.get_status(),
+                "template": self._get_template_name(),
+                "duration_ms": round(duration * 1000.0, 3),
+                "phases_ms": phases,
+                "params_size": len(self.request.body or b""),
+                "result_size": self.result_size,
+            }
+            self.log.warning(json.dumps(record))
 
 
-class FileTemplatesHandler(APIHandler):
+class FileTemplatesHandler(_TimedHandler):
     """Handler for generating file from templates."""
 
-    def initialize(self, default_name: str = None, template: Template = None):
+    def initialize(
+        self,
+        default_name: str = None,
+        environment: Environment = None,
+        template_name: str = None,
+        render_mode: str = "text",
+        locks: PathLocks = None,
+        tracer: Tracer = None,
+        slow_request_threshold: float = 0.0,
+    ):
         """Initialize request handler
 
+        The template is resolved through the environment cache at each request
+        so the compiled templates memory stays bounded by the cache settings.
+
         Args:
             default_name (str): File default name - will be rendered with same parameters than template
-            template (jinja2.Template): Jinja2 template to use for component generation.
+            environment (jinja2.Environment): Jinja2 environment loading the template.
+            template_name (str): Name of the template to use for component generation.
+            render_mode (str): 'text' or 'notebook' (only the notebook cells with Jinja2 syntax are rendered).
+            locks (PathLocks): Locks shared by all handlers to serialize requests on the same path.
+            tracer (Tracer): Tracer recording the generation phases.
+            slow_request_threshold (float): Requests lasting longer (in seconds) are logged; 0 to disable.
         """
+        super().initialize(slow_request_threshold)
         self.default_name = Template(
             default_name or "Untitled", extensions=jinja2_extensions
         )
-        self.template = template
+        self.environment = environment
+        self.template_name = template_name
+        self.render_mode = render_mode
+        self.template = None
+        self.locks = locks if locks is not None else PathLocks()
+        self.tracer = tracer or Tracer()
 
-    @tornado.web.authenticated
-    async def post(self, path: str = ""):
-        """Create a new file in the specified path.
+    def _get_template_name(self) -> Optional[str]:
+        return self.template_name
 
-        POST /jupyter-project/files/<parent-file-path>
-            Creates a new file applying the parameters to the Jinja template.
+    def _load_template(self) -> Union[Template, NotebookTemplate]:
+        """Get the compiled template from the environment cache.
 
-        Request json body:
-            Dictionary of parameters for the Jinja template.
+        Returns:
+            Union[jinja2.Template, NotebookTemplate]: Compiled template
         """
-        if self.template is None:
-            raise tornado.web.HTTPError(404, reason="File Jinja template not found.")
+        if self.render_mode == "notebook":
+            return load_notebook_template(self.environment, self.template_name)
+        return self.environment.get_template(self.template_name)
+
+    async def _call_contents(self, method: str, *args, **kwargs) -> Any:
+        """Call a contents manager method without blocking the IOLoop.
+
+        Coroutines of an asynchronous contents manager are awaited; methods of
+        a synchronous one are executed in the default executor.
+
+        Args:
+            method (str): Contents manager method name
+            *args: Method positional arguments
+            **kwargs: Method keyword arguments
+
+        Returns:
+            Any: Method result
+        """
+        func = getattr(self.contents_manager, method)
+        if inspect.iscoroutinefunction(func):
+            with self.timer.phase("filesystem"):
+                return await func(*args, **kwargs)
+        return await self.timer.run_in_executor(
+            bind_context(func, *args, **kwargs), phase="filesystem"
+        )
+
+    async def _ensure_directory(self, path: str) -> NoReturn:
+        """Create the directory and its missing parents through the contents manager.
+
+        Args:
+            path (str): Directory path
+        """
+        missing = list()
+        while path and not await self._call_contents("dir_exists", path):
+            missing.append(path)
+            path = path.rpartition("/")[0]
+        for directory in reversed(missing):
+            await self._call_contents("save", {"type": "directory"}, directory)
+
+    async def _create_file(self, path: str) -> Dict:
+        """Create a new file from the template in the specified path.
 
+        Args:
+            path (str): Parent folder path
+
+        Returns:
+            Dict: Contents model of the new file
+        """
         cm = self.contents_manager
         params = self.get_json_body()
 
-        try:
-            default_name = self.default_name.render(**params)
-        except TemplateError as error:
-            self.log.warning(
-                f"Fail to render the default name for template '{self.template.name}'"
-            )
-            default_name = cm.untitled_file
+        with span("default_name.render"), self.timer.phase("render"):
+            try:
+                default_name = self.default_name.render(**params)
+            except TemplateError as error:
+                self.log.warning(
+                    f"Fail to render the default name for template '{self.template.name}'"
+                )
+                default_name = cm.untitled_file
 
         ext = "".join(Path(self.template.name).suffixes)
         filename = default_name + ext
-        filename = cm.increment_filename(filename, path)
-        fullpath = url_path_join(path, filename)
 
-        realpath = Path(cm.root_dir).absolute() / url2path(fullpath)
-        if not realpath.parent.exists():
-            realpath.parent.mkdir(parents=True)
+        path = path.strip("/")
+        directory = Path(cm.root_dir).absolute() / url2path(path)
+        async with self.locks.lock(directory):
+            with span("directory.create"):
+                await self._ensure_directory(path)
+            with span("increment_filename"):
+                filename = await self._call_contents(
+                    "increment_filename", filename, path
+                )
+            fullpath = url_path_join(path, filename)
+            # Reserve the file name so concurrent requests pick another one
+            with span("file.reserve"):
+                await self._call_contents(
+                    "save", {"type": "file", "format": "text", "content": ""}, fullpath
+                )
 
-        current_loop = tornado.ioloop.IOLoop.current()
         try:
-            content = await current_loop.run_in_executor(
-                None, functools.partial(self.template.render, **params)
-            )
-            realpath.write_text(content)
-        except (OSError, TemplateError) as error:
+            with span("template.render"):
+                if self.template.environment.is_async:
+                    # Asynchronous globals and filters are awaited on the IOLoop
+                    with self.timer.phase("render"):
+                        content = await self.template.render_async(**params)
+                else:
+                    content = await self.timer.run_in_executor(
+                        bind_context(self.template.render, **params), phase="render"
+                    )
+            with span("file.write") as current:
+                model = await self._call_contents(
+                    "save",
+                    {"type": "file", "format": "text", "content": content},
+                    fullpath,
+                )
+                current.set_attribute("size", len(content))
+        except (OSError, TemplateError, tornado.web.HTTPError) as error:
+            try:
+                await self._call_contents("delete", fullpath)
+            except (OSError, tornado.web.HTTPError):
+                self.log.warning(f"Fail to remove the file {fullpath}.", exc_info=True)
+            if isinstance(error, tornado.web.HTTPError):
+                raise
             raise tornado.web.HTTPError(
                 500,
                 log_message=f"Fail to generate the file from template {self.template.name}.",
                 reason=repr(error),
             )
 
-        model = cm.get(fullpath, content=False, type="file", format="text")
+        return model
+
+    @tornado.web.authenticated
+    async def post(self, path: str = ""):
+        """Create a new file in the specified path.
+
+        POST /jupyter-project/files/<parent-file-path>
+            Creates a new file applying the parameters to the Jinja template.
+
+        Request json body:
+            Dictionary of parameters for the Jinja template.
+        """
+        if self.environment is None or self.template_name is None:
+            raise tornado.web.HTTPError(404, reason="File Jinja template not found.")
+
+        with self.tracer.span(
+            "FileTemplatesHandler.post", template=self.template_name, path=path
+        ):
+            with span("template.load"):
+                try:
+                    # Compiled again only if evicted from the cache or changed
+                    self.template = await self.timer.run_in_executor(
+                        bind_context(self._load_template), phase="render"
+                    )
+                except (OSError, ValueError, TemplateError) as error:
+                    raise tornado.web.HTTPError(
+                        500,
+                        log_message=f"Fail to load the file template {self.template_name}.",
+                        reason=repr(error),
+                    )
+            model = await self._create_file(path)
+
         self.set_status(201)
         self.finish(json.dumps(model, default=date_default))
 
 
-class ProjectsHandler(APIHandler):
+class ProjectsHandler(_TimedHandler):
     """Handler for project requests."""
 
-    def initialize(self, template: ProjectTemplate = None):
+    def initialize(
+        self,
+        template: ProjectTemplate = None,
+        locks: PathLocks = None,
+        kernel_filter: KernelFilter = None,
+        watcher: ProjectsWatcher = None,
+        environments: CondaEnvironments = None,
+        prespawner: KernelPrespawner = None,
+        tracer: Tracer = None,
+        slow_request_threshold: float = 0.0,
+    ):
         """Initialize request handler
 
         Args:
             template (ProjectTemplate): Project template object.
+            locks (PathLocks): Locks shared by all handlers to serialize requests on the same path.
+            kernel_filter (KernelFilter): Allowed kernels per project session.
+            watcher (ProjectsWatcher): Watcher broadcasting the projects changes.
+            environments (CondaEnvironments): Provisioner of the projects conda environment; None to let the frontend create them.
+            prespawner (KernelPrespawner): Kernels started when a project is opened; None to disable.
+            tracer (Tracer): Tracer recording the generation phases.
+            slow_request_threshold (float): Requests lasting longer (in seconds) are logged; 0 to disable.
         """
+        super().initialize(slow_request_threshold)
         self.template = template
+        self.locks = locks if locks is not None else PathLocks()
+        self.kernel_filter = kernel_filter or KernelFilter()
+        self.watcher = watcher
+        self.environments = environments
+        self.prespawner = prespawner
+        self.tracer = tracer or Tracer()
+
+    def _get_template_name(self) -> Optional[str]:
+        return None if self.template is None else self.template.template
+
+    def _get_session(self) -> str:
+        """Get the project session id; create it if needed.
+
+        The frontend identifies its tab; otherwise a session cookie is set.
+
+        Returns:
+            str: Session id
+        """
+        session = get_session_id(self.request)
+        if session is None:
+            session = uuid.uuid4().hex
+            self.set_cookie(SESSION_COOKIE, session, path=self.base_url, httponly=True)
+        return session
 
     def _get_realpath(self, path: str) -> Path:
         """Tranform notebook path to absolute path.
@@ -115,6 +397,181 @@ class ProjectsHandler(APIHandler):
         """
         return Path(self.contents_manager.root_dir).absolute() / url2path(path)
 
+    async def _init_git(self, fullpath: Path, configuration: Dict) -> NoReturn:
+        """Initialize a new project as git repository and commit its files.
+
+        A failure is logged but does not fail the project creation.
+
+        Args:
+            fullpath (Path): Project absolute path
+            configuration (Dict): Project configuration
+        """
+        name = configuration.get("name", fullpath.name)
+        with span("git.init"):
+            try:
+                await self.timer.run_in_executor(
+                    bind_context(
+                        init_repository,
+                        fullpath,
+                        f"Initialize project {name}",
+                        (f"/{MANIFEST_FILENAME}",),
+                    ),
+                    phase="git",
+                )
+            except (GitError, OSError) as error:
+                self.log.warning(
+                    f"[jupyter-project] Fail to initialize {fullpath} as git repository: {error!s}"
+                )
+
+    def _get_kernel_path(self, path: str, fullpath: Path, configuration: Dict) -> str:
+        """Get the folder in which the notebooks of a project are opened by default.
+
+        Args:
+            path (str): Project path
+            fullpath (Path): Project absolute path
+            configuration (Dict): Project configuration
+
+        Returns:
+            str: Default folder; API path
+        """
+        default_path = self.template.default_path.as_posix()
+        if default_path in ("", "."):
+            return path
+        try:
+            # Same rendering as the frontend: {{ jproject.<key> }}
+            default_path = Template(default_path).render(
+                jproject={**configuration, "dirname": PurePosixPath(path).parent.as_posix()}
+            )
+        except TemplateError:
+            return path
+        if not (fullpath / url2path(default_path)).is_dir():
+            # Default file
+            default_path = PurePosixPath(default_path).parent.as_posix()
+        if default_path == ".":
+            return path
+        return url_path_join(path, default_path)
+
+    def _provision_environment(self, fullpath: Path, configuration: Dict) -> NoReturn:
+        """Create the project conda environment in a background job.
+
+        The job progress is published as "environment" events. Once ready,
+        the environment name is stored in the project configuration.
+
+        Args:
+            fullpath (Path): Project absolute path
+            configuration (Dict): Project configuration
+        """
+        if self.environments is None:
+            return
+
+        environments = self.environments
+        template = self.template
+        watcher = self.watcher
+        path = configuration["path"]
+        configuration = {k: v for k, v in configuration.items() if k != "path"}
+
+        def publish(data: Dict[str, Any]):
+            if watcher is not None:
+                watcher.publish("environment", {"path": path, **data})
+
+        async def provision():
+            loop = tornado.ioloop.IOLoop.current()
+            publish({"status": "pending"})
+            try:
+                result = await environments.provision(
+                    fullpath,
+                    configuration,
+                    template.conda_pkgs,
+                    template.editable_install,
+                )
+                if (
+                    len(template.configuration_filename) > 0
+                    and configuration.get("environment") != result["environment"]
+                ):
+                    await loop.run_in_executor(
+                        None,
+                        template.update_configuration,
+                        fullpath,
+                        {"environment": result["environment"]},
+                    )
+            except (CondaError, OSError, ValidationError, ValueError) as error:
+                self.log.warning(
+                    f"[jupyter-project] Fail to provision the conda environment of {path}: {error!s}"
+                )
+                publish({"status": "failed", "error": str(error)})
+            else:
+                self.log.info(
+                    f"[jupyter-project] Conda environment {result['environment']} of {path} is ready."
+                )
+                publish({"status": "ready", **result})
+
+        tornado.ioloop.IOLoop.current().spawn_callback(provision)
+
+    async def _export(self, path: str, format: str) -> NoReturn:
+        """Stream an archive of the project.
+
+        The archive is generated chunk by chunk while the client downloads it;
+        nothing is written on disk.
+
+        Args:
+            path (str): Project path
+            format (str): Archive format; one of EXPORT_FORMATS
+        """
+        if format not in EXPORT_FORMATS:
+            raise tornado.web.HTTPError(
+                400,
+                reason=f"Unsupported export format '{format}'; expected one of {', '.join(EXPORT_FORMATS)}.",
+            )
+
+        fullpath = self._get_realpath(path)
+        # Check that the path is a project
+        try:
+            await self.timer.run_in_executor(
+                functools.partial(self.template.get_configuration, fullpath),
+                phase="filesystem",
+            )
+        except (ValidationError, ValueError):
+            raise tornado.web.HTTPError(404, reason=f"Path {path} is not a valid project")
+
+        content_type, extension = EXPORT_FORMATS[format]
+        self.set_header("Content-Type", content_type)
+        self.set_header(
+            "Content-Disposition",
+            f"attachment; filename*=UTF-8''{quote(fullpath.name + extension)}",
+        )
+
+        chunks = stream_archive(fullpath, format, self.template.export_ignore)
+        sent = False
+        try:
+            while True:
+                chunk = await self.timer.run_in_executor(
+                    functools.partial(next, chunks, None), phase="filesystem"
+                )
+                if chunk is None:
+                    break
+                if len(chunk) > 0:
+                    self.write(chunk)
+                    # Wait for the client to receive the data to bound the memory usage
+                    await self.flush()
+                    sent = True
+        except StreamClosedError:
+            self.log.debug(f"[jupyter-project] Export of {path} interrupted by the client.")
+        except OSError as error:
+            if not sent:
+                raise tornado.web.HTTPError(
+                    500,
+                    log_message=f"Fail to export the project {path}.",
+                    reason=repr(error),
+                )
+            self.log.error(
+                f"[jupyter-project] Fail to export the project {path}: {error!s}"
+            )
+            # The status is already sent; closing the connection without ending
+            # the response lets the client know the download failed
+            self.request.connection.close()
+        finally:
+            chunks.close()
+
     @tornado.web.authenticated
     async def get(self, path: str = ""):
         """Open a specific project or close any open once if path is empty.
@@ -134,46 +591,149 @@ class ProjectsHandler(APIHandler):
                 {
                     project: null
                 }
+
+        GET /jupyter-project/projects/<path-to-project>?export=<tar.gz|zip>
+            Download an archive of the project
         """
         if self.template is None:
             raise tornado.web.HTTPError(
                 404, reason="Project cookiecutter template not found."
             )
 
+        export = self.get_query_argument("export", None)
+        if export is not None:
+            await self._export(path, export)
+            return
+
         configuration = None
+        fullpath = None
         if len(path) != 0:
             configuration = dict()
             fullpath = self._get_realpath(path)
             # Check that the path is a project
-            current_loop = tornado.ioloop.IOLoop.current()
             try:
-                configuration = await current_loop.run_in_executor(
-                    None, self.template.get_configuration, fullpath
+                configuration = await self.timer.run_in_executor(
+                    functools.partial(self.template.get_configuration, fullpath),
+                    phase="filesystem",
                 )
             except (ValidationError, ValueError):
                 raise tornado.web.HTTPError(
                     404, reason=f"Path {path} is not a valid project"
                 )
-            else:
-                configuration["path"] = path
-
-        if self.template.conda_pkgs is not None and self.template.filter_kernel:
-            if len(path) == 0:
-                # Close the current open project
-                self.log.debug(f"[jupyter-project] Clear Kernel whitelist")
-                self.kernel_spec_manager.whitelist = set()
-            elif "environment" in configuration:
-                # Trick nb_conda_kernels to for refreshing the spec
-                try:
-                    self.kernel_spec_manager._conda_kernels_cache_expiry = None
-                    self.kernel_spec_manager._conda_info_cache_expiry = None
-                except AttributeError:
-                    pass
-                kernelspecs = self.kernel_spec_manager.get_all_specs()
-                kernels = {n for n, s in kernelspecs.items() if s["spec"]["metadata"].get("conda_env_name") == configuration["environment"]}
-                self.log.debug(f"[jupyter-project] Set Kernel whitelist to {kernels}")
-                self.kernel_spec_manager.whitelist = kernels
 
+        session = self._get_session()
+        if fullpath is None:
+            # Close the current open project
+            self.log.debug(f"[jupyter-project] Allow all kernels for session {session}")
+            self.kernel_filter.clear_session(session)
+            if self.watcher is not None:
+                self.watcher.close(session)
+            if self.prespawner is not None:
+                self.prespawner.close(session)
+        else:
+            if self.watcher is not None:
+                self.watcher.open(session, path, fullpath, configuration)
+
+            kernels = frozenset()
+            if (
+                self.template.conda_pkgs is not None
+                and self.template.filter_kernel
+                and "environment" in configuration
+            ):
+                kernels = self.kernel_filter.get_environment_kernels(
+                    self.kernel_spec_manager, configuration["environment"]
+                )
+                self.log.debug(
+                    f"[jupyter-project] Set allowed kernels for session {session} to {set(kernels)}"
+                )
+            # Track the session even without kernel filter to expire it
+            self.kernel_filter.set_session(session, kernels)
+            if self.prespawner is not None:
+                if len(kernels) > 0:
+                    # The frontend picks the same default kernel in the filtered listing
+                    default = self.kernel_spec_manager.default_kernel_name
+                    kernel_name = default if default in kernels else sorted(kernels)[0]
+                    tornado.ioloop.IOLoop.current().spawn_callback(
+                        self.prespawner.spawn,
+                        session,
+                        self._get_kernel_path(path, fullpath, configuration),
+                        kernel_name,
+                    )
+                else:
+                    self.prespawner.close(session)
+
+        if configuration is not None:
+            configuration["path"] = path
+            etag = self.template.get_configuration_etag(fullpath)
+            if etag is not None:
+                self.set_header("Etag", etag)
+
+        self.finish(json.dumps({"project": configuration}))
+
+    async def _clone(self, source: str, path: str) -> NoReturn:
+        """Duplicate a project.
+
+        Args:
+            source (str): Source project path
+            path (str): New project path
+        """
+        if len(path.strip("/")) == 0:
+            raise tornado.web.HTTPError(400, reason="Project path is missing.")
+
+        root = Path(self.contents_manager.root_dir).resolve()
+        source_path = self._get_realpath(source)
+        fullpath = self._get_realpath(path)
+        if root != source_path.resolve() and root not in source_path.resolve().parents:
+            raise tornado.web.HTTPError(404, reason=f"Path {source} is not a valid project")
+        if fullpath == source_path or source_path in fullpath.parents:
+            raise tornado.web.HTTPError(
+                400, reason="A project cannot be duplicated within itself."
+            )
+
+        try:
+            configuration = await self.timer.run_in_executor(
+                functools.partial(self.template.get_configuration, source_path),
+                phase="filesystem",
+            )
+        except (ValidationError, ValueError):
+            raise tornado.web.HTTPError(404, reason=f"Path {source} is not a valid project")
+        changes = {"path": path} if "path" in configuration else dict()
+
+        try:
+            with self.tracer.span(
+                "ProjectsHandler.clone", template=self.template.template, path=path
+            ):
+                async with self.locks.lock(fullpath):
+                    if fullpath.exists():
+                        raise tornado.web.HTTPError(
+                            409, reason=f"Path {path} already exists."
+                        )
+                    configuration = await self.timer.run_in_executor(
+                        bind_context(
+                            self.template.clone, source_path, fullpath, changes
+                        ),
+                        phase="filesystem",
+                    )
+        except ValidationError as error:
+            raise tornado.web.HTTPError(
+                422, reason=f"Invalid project configuration: {error.message}"
+            )
+        except (OSError, ValueError) as error:
+            raise tornado.web.HTTPError(
+                500,
+                log_message=f"Fail to duplicate the project {source}.",
+                reason=repr(error),
+            )
+
+        configuration["path"] = path
+        etag = self.template.get_configuration_etag(fullpath)
+        if etag is not None:
+            self.set_header("Etag", etag)
+
+        if self.watcher is not None:
+            self.watcher.publish("created", {"path": path, "project": configuration})
+
+        self.set_status(201)
         self.finish(json.dumps({"project": configuration}))
 
     @tornado.web.authenticated
@@ -190,23 +750,39 @@ class ProjectsHandler(APIHandler):
                 {
                     project: Project configuration file content
                 }
+
+        POST /jupyter-project/projects/<path-to-project>?from=<path-to-source-project>
+            Duplicate the source project in the given path
         """
         if self.template is None:
             raise tornado.web.HTTPError(
                 404, reason="Project cookiecutter template not found."
             )
 
+        source = self.get_query_argument("from", None)
+        if source is not None:
+            await self._clone(source, path)
+            return
+
         params = self.get_json_body()
 
         realpath = self._get_realpath(path)
-        if not realpath.parent.exists():
-            realpath.parent.mkdir(parents=True)
+        with self.timer.phase("filesystem"):
+            if not realpath.parent.exists():
+                realpath.parent.mkdir(parents=True)
 
-        current_loop = tornado.ioloop.IOLoop.current()
         try:
-            folder_name, configuration = await current_loop.run_in_executor(
-                None, self.template.render, params, realpath
-            )
+            with self.tracer.span(
+                "ProjectsHandler.post", template=self.template.template, path=path
+            ):
+                project_path = realpath / self.template.get_folder_name(params)
+                async with self.locks.lock(project_path):
+                    folder_name, configuration = await self.timer.run_in_executor(
+                        bind_context(self.template.render, params, realpath),
+                        phase="render",
+                    )
+                    if self.template.git_init:
+                        await self._init_git(realpath / folder_name, configuration)
         except (CookiecutterException, OSError, ValueError) as error:
             raise tornado.web.HTTPError(
                 500,
@@ -222,9 +798,97 @@ class ProjectsHandler(APIHandler):
         else:
             configuration["path"] = url_path_join(path, folder_name)
 
+        etag = self.template.get_configuration_etag(realpath / folder_name)
+        if etag is not None:
+            self.set_header("Etag", etag)
+
+        if self.watcher is not None:
+            self.watcher.publish(
+                "created", {"path": configuration["path"], "project": configuration}
+            )
+        self._provision_environment(realpath / folder_name, configuration)
+
         self.set_status(201)
         self.finish(json.dumps({"project": configuration}))
 
+    @tornado.web.authenticated
+    async def patch(self, path: str = ""):
+        """Update partially the project configuration.
+
+        PATCH /jupyter-project/projects/<path-to-project>
+            Apply a JSON merge patch (RFC 7386) to the project configuration file
+
+        Request headers:
+            If-Match: Entity tag of the configuration file returned by GET, POST
+                or a previous PATCH; `*` to update it whatever its version.
+
+        Request json body:
+            JSON merge patch of the project configuration
+
+            Answer json body:
+                {
+                    project: Project configuration file content
+                }
+        """
+        if self.template is None:
+            raise tornado.web.HTTPError(
+                404, reason="Project cookiecutter template not found."
+            )
+
+        if len(path) == 0:
+            raise tornado.web.HTTPError(404, reason="Project path is missing.")
+
+        if_match = self.request.headers.get("If-Match")
+        if if_match is None:
+            raise tornado.web.HTTPError(428, reason="If-Match header is required.")
+
+        patch = self.get_json_body()
+        if not isinstance(patch, dict):
+            raise tornado.web.HTTPError(
+                400, reason="Body must be a JSON merge patch object."
+            )
+
+        fullpath = self._get_realpath(path)
+        async with self.locks.lock(fullpath):
+            etag = self.template.get_configuration_etag(fullpath)
+            if etag is None:
+                raise tornado.web.HTTPError(
+                    404, reason=f"Path {path} is not a valid project"
+                )
+            if not _etag_matches(if_match, etag):
+                raise tornado.web.HTTPError(
+                    412, reason="Project configuration has been modified."
+                )
+
+            try:
+                configuration = await self.timer.run_in_executor(
+                    functools.partial(
+                        self.template.update_configuration, fullpath, patch
+                    ),
+                    phase="filesystem",
+                )
+            except ValidationError as error:
+                raise tornado.web.HTTPError(
+                    422, reason=f"Invalid project configuration: {error.message}"
+                )
+            except ValueError:
+                raise tornado.web.HTTPError(
+                    404, reason=f"Path {path} is not a valid project"
+                )
+            except OSError as error:
+                raise tornado.web.HTTPError(
+                    500,
+                    log_message=f"Fail to update the project configuration.",
+                    reason=repr(error),
+                )
+
+            etag = self.template.get_configuration_etag(fullpath)
+
+        configuration["path"] = path
+        if etag is not None:
+            self.set_header("Etag", etag)
+        self.finish(json.dumps({"project": configuration}))
+
     @tornado.web.authenticated
     async def delete(self, path: str = ""):
         """Delete the project at the given path.
@@ -241,27 +905,329 @@ class ProjectsHandler(APIHandler):
             self.finish(b"{}")
             return
 
+        fullpath = self._get_realpath(path)
+        async with self.locks.lock(fullpath):
+            # Check that the path is a project
+            try:
+                await self.timer.run_in_executor(
+                    functools.partial(self.template.get_configuration, fullpath),
+                    phase="filesystem",
+                )
+            except (ValidationError, ValueError):
+                raise tornado.web.HTTPError(
+                    404, reason=f"Path {path} is not a valid project"
+                )
+
+            with self.timer.phase("filesystem"):
+                rmtree(fullpath, ignore_errors=True)
+
+        if self.watcher is not None:
+            self.watcher.forget(fullpath)
+            self.watcher.publish("deleted", {"path": path})
+
+        self.set_status(204)
+
+
+@tornado.web.stream_request_body
+class ProjectImportHandler(ProjectsHandler):
+    """Handler importing a project from an archive streamed in the request body."""
+
+    SUPPORTED_METHODS = ("PUT",)
+
+    async def prepare(self):
+        super().prepare()
+        self.importer = None
+        self.body_received = False
+        # The body is processed before the method is called
+        if self.current_user is None:
+            raise tornado.web.HTTPError(403)
+        if self.template is None:
+            raise tornado.web.HTTPError(
+                404, reason="Project cookiecutter template not found."
+            )
+
+        path = self.path_kwargs.get("path", "")
+        if len(path.strip("/")) == 0:
+            raise tornado.web.HTTPError(400, reason="Project path is missing.")
+        fullpath = self._get_realpath(path)
+        if fullpath.exists():
+            raise tornado.web.HTTPError(409, reason=f"Path {path} already exists.")
+
+        self.importer = ArchiveImporter(fullpath.parent)
+
+    async def data_received(self, chunk: bytes):
+        # Wait for the extraction to catch up to bound the memory usage
+        await self.importer.feed(chunk)
+
+    def on_connection_close(self):
+        super().on_connection_close()
+        if self.importer is not None and not self.body_received:
+            self.importer.abort()
+            tornado.ioloop.IOLoop.current().add_callback(self.importer.cleanup)
+
+    @tornado.web.authenticated
+    async def put(self, path: str = ""):
+        """Import a project from an archive.
+
+        PUT /jupyter-project/projects/<path-to-project>
+            Extract the archive in the given path; if the archive contains a
+            single folder, its content is extracted.
+
+        Request body:
+            tar (optionally compressed) or zip archive of the project
+
+            Answer json body:
+                {
+                    project: Project configuration file content
+                }
+        """
+        self.body_received = True
+        fullpath = self._get_realpath(path)
+        try:
+            with self.tracer.span(
+                "ProjectImportHandler.put", template=self.template.template, path=path
+            ):
+                with span("archive.extract"), self.timer.phase("filesystem"):
+                    try:
+                        root = await self.importer.finish()
+                    except ValueError as error:
+                        raise tornado.web.HTTPError(400, reason=str(error))
+
+                with span("configuration.validate"):
+                    try:
+                        configuration = await self.timer.run_in_executor(
+                            functools.partial(self.template.get_configuration, root),
+                            phase="filesystem",
+                        )
+                    except ValidationError as error:
+                        raise tornado.web.HTTPError(
+                            422, reason=f"Invalid project configuration: {error.message}"
+                        )
+                    except ValueError as error:
+                        raise tornado.web.HTTPError(422, reason=str(error))
+
+                async with self.locks.lock(fullpath):
+                    if fullpath.exists():
+                        raise tornado.web.HTTPError(
+                            409, reason=f"Path {path} already exists."
+                        )
+                    with span("project.move"), self.timer.phase("filesystem"):
+                        root.rename(fullpath)
+        except OSError as error:
+            raise tornado.web.HTTPError(
+                500,
+                log_message=f"Fail to import the project in {path}.",
+                reason=repr(error),
+            )
+        finally:
+            await self.importer.cleanup()
+
+        configuration["path"] = path
+        etag = self.template.get_configuration_etag(fullpath)
+        if etag is not None:
+            self.set_header("Etag", etag)
+
+        if self.watcher is not None:
+            self.watcher.publish("created", {"path": path, "project": configuration})
+        self._provision_environment(fullpath, configuration)
+
+        self.set_status(201)
+        self.finish(json.dumps({"project": configuration}))
+
+
+class ProjectStatsHandler(ProjectsHandler):
+    """Handler for the project disk usage."""
+
+    SUPPORTED_METHODS = ("GET",)
+
+    def initialize(self, usage: DiskUsage = None, **kwargs):
+        """Initialize request handler
+
+        Args:
+            usage (DiskUsage): Disk usage cache shared by all requests.
+            kwargs: ProjectsHandler arguments
+        """
+        super().initialize(**kwargs)
+        self.usage = usage or DiskUsage()
+
+    @tornado.web.authenticated
+    async def get(self, path: str = ""):
+        """Get the project disk usage.
+
+        Only the folders modified since the previous request are scanned.
+
+        GET /jupyter-project/projects/<path-to-project>?stats
+
+            Answer json body:
+                {
+                    files: Number of files,
+                    bytes: Total size of the files,
+                    folders: {
+                        <top-level folder name>: {
+                            files: Number of files,
+                            bytes: Total size of the files
+                        }
+                    }
+                }
+        """
+        if self.template is None:
+            raise tornado.web.HTTPError(
+                404, reason="Project cookiecutter template not found."
+            )
+
         fullpath = self._get_realpath(path)
         # Check that the path is a project
-        current_loop = tornado.ioloop.IOLoop.current()
         try:
-            await current_loop.run_in_executor(
-                None, self.template.get_configuration, fullpath
+            await self.timer.run_in_executor(
+                functools.partial(self.template.get_configuration, fullpath),
+                phase="filesystem",
             )
         except (ValidationError, ValueError):
+            raise tornado.web.HTTPError(404, reason=f"Path {path} is not a valid project")
+
+        stats = await self.timer.run_in_executor(
+            functools.partial(self.usage.stats, fullpath), phase="filesystem"
+        )
+        self.finish(json.dumps(stats))
+
+
+class ProjectUpdateHandler(ProjectsHandler):
+    """Handler updating a project from the current template revision."""
+
+    SUPPORTED_METHODS = ("POST",)
+
+    @tornado.web.authenticated
+    async def post(self, path: str = ""):
+        """Update the project files from the current template revision.
+
+        Only the files changed by the template since the project creation are
+        replaced; the ones modified in the project are reported as conflicts.
+
+        POST /jupyter-project/projects/<path-to-project>?update
+
+            Answer json body:
+                {
+                    project: Project configuration file content,
+                    changes: {
+                        added: New files,
+                        updated: Replaced files,
+                        removed: Deleted files,
+                        conflicts: Files modified in the project and by the template
+                    }
+                }
+        """
+        if self.template is None:
             raise tornado.web.HTTPError(
-                404, reason=f"Path {path} is not a valid project"
+                404, reason="Project cookiecutter template not found."
             )
 
-        rmtree(fullpath, ignore_errors=True)
+        fullpath = self._get_realpath(path)
+        async with self.locks.lock(fullpath):
+            # Check that the path is a project
+            try:
+                configuration = await self.timer.run_in_executor(
+                    functools.partial(self.template.get_configuration, fullpath),
+                    phase="filesystem",
+                )
+            except (ValidationError, ValueError):
+                raise tornado.web.HTTPError(
+                    404, reason=f"Path {path} is not a valid project"
+                )
+
+            try:
+                with self.tracer.span(
+                    "ProjectsHandler.update", template=self.template.template, path=path
+                ):
+                    changes = await self.timer.run_in_executor(
+                        bind_context(self.template.update, fullpath), phase="render",
+                    )
+            except ValueError as error:
+                raise tornado.web.HTTPError(409, reason=str(error))
+            except (CookiecutterException, OSError) as error:
+                raise tornado.web.HTTPError(
+                    500,
+                    log_message=f"Fail to update the project from the cookiecutter template.",
+                    reason=repr(error),
+                )
 
-        self.set_status(204)
+        configuration["path"] = path
+        self.finish(json.dumps({"project": configuration, "changes": changes}))
+
+
+class EventsHandler(APIHandler):
+    """Handler streaming the projects changes as server-sent events."""
 
+    def initialize(self, watcher: ProjectsWatcher = None):
+        """Initialize request handler
+
+        Args:
+            watcher (ProjectsWatcher): Watcher broadcasting the projects changes.
+        """
+        self.watcher = watcher
+        self.queue = None
+
+    @tornado.web.authenticated
+    async def get(self):
+        """Stream the projects changes.
+
+        GET /jupyter-project/events
+            Open a text/event-stream; each event data is a JSON object:
+
+            event: created
+            data: {path: str, project: Project configuration}
+
+            event: changed
+            data: {path: str, diff: JSON merge patch of the project configuration}
+
+            event: deleted
+            data: {path: str}
+        """
+        if self.watcher is None:
+            raise tornado.web.HTTPError(
+                404, reason="Project cookiecutter template not found."
+            )
+
+        self.set_header("Content-Type", "text/event-stream")
+        self.set_header("Cache-Control", "no-cache")
+        self.queue = self.watcher.subscribe()
+        try:
+            # Send the headers right away so the client knows the stream is opened
+            self.write(": connected\n\n")
+            await self.flush()
+            while True:
+                try:
+                    item = await asyncio.wait_for(self.queue.get(), EVENTS_KEEPALIVE)
+                except asyncio.TimeoutError:
+                    self.write(": keepalive\n\n")
+                else:
+                    if item is None:  # Connection closed
+                        break
+                    event, data = item
+                    self.write(f"event: {event}\ndata: {json.dumps(data)}\n\n")
+                await self.flush()
+        except StreamClosedError:
+            pass
+        finally:
+            self.watcher.unsubscribe(self.queue)
+
+    def on_connection_close(self):
+        super().on_connection_close()
+        if self.queue is not None:
+            try:
+                self.queue.put_nowait(None)
+            except asyncio.QueueFull:
+                pass  # The stream will fail on the next write
 
-class SettingsHandler(APIHandler):
+
+class SettingsHandler(_TimedHandler):
     """Handler to get the extension server configuration."""
 
-    def initialize(self, project_settings: Dict[str, Any] = None):
+    def initialize(
+        self,
+        project_settings: Dict[str, Any] = None,
+        slow_request_threshold: float = 0.0,
+    ):
+        super().initialize(slow_request_threshold)
         self.project_settings = project_settings or {}
 
     @tornado.web.authenticated
@@ -284,7 +1250,9 @@ class SettingsHandler(APIHandler):
                 defaultCondaPackages: str | null,
                 defaultPath: str | null,
                 editableInstall: bool,
+                gitInit: bool,
                 schema: JSONschema | null,
+                serverProvisioning: bool,
                 withGit: bool
             }
         }
@@ -292,20 +1260,128 @@ class SettingsHandler(APIHandler):
         self.finish(json.dumps(self.project_settings))
 
 
-def setup_handlers(
-    web_app: "NotebookWebApplication", config: JupyterProject, logger: logging.Logger
-):
+class TemplatesCacheHandler(APIHandler):
+    """Handler reporting the file templates cache statistics."""
 
-    host_pattern = ".*$"
+    def initialize(self, cache: TemplateCache = None):
+        """Initialize request handler
 
-    base_url = url_path_join(web_app.settings["base_url"], NAMESPACE)
-    handlers = list()
+        Args:
+            cache (TemplateCache): Compiled file templates cache.
+        """
+        self.cache = cache if cache is not None else TemplateCache()
 
-    # File templates
+    @tornado.web.authenticated
+    def get(self):
+        """Get the file templates cache statistics.
+
+        GET /jupyter-project/cache
+            Answer json body:
+                {
+                    entries: int,
+                    maxEntries: int,
+                    bytes: int - approximate size of the compiled templates,
+                    maxBytes: int - 0 if not limited,
+                    hits: int,
+                    misses: int,
+                    evictions: int,
+                    compilations: int,
+                    compileTimeMs: float - cumulated compilation time
+                }
+        """
+        self.finish(json.dumps(self.cache.stats()))
+
+
+class ReadyHandler(APIHandler):
+    """Handler reporting the extension initialization status."""
+
+    def initialize(self, initializer: ExtensionInitializer = None):
+        """Initialize request handler
+
+        Args:
+            initializer (ExtensionInitializer): Extension initialization progress tracker.
+        """
+        self.initializer = initializer
+
+    def _answer(self):
+        if self.initializer.state == PENDING:
+            self.set_status(503)
+            self.set_header("Retry-After", str(RETRY_AFTER))
+        elif not self.initializer.ready:
+            self.set_status(500)
+        self.finish(json.dumps(self.initializer.model()))
+
+    @tornado.web.authenticated
+    def get(self):
+        """Get the extension initialization status.
+
+        GET /jupyter-project/ready
+            Status 200 if ready, 503 while initializing and 500 if the initialization failed
+
+            Answer json body:
+                {
+                    state: "pending" | "ready" | "failed",
+                    stage: str | null,
+                    progress: float,
+                    durations: {stage: duration in ms},
+                    error: str | null
+                }
+        """
+        self._answer()
+
+
+class NotReadyHandler(ReadyHandler):
+    """Handler answering the extension requests until it is initialized."""
+
+    @tornado.web.authenticated
+    def get(self):
+        self._answer()
+
+    post = put = patch = delete = get
+
+
+class _MethodMatches(PathMatches):
+    """Matches the requests using one of the HTTP methods on a path pattern.
+
+    If an argument is provided, only the requests with that query argument
+    are matched.
+    """
+
+    def __init__(
+        self, path_pattern: str, methods: Tuple[str, ...], argument: str = None
+    ):
+        super().__init__(path_pattern)
+        self.methods = methods
+        self.argument = argument
+
+    def match(self, request) -> Optional[Dict[str, Any]]:
+        if request.method not in self.methods:
+            return None
+        if self.argument is not None and self.argument not in request.query_arguments:
+            return None
+        return super().match(request)
+
+
+def _load_file_templates(
+    initializer: ExtensionInitializer,
+    config: JupyterProject,
+    logger: logging.Logger,
+) -> Dict[str, Dict[str, Any]]:
+    """Create the file templates loaders and discover their files.
+
+    Args:
+        initializer (ExtensionInitializer): Initialization progress tracker
+        config (JupyterProject): Extension configuration
+        logger (logging.Logger): Server logger
+
+    Returns:
+        Dict[str, Dict]: Templates name -> {loader: jinja2.BaseLoader, files: List[FileTemplate]}
+    """
     list_templates = config.file_templates
-    ## Create the loaders
+    index = TemplatesIndex(Path(config.cache_dir) / "templates_index.json")
     templates = dict()
-    for template in list_templates:
+    for count, template in enumerate(list_templates):
+        initializer.set_progress(count / len(list_templates))
         name = template.name
         if name in templates:
             logger.warning(f"Template '{name}' already exists; it will be ignored.")
@@ -316,81 +1392,316 @@ def setup_handlers(
                 "files": template.files,
             }
             location = Path(template.location)
-            if location.exists() and location.is_dir():
-                new_template["loader"] = FileSystemLoader(str(location))
-            elif len(template.module) > 0:
-                try:
-                    new_template["loader"] = PackageLoader(
-                        template.module, package_path=str(location)
-                    )
-                except ModuleNotFoundError:
-                    logger.warning(f"Unable to find module '{template.module}'")
+            directory = None
+            try:
+                if location.exists() and location.is_dir():
+                    new_template["loader"] = FileSystemLoader(str(location))
+                    directory = location
+                elif is_archive(location):
+                    new_template["loader"] = ArchiveLoader(location)
+                    directory = location
+                elif len(template.module) > 0:
+                    module = importlib.import_module(template.module)
+                    directory = Path(module.__file__).parent / location
+                    if is_archive(directory):
+                        new_template["loader"] = ArchiveLoader(directory)
+                    else:
+                        new_template["loader"] = PackageLoader(
+                            template.module, package_path=str(location)
+                        )
+            except ModuleNotFoundError:
+                logger.warning(f"Unable to find module '{template.module}'")
+            except ValueError as error:
+                logger.warning(f"Unable to read templates archive: {error!s}")
 
             if new_template["loader"] is None:
                 logger.warning(f"Unable to load templates '{name}'.")
                 continue
 
+            new_template["files"] = template.files + template.discover_files(
+                directory, index
+            )
             templates[name] = new_template
 
-    env = Environment(
-        loader=PrefixLoader({name: t["loader"] for name, t in templates.items()}),
-        extensions=jinja2_extensions,
-    )
+    index.save()
+    return templates
+
+
+def _bundle_schema(
+    bundler: SchemaBundler, schema: Dict, name: str, logger: logging.Logger
+) -> Dict:
+    """Bundle a template schema with the schema files it references.
+
+    Args:
+        bundler (SchemaBundler): Bundler shared by all templates
+        schema (Dict): JSON schema
+        name (str): Template name
+        logger (logging.Logger): Server logger
+
+    Returns:
+        Dict: Bundled schema; the schema itself if it cannot be bundled
+    """
+    if len(schema) == 0:
+        return schema
+    try:
+        return bundler.bundle(schema)
+    except ValueError as error:
+        logger.warning(f"Unable to bundle the JSON schema of '{name}': {error!s}")
+        return schema
+
+
+def _load_templates(
+    initializer: ExtensionInitializer,
+    web_app: "NotebookWebApplication",
+    config: Union[JupyterProject, Callable[[], JupyterProject]],
+    logger: logging.Logger,
+) -> Dict[str, Any]:
+    """Load the configuration and the templates and build the file templates handlers.
+
+    This is executed in a background thread as loading and compiling the
+    templates and bundling their schemas may be slow. Nothing bound to the
+    server loop is created or modified here; see :py:func:`_build_handlers`.
+
+    Args:
+        initializer (ExtensionInitializer): Initialization progress tracker
+        web_app (NotebookWebApplication): Server web application
+        config (JupyterProject or Callable[[], JupyterProject]): Extension configuration or its factory
+        logger (logging.Logger): Server logger
+
+    Returns:
+        Dict: {config, handlers: file templates handler rules, file_settings, cache, locks, tracer, project_template: with bundled schemas or None}
+    """
+    with initializer.stage("configuration"):
+        if not isinstance(config, JupyterProject):
+            config = config()
+
+    base_url = url_path_join(web_app.settings["base_url"], NAMESPACE)
+    handlers = list()
+
+    locks = PathLocks()
+    tracer = Tracer()
+    if config.trace_exporter == "console":
+        tracer = Tracer(LogExporter(logger))
+    elif config.trace_exporter == "file":
+        try:
+            Path(config.trace_file).parent.mkdir(parents=True, exist_ok=True)
+        except OSError as error:
+            logger.warning(f"Unable to create the trace file folder: {error!s}")
+        else:
+            tracer = Tracer(FileExporter(config.trace_file))
+
+    # File templates
+    with initializer.stage("file_templates"):
+        templates = _load_file_templates(initializer, config, logger)
 
     ## Create the handlers
     file_settings = list()
-    for name, template in templates.items():
-        filenames = set()
-        for file in template["files"]:
-            pfile = Path(file.template)
-            suffixes = "".join(pfile.suffixes)
-            short_name = pfile.as_posix()[: -(len(suffixes))]
-            if short_name in filenames:
-                logger.warning(
-                    f"Template '{name}/{pfile.as_posix()}' skipped as it has the same name than another template."
+    # Schemas are bundled once; the bundled form is used for the validation
+    # and sent to the frontend
+    bundler = SchemaBundler(Path(config.schemas_dir or "."))
+    with initializer.stage("file_handlers"):
+        cache = TemplateCache(config.template_cache_size, config.template_cache_bytes)
+        env = create_environment(
+            {name: t["loader"] for name, t in templates.items()},
+            cache_dir=config.cache_dir,
+            cache=cache,
+            enable_async=config.template_enable_async,
+        )
+        for count, (name, template) in enumerate(templates.items()):
+            initializer.set_progress(count / len(templates))
+            filenames = set()
+            for file in template["files"]:
+                pfile = Path(file.template)
+                suffixes = "".join(pfile.suffixes)
+                short_name = pfile.as_posix()[: -(len(suffixes))]
+                if short_name in filenames:
+                    logger.warning(
+                        f"Template '{name}/{pfile.as_posix()}' skipped as it has the same name than another template."
+                    )
+                    continue
+                filenames.add(short_name)
+
+                endpoint = quote("/".join((name, short_name)), safe="")
+                template_name = f"{name}/{pfile.as_posix()}"
+                # The templates are compiled once to check them; the handlers
+                # get them from the bounded cache
+                render_mode = file.render_mode
+                if render_mode == "notebook":
+                    try:
+                        load_notebook_template(env, template_name)
+                    except (ValueError, TemplateError) as error:
+                        logger.warning(
+                            f"Template '{template_name}' rendered as text as it is not a valid notebook template: {error!s}"
+                        )
+                        render_mode = "text"
+                if render_mode != "notebook":
+                    env.get_template(template_name)
+                handlers.append(
+                    (
+                        url_path_join(
+                            base_url, r"files/{:s}{:s}".format(endpoint, path_regex),
+                        ),
+                        FileTemplatesHandler,
+                        {
+                            "default_name": file.default_name,
+                            "environment": env,
+                            "template_name": template_name,
+                            "render_mode": render_mode,
+                            "locks": locks,
+                            "tracer": tracer,
+                            "slow_request_threshold": config.slow_request_threshold,
+                        },
+                    )
                 )
-                continue
-            filenames.add(short_name)
 
-            endpoint = quote("/".join((name, short_name)), safe="")
-            handlers.append(
-                (
-                    url_path_join(
-                        base_url, r"files/{:s}{:s}".format(endpoint, path_regex),
-                    ),
-                    FileTemplatesHandler,
+                destination = (
+                    None
+                    if file.destination == Path("")
+                    else file.destination.as_posix()
+                )
+                file.schema = _bundle_schema(bundler, file.schema, template_name, logger)
+
+                file_settings.append(
                     {
-                        "default_name": file.default_name,
-                        "template": env.get_template(f"{name}/{pfile.as_posix()}"),
-                    },
+                        "name": file.template_name or endpoint,
+                        "endpoint": endpoint,
+                        "destination": destination,
+                        "icon": file.icon,
+                        "schema": file.schema if len(file.schema) else None,
+                    }
                 )
-            )
 
-            destination = (
-                None if file.destination == Path("") else file.destination.as_posix()
+    with initializer.stage("project_template"):
+        project_template = config.project_template
+        if project_template is None or project_template.template is None:
+            project_template = None
+        else:
+            project_template.schema = _bundle_schema(
+                bundler, project_template.schema, "project_template", logger
+            )
+            project_template.configuration_schema = _bundle_schema(
+                bundler,
+                project_template.configuration_schema,
+                "project_template configuration",
+                logger,
             )
 
-            file_settings.append(
-                {
-                    "name": file.template_name or endpoint,
-                    "endpoint": endpoint,
-                    "destination": destination,
-                    "icon": file.icon,
-                    "schema": file.schema if len(file.schema) else None,
-                }
+    return {
+        "config": config,
+        "handlers": handlers,
+        "file_settings": file_settings,
+        "cache": cache,
+        "locks": locks,
+        "tracer": tracer,
+        "project_template": project_template,
+    }
+
+
+def _build_handlers(
+    web_app: "NotebookWebApplication",
+    loaded: Dict[str, Any],
+    logger: logging.Logger,
+    kernel_filter: KernelFilter,
+) -> List[Tuple[str, Type[APIHandler], Dict[str, Any]]]:
+    """Build the extension handlers.
+
+    This is executed on the server loop as it creates the objects bound to it
+    (projects watcher, conda pool job, sessions expiry) and wraps the kernel manager.
+
+    Args:
+        web_app (NotebookWebApplication): Server web application
+        loaded (Dict): Templates loaded by :py:func:`_load_templates`
+        logger (logging.Logger): Server logger
+        kernel_filter (KernelFilter): Allowed kernels per project session
+
+    Returns:
+        List: Handler rules
+    """
+    config = loaded["config"]
+    base_url = url_path_join(web_app.settings["base_url"], NAMESPACE)
+    handlers = list(loaded["handlers"])
+
+    project_template = loaded["project_template"]
+    project_settings = None
+    if project_template is not None:
+        watcher = ProjectsWatcher(project_template, config.events_poll_interval)
+        handlers.append(
+            (url_path_join(base_url, "events"), EventsHandler, {"watcher": watcher})
+        )
+        projects_pattern = url_path_join(base_url, r"projects{:s}".format(path_regex))
+        environments = None
+        if config.conda_provisioning and project_template.conda_pkgs is not None:
+            executable = config.conda_executable or default_executable()
+            if executable is None:
+                logger.warning(
+                    "conda executable not found; the projects environments will not be provisioned."
+                )
+            else:
+                environments = CondaEnvironments(executable, config.conda_pool_size)
+                environments.start_fill_pool(
+                    resolve_packages(project_template.conda_pkgs)
+                )
+        prespawner = None
+        if config.kernel_prespawn_timeout > 0.0:
+            prespawner = KernelPrespawner(
+                web_app.settings["kernel_manager"], config.kernel_prespawn_timeout
             )
+        # Wrapped after the prespawner so a rejected kernel is not adopted
+        kernel_filter.guard(web_app.settings["kernel_manager"])
+        if config.session_timeout > 0.0:
+
+            def expire_sessions():
+                for session in kernel_filter.expire(config.session_timeout):
+                    logger.debug(f"[jupyter-project] Project session {session} expired.")
+                    watcher.close(session)
+                    if prespawner is not None:
+                        prespawner.close(session)
 
-    project_template = config.project_template
-    if project_template is None or project_template.template is None:
-        project_settings = None
-    else:
+            tornado.ioloop.PeriodicCallback(
+                expire_sessions, min(config.session_timeout, 60.0) * 1000.0
+            ).start()
+        projects_kwargs = {
+            "template": project_template,
+            "locks": loaded["locks"],
+            "kernel_filter": kernel_filter,
+            "watcher": watcher,
+            "environments": environments,
+            "prespawner": prespawner,
+            "tracer": loaded["tracer"],
+            "slow_request_threshold": config.slow_request_threshold,
+        }
+        # The import streams the request body; it needs its own handler
         handlers.append(
             (
-                url_path_join(base_url, r"projects{:s}".format(path_regex)),
-                ProjectsHandler,
-                {"template": project_template},
+                _MethodMatches(projects_pattern, ProjectImportHandler.SUPPORTED_METHODS),
+                ProjectImportHandler,
+                projects_kwargs,
             )
         )
+        # Registered first as the project path pattern matches the same URLs
+        handlers.append(
+            (
+                _MethodMatches(
+                    projects_pattern,
+                    ProjectStatsHandler.SUPPORTED_METHODS,
+                    argument="stats",
+                ),
+                ProjectStatsHandler,
+                {"usage": DiskUsage(), **projects_kwargs},
+            )
+        )
+        handlers.append(
+            (
+                _MethodMatches(
+                    projects_pattern,
+                    ProjectUpdateHandler.SUPPORTED_METHODS,
+                    argument="update",
+                ),
+                ProjectUpdateHandler,
+                projects_kwargs,
+            )
+        )
+        handlers.append((projects_pattern, ProjectsHandler, projects_kwargs))
 
         default_path = (
             None
@@ -402,23 +1713,94 @@ def setup_handlers(
             "defaultCondaPackages": project_template.conda_pkgs,
             "defaultPath": default_path,
             "editableInstall": project_template.editable_install,
+            "gitInit": project_template.git_init,
             "schema": (
                 project_template.schema if len(project_template.schema) else None
             ),
-            "withGit": True,  # TODO make it configurable
+            "serverProvisioning": environments is not None,
+            "withGit": project_template.with_git,
         }
 
+    handlers.append(
+        (
+            url_path_join(base_url, "cache"),
+            TemplatesCacheHandler,
+            {"cache": loaded["cache"]},
+        )
+    )
     handlers.append(
         (
             url_path_join(base_url, "settings"),
             SettingsHandler,
             {
                 "project_settings": {
-                    "fileTemplates": file_settings,
+                    "fileTemplates": loaded["file_settings"],
                     "projectTemplate": project_settings,
-                }
+                },
+                "slow_request_threshold": config.slow_request_threshold,
             },
         ),
     )
 
-    web_app.add_handlers(host_pattern, handlers)
+    return handlers
+
+
+def setup_handlers(
+    web_app: "NotebookWebApplication",
+    config: Union[JupyterProject, Callable[[], JupyterProject]],
+    logger: logging.Logger,
+) -> ExtensionInitializer:
+    """Register the extension handlers.
+
+    The handlers are built in a background task once the server is started.
+    Until they are ready, the extension endpoints answer 503 and the
+    initialization progress is available at /jupyter-project/ready.
+
+    Args:
+        web_app (NotebookWebApplication): Server web application
+        config (JupyterProject or Callable[[], JupyterProject]): Extension configuration or its factory
+        logger (logging.Logger): Server logger
+
+    Returns:
+        ExtensionInitializer: Initialization progress tracker
+    """
+    host_pattern = ".*$"
+
+    base_url = url_path_join(web_app.settings["base_url"], NAMESPACE)
+    initializer = ExtensionInitializer(INIT_STAGES)
+    ready_rule = (
+        url_path_join(base_url, "ready"),
+        ReadyHandler,
+        {"initializer": initializer},
+    )
+    router = DeferredRouter(
+        web_app,
+        [
+            ready_rule,
+            (base_url + r"/.*", NotReadyHandler, {"initializer": initializer}),
+        ],
+    )
+    web_app.add_handlers(host_pattern, [(base_url + r"(?:/.*)?", router)])
+
+    kernel_filter = KernelFilter()
+    # Filter the kernel specs listing per project session and record the
+    # session of the kernel starts; the transform must be applied before any
+    # content encoding.
+    web_app.transforms.insert(
+        0,
+        kernelspecs_transform(
+            kernel_filter,
+            url_path_join(web_app.settings["base_url"], "api/kernelspecs"),
+        ),
+    )
+
+    load = functools.partial(
+        _load_templates, web_app=web_app, config=config, logger=logger
+    )
+    build = functools.partial(
+        _build_handlers, web_app, logger=logger, kernel_filter=kernel_filter
+    )
+    tornado.ioloop.IOLoop.current().add_callback(
+        initializer.run, load, build, router, [ready_rule]
+    )
+    return initializer
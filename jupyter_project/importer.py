@@ -0,0 +1,262 @@
+"""
+Extract a project archive received chunk by chunk.
+
+The archive is extracted in a staging folder next to the destination while
+the request body is received, so the project appears at once when the import
+succeeds.
+"""
+import asyncio
+import io
+import logging
+import os
+import pathlib
+import shutil
+import stat
+import tarfile
+import tempfile
+import zipfile
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+# Size in bytes of the chunks copied in the extracted files
+CHUNK_SIZE = 256 * 1024
+# Maximal number of received chunks waiting for the extraction
+MAX_PENDING_CHUNKS = 16
+# Prefix of the staging folders
+STAGING_PREFIX = ".jupyter-project-import-"
+
+
+def _member_path(root: pathlib.Path, name: str) -> Optional[pathlib.Path]:
+    """Get the extraction path of an archive member.
+
+    Args:
+        root (pathlib.Path): Extraction folder
+        name (str): Archive member name
+
+    Returns:
+        Optional[pathlib.Path]: Extraction path; None for the root itself
+
+    Raises:
+        ValueError: if the member would be extracted outside of the root folder
+    """
+    posix_name = name.replace("\\", "/")
+    parts = [part for part in posix_name.split("/") if part not in ("", ".")]
+    if (
+        posix_name.startswith("/")
+        or ".." in parts
+        or (len(parts) > 0 and ":" in parts[0])
+    ):
+        raise ValueError(f"Unsafe archive member '{name}'.")
+    return root.joinpath(*parts) if len(parts) > 0 else None
+
+
+def _write_file(source: io.IOBase, path: pathlib.Path, executable: bool = False):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    with path.open("wb") as f:
+        shutil.copyfileobj(source, f, CHUNK_SIZE)
+    if executable:
+        path.chmod(path.stat().st_mode | stat.S_IXUSR)
+
+
+def _extract_tar(archive: tarfile.TarFile, root: pathlib.Path):
+    for member in archive:
+        path = _member_path(root, member.name)
+        if path is None:
+            continue
+        if member.isdir():
+            path.mkdir(parents=True, exist_ok=True)
+        elif member.isfile():
+            with archive.extractfile(member) as source:
+                _write_file(source, path, bool(member.mode & stat.S_IXUSR))
+        else:
+            logger.warning(f"Archive member '{member.name}' skipped as it is not a regular file.")
+
+
+def _extract_zip(archive: zipfile.ZipFile, root: pathlib.Path):
+    for info in archive.infolist():
+        path = _member_path(root, info.filename)
+        if path is None:
+            continue
+        mode = info.external_attr >> 16
+        if info.is_dir():
+            path.mkdir(parents=True, exist_ok=True)
+        elif stat.S_ISLNK(mode):
+            logger.warning(f"Archive member '{info.filename}' skipped as it is not a regular file.")
+        else:
+            with archive.open(info) as source:
+                _write_file(source, path, bool(mode & stat.S_IXUSR))
+
+
+class _QueueReader(io.RawIOBase):
+    """Blocking reader of the chunks received by an :py:class:`ArchiveImporter`."""
+
+    def __init__(self, importer: "ArchiveImporter"):
+        self._importer = importer
+        self._pending = memoryview(b"")
+        self.eof = False
+
+    def readable(self) -> bool:
+        return True
+
+    def readinto(self, buffer) -> int:
+        while len(self._pending) == 0:
+            if self.eof:
+                return 0
+            chunk = self._importer._get_chunk()
+            if chunk is None:
+                self.eof = True
+                return 0
+            self._pending = memoryview(chunk)
+
+        size = min(len(buffer), len(self._pending))
+        buffer[:size] = self._pending[:size]
+        self._pending = self._pending[size:]
+        return size
+
+
+class ArchiveImporter:
+    """Extract a tar (optionally compressed) or zip archive received chunk by chunk.
+
+    Tar archives are extracted while the chunks are received. Zip archives
+    have their table of contents at the end; they are spooled in the staging
+    folder and extracted once received.
+
+    Example:
+        importer = ArchiveImporter(destination.parent)
+        try:
+            async for chunk in body:
+                await importer.feed(chunk)
+            root = await importer.finish()
+            os.rename(root, destination)
+        finally:
+            await importer.cleanup()
+    """
+
+    def __init__(self, parent: pathlib.Path):
+        """Initialize the importer
+
+        Args:
+            parent (pathlib.Path): Folder in which the staging folder is created;
+                it must be on the same file system as the destination.
+        """
+        self.parent = parent
+        self.staging = None
+        self._queue = asyncio.Queue(MAX_PENDING_CHUNKS)
+        self._loop = None
+        self._future = None
+        self._aborted = False
+
+    def _get_chunk(self) -> Optional[bytes]:
+        """Get the next received chunk; executed in the extraction thread.
+
+        Returns:
+            Optional[bytes]: The chunk; None at the end of the archive
+
+        Raises:
+            ValueError: if the import was aborted
+        """
+        # The client is gone once aborted; no more chunk will be received
+        if self._aborted:
+            raise ValueError("Import aborted.")
+        chunk = asyncio.run_coroutine_threadsafe(self._queue.get(), self._loop).result()
+        if self._aborted:
+            raise ValueError("Import aborted.")
+        return chunk
+
+    def _extract(self) -> pathlib.Path:
+        """Extract the archive in the staging folder; executed in a thread.
+
+        Returns:
+            pathlib.Path: Root folder of the extracted archive
+        """
+        raw = _QueueReader(self)
+        reader = io.BufferedReader(raw, CHUNK_SIZE)
+        try:
+            self.parent.mkdir(parents=True, exist_ok=True)
+            self.staging = pathlib.Path(
+                tempfile.mkdtemp(prefix=STAGING_PREFIX, dir=str(self.parent))
+            )
+            root = self.staging / "project"
+            root.mkdir()
+
+            if reader.peek(4)[:4] == b"PK\x03\x04":
+                spool = self.staging / "archive.zip"
+                with spool.open("wb") as f:
+                    shutil.copyfileobj(reader, f, CHUNK_SIZE)
+                try:
+                    with zipfile.ZipFile(spool) as archive:
+                        _extract_zip(archive, root)
+                except zipfile.BadZipFile as error:
+                    raise ValueError(f"Invalid zip archive: {error!s}")
+                spool.unlink()
+            else:
+                try:
+                    with tarfile.open(fileobj=reader, mode="r|*") as archive:
+                        _extract_tar(archive, root)
+                except tarfile.TarError as error:
+                    raise ValueError(f"Invalid tar archive: {error!s}")
+        except BaseException:
+            # Consume the remaining chunks so the request body is received
+            while not (raw.eof or self._aborted):
+                try:
+                    raw.read(CHUNK_SIZE)
+                except ValueError:
+                    break
+            raise
+        else:
+            while not raw.eof:
+                raw.read(CHUNK_SIZE)
+
+        # Archive containing a single root folder
+        children = list(root.iterdir())
+        if len(children) == 1 and children[0].is_dir():
+            root = children[0]
+        return root
+
+    async def feed(self, chunk: bytes):
+        """Add a received chunk; it waits if the extraction is late.
+
+        Args:
+            chunk (bytes): Archive chunk
+        """
+        if self._future is None:
+            self._loop = asyncio.get_event_loop()
+            self._future = self._loop.run_in_executor(None, self._extract)
+        await self._queue.put(chunk)
+
+    async def finish(self) -> pathlib.Path:
+        """Wait for the end of the extraction.
+
+        Returns:
+            pathlib.Path: Root folder of the extracted archive
+
+        Raises:
+            ValueError: if the archive is empty, invalid or contains unsafe paths
+            OSError: if the archive cannot be extracted
+        """
+        if self._future is None:
+            raise ValueError("Empty archive.")
+        await self._queue.put(None)
+        return await self._future
+
+    def abort(self):
+        """Stop the extraction; e.g. if the client disconnected."""
+        self._aborted = True
+        try:
+            self._queue.put_nowait(None)
+        except asyncio.QueueFull:
+            pass  # The extraction will get the next chunk
+
+    async def cleanup(self):
+        """Remove the staging folder once the extraction is over."""
+        if self._future is not None:
+            try:
+                await self._future
+            except (OSError, ValueError):
+                pass
+        if self.staging is not None:
+            await asyncio.get_event_loop().run_in_executor(
+                None, shutil.rmtree, str(self.staging), True
+            )
+            self.staging = None
@@ -0,0 +1,184 @@
+import fnmatch
+import json
+import logging
+import os
+import pathlib
+from typing import Any, Dict, List, NoReturn, Optional
+
+from .archive import Archive
+
+logger = logging.getLogger(__name__)
+
+# Suffix of the sidecar files holding a template metadata
+METADATA_SUFFIX = ".meta.json"
+
+
+def _match_glob(parts: List[str], pattern: List[str]) -> bool:
+    """Match path parts against glob pattern parts; '**' matches any number of folders."""
+    if len(pattern) == 0:
+        return len(parts) == 0
+    if pattern[0] == "**":
+        return any(
+            _match_glob(parts[index:], pattern[1:]) for index in range(len(parts))
+        )
+    if len(parts) == 0 or not fnmatch.fnmatchcase(parts[0], pattern[0]):
+        return False
+    return _match_glob(parts[1:], pattern[1:])
+
+
+class TemplatesIndex:
+    """Persisted index of the templates discovered in a directory or an archive.
+
+    For each (directory, glob pattern) pair, the index stores the modification
+    time of every scanned sub-directory, the matching templates and the content
+    of their sidecar metadata file. The directory tree is walked again only if
+    one of those modification times changed; otherwise only the sidecar files
+    are checked for modification. An archive is scanned again only if its
+    modification time changed.
+    """
+
+    def __init__(self, cache_file: Optional[pathlib.Path] = None):
+        """Initialize the index
+
+        Args:
+            cache_file (pathlib.Path): JSON file in which the index is persisted [optional]
+        """
+        self.cache_file = cache_file
+        self._entries = dict()
+        self._dirty = False
+        if cache_file is not None and cache_file.exists():
+            try:
+                self._entries = json.loads(cache_file.read_text())
+            except (OSError, ValueError) as error:
+                logger.debug(f"Unable to load templates index {cache_file!s}:\n{error!s}")
+
+    @staticmethod
+    def _stat_directories(root: pathlib.Path) -> Dict[str, int]:
+        mtimes = dict()
+        for dirpath, _, _ in os.walk(root):
+            relative = pathlib.Path(dirpath).relative_to(root).as_posix()
+            try:
+                mtimes[relative] = os.stat(dirpath).st_mtime_ns
+            except OSError:
+                pass
+        return mtimes
+
+    @staticmethod
+    def _is_up_to_date(root: pathlib.Path, mtimes: Dict[str, int]) -> bool:
+        for relative, mtime in mtimes.items():
+            try:
+                if os.stat(root / relative).st_mtime_ns != mtime:
+                    return False
+            except OSError:
+                return False
+        return True
+
+    @staticmethod
+    def _read_metadata(sidecar: pathlib.Path) -> Dict[str, Any]:
+        try:
+            return {
+                "mtime": sidecar.stat().st_mtime_ns,
+                "metadata": json.loads(sidecar.read_text()),
+            }
+        except FileNotFoundError:
+            return {"mtime": None, "metadata": dict()}
+        except (OSError, ValueError) as error:
+            logger.warning(f"Unable to read template metadata {sidecar!s}:\n{error!s}")
+            return {"mtime": None, "metadata": dict()}
+
+    def _refresh_metadata(self, root: pathlib.Path, templates: Dict[str, Dict]):
+        for template, cached in templates.items():
+            sidecar = root / (template + METADATA_SUFFIX)
+            try:
+                mtime = sidecar.stat().st_mtime_ns
+            except OSError:
+                mtime = None
+            if mtime != cached["mtime"]:
+                templates[template] = self._read_metadata(sidecar)
+                self._dirty = True
+
+    def _scan_directory(self, root: pathlib.Path, pattern: str) -> Dict[str, Dict]:
+        # Directories mtimes are recorded before the walk so any concurrent
+        # modification will trigger a new walk the next time.
+        directories = self._stat_directories(root)
+        templates = dict()
+        for path in sorted(root.glob(pattern)):
+            if not path.is_file() or path.name.endswith(METADATA_SUFFIX):
+                continue
+            relative = path.relative_to(root).as_posix()
+            templates[relative] = self._read_metadata(
+                root / (relative + METADATA_SUFFIX)
+            )
+        return {"directories": directories, "templates": templates}
+
+    def _scan_archive(self, root: pathlib.Path, pattern: str) -> Dict[str, Dict]:
+        archive = Archive(root)
+        try:
+            names = set(archive.names())
+            templates = dict()
+            pattern_parts = pattern.split("/")
+            for name in sorted(names):
+                if name.endswith(METADATA_SUFFIX) or not _match_glob(
+                    name.split("/"), pattern_parts
+                ):
+                    continue
+                metadata = dict()
+                sidecar = name + METADATA_SUFFIX
+                if sidecar in names:
+                    try:
+                        metadata = json.loads(archive.read(sidecar))
+                    except ValueError as error:
+                        logger.warning(
+                            f"Unable to read template metadata {root!s}/{sidecar}:\n{error!s}"
+                        )
+                # Sidecar files within an archive are refreshed with the archive
+                templates[name] = {"mtime": None, "metadata": metadata}
+        finally:
+            archive.close()
+        return {"directories": {".": archive.mtime}, "templates": templates}
+
+    def glob(self, root: pathlib.Path, pattern: str) -> Dict[str, Dict[str, Any]]:
+        """Get the templates matching the pattern in the root directory or archive.
+
+        Args:
+            root (pathlib.Path): Templates directory or archive
+            pattern (str): Glob pattern relative to root
+
+        Returns:
+            Dict[str, Dict]: Template posix path relative to root -> template metadata
+        """
+        root = root.absolute()
+        key = f"{root.as_posix()}:{pattern}"
+        entry = self._entries.get(key)
+
+        if entry is None or not self._is_up_to_date(root, entry["directories"]):
+            if root.is_file():
+                entry = self._scan_archive(root, pattern)
+            else:
+                entry = self._scan_directory(root, pattern)
+            self._entries[key] = entry
+            self._dirty = True
+        else:
+            self._refresh_metadata(root, entry["templates"])
+
+        return {
+            template: cached["metadata"]
+            for template, cached in entry["templates"].items()
+        }
+
+    def save(self) -> NoReturn:
+        """Persist the index if it changed."""
+        if self.cache_file is None or not self._dirty:
+            return
+
+        try:
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            tmp_file = self.cache_file.with_name(self.cache_file.name + ".tmp")
+            tmp_file.write_text(json.dumps(self._entries))
+            os.replace(tmp_file, self.cache_file)
+        except OSError as error:
+            logger.debug(
+                f"Unable to save templates index {self.cache_file!s}:\n{error!s}"
+            )
+        else:
+            self._dirty = False
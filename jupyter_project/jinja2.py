@@ -1,8 +1,300 @@
+import collections
+import logging
+import os
+import pathlib
+import sys
+import threading
+import time
+from types import CodeType
+from typing import Any, Callable, Dict, Hashable, List, Optional, Tuple
+
+from jinja2 import (
+    BaseLoader,
+    Environment,
+    FileSystemBytecodeCache,
+    PrefixLoader,
+    Template,
+    TemplateNotFound,
+)
+
+from .archive import Archive
+
 try:
     import jinja2_time
 except ImportError:
     jinja2_time = None  # noqa
 
+logger = logging.getLogger(__name__)
+
+# Folder of the compiled file templates cache within the extension cache folder
+BYTECODE_CACHE_FOLDER = "templates_bytecode"
+
 jinja2_extensions = list()
 if jinja2_time is not None:
     jinja2_extensions.append("jinja2_time.TimeExtension")
+
+
+class ArchiveLoader(BaseLoader):
+    """Load templates from a zip or tar archive.
+
+    The archive is opened again (index and memory map) when its modification
+    time changes; so a replaced archive is served without restarting the server.
+    """
+
+    def __init__(self, path: pathlib.Path, encoding: str = "utf-8"):
+        """Initialize the loader
+
+        Args:
+            path (pathlib.Path): Archive path
+            encoding (str): Templates encoding
+
+        Raises:
+            ValueError: if the file is not a valid archive
+        """
+        self.path = pathlib.Path(path)
+        self.encoding = encoding
+        self._lock = threading.Lock()
+        self._archive = Archive(self.path)
+
+    @property
+    def archive(self) -> Archive:
+        """Archive: Current version of the archive"""
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            # Keep serving the last version
+            return self._archive
+        with self._lock:
+            if mtime != self._archive.mtime:
+                # The previous archive may still be read by another thread;
+                # its memory map is released once it is not referenced.
+                self._archive = Archive(self.path)
+            return self._archive
+
+    def get_source(
+        self, environment: Environment, template: str
+    ) -> Tuple[str, str, Callable[[], bool]]:
+        archive = self.archive
+        try:
+            source = archive.read(template).decode(self.encoding)
+        except KeyError:
+            raise TemplateNotFound(template)
+
+        path = archive.path
+        mtime = archive.mtime
+
+        def uptodate() -> bool:
+            try:
+                return os.stat(path).st_mtime_ns == mtime
+            except OSError:
+                return False
+
+        return source, (path / template).as_posix(), uptodate
+
+    def list_templates(self) -> List[str]:
+        return self.archive.names()
+
+
+def _code_size(code: CodeType) -> int:
+    """Approximate the memory used by a code object and its nested code objects."""
+    size = sys.getsizeof(code) + sys.getsizeof(code.co_code)
+    for const in code.co_consts:
+        if isinstance(const, CodeType):
+            size += _code_size(const)
+        else:
+            size += sys.getsizeof(const)
+    return size
+
+
+def template_size(template: Template) -> int:
+    """Approximate the memory used by a compiled template.
+
+    Only the compiled code (render function, blocks and their constants) is
+    taken into account. A notebook template is measured by the templates of
+    its cells and its static text.
+
+    Args:
+        template (jinja2.Template): Compiled template
+
+    Returns:
+        int: Approximate size in bytes
+    """
+    cells = getattr(template, "templates", None)
+    if cells is not None:
+        return template.static_size + sum(template_size(cell) for cell in cells)
+    functions = [template.root_render_func, *template.blocks.values()]
+    return sum(_code_size(f.__code__) for f in functions if hasattr(f, "__code__"))
+
+
+class TemplateCache:
+    """LRU cache of compiled templates bounded by entry count and approximate size.
+
+    It implements the part of the mapping interface used by the Jinja
+    environment and records the cache statistics.
+    """
+
+    def __init__(self, max_entries: int = 400, max_bytes: int = 0):
+        """Initialize the cache
+
+        Args:
+            max_entries (int): Maximal number of templates
+            max_bytes (int): Maximal approximate size in bytes of the templates; 0 for no limit
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        # Key -> (template, size)
+        self._entries = collections.OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.compilations = 0
+        self.compile_time = 0.0
+
+    @property
+    def capacity(self) -> int:
+        """int: Maximal number of templates (as jinja2.utils.LRUCache)"""
+        return self.max_entries
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._entries
+
+    def __getitem__(self, key: Hashable) -> Template:
+        template = self.get(key)
+        if template is None:
+            raise KeyError(key)
+        return template
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return default
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def __setitem__(self, key: Hashable, template: Template):
+        size = template_size(template)
+        with self._lock:
+            previous = self._entries.pop(key, None)
+            if previous is not None:
+                self._bytes -= previous[1]
+            self._entries[key] = (template, size)
+            self._bytes += size
+            while len(self._entries) > 0 and (
+                len(self._entries) > self.max_entries
+                or (self.max_bytes > 0 and self._bytes > self.max_bytes)
+            ):
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def copy(self) -> "TemplateCache":
+        return TemplateCache(self.max_entries, self.max_bytes)
+
+    def record_compilation(self, duration: float):
+        """Record a template compilation.
+
+        Args:
+            duration (float): Compilation time in seconds
+        """
+        with self._lock:
+            self.compilations += 1
+            self.compile_time += duration
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the cache statistics.
+
+        Returns:
+            Dict: Cache statistics
+        """
+        with self._lock:
+            return {
+                "entries": len(self._entries),
+                "maxEntries": self.max_entries,
+                "bytes": self._bytes,
+                "maxBytes": self.max_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "compilations": self.compilations,
+                "compileTimeMs": round(self.compile_time * 1000.0, 3),
+            }
+
+
+class CachedEnvironment(Environment):
+    """Jinja environment using a :py:class:`TemplateCache`.
+
+    The templates compilation time is recorded in the cache statistics.
+    """
+
+    def __init__(self, *args, cache: Optional[TemplateCache] = None, **kwargs):
+        """Initialize the environment
+
+        Args:
+            cache (TemplateCache): Templates cache; default to a cache of 400 entries
+            args: jinja2.Environment positional arguments
+            kwargs: jinja2.Environment keyword arguments
+        """
+        super().__init__(*args, **kwargs)
+        self.cache = cache if cache is not None else TemplateCache()
+
+    def compile(self, *args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return super().compile(*args, **kwargs)
+        finally:
+            self.cache.record_compilation(time.perf_counter() - start)
+
+
+def create_environment(
+    loaders: Dict[str, BaseLoader],
+    cache_dir: Optional[str] = None,
+    cache: Optional[TemplateCache] = None,
+    enable_async: bool = False,
+) -> CachedEnvironment:
+    """Create the file templates environment.
+
+    The templates are loaded through a ``PrefixLoader``. If a cache folder is
+    provided, the compiled templates are stored on disk so they are compiled
+    only once across server starts.
+
+    Args:
+        loaders (Dict[str, BaseLoader]): Templates group name -> loader
+        cache_dir (str): Extension cache folder [optional]
+        cache (TemplateCache): Compiled templates cache [optional]
+        enable_async (bool): Whether the templates are rendered asynchronously
+
+    Returns:
+        CachedEnvironment: The Jinja environment
+    """
+    bytecode_cache = None
+    if cache_dir is not None:
+        folder = pathlib.Path(cache_dir) / BYTECODE_CACHE_FOLDER
+        try:
+            folder.mkdir(parents=True, exist_ok=True)
+        except OSError as error:
+            logger.warning(f"Unable to create the templates bytecode cache: {error!s}")
+        else:
+            # Asynchronous templates are compiled differently
+            pattern = "__jinja2_async_%s.cache" if enable_async else "__jinja2_%s.cache"
+            bytecode_cache = FileSystemBytecodeCache(str(folder), pattern)
+
+    return CachedEnvironment(
+        loader=PrefixLoader(loaders),
+        extensions=jinja2_extensions,
+        bytecode_cache=bytecode_cache,
+        cache=cache,
+        enable_async=enable_async,
+    )
@@ -0,0 +1,426 @@
+import contextvars
+import hashlib
+import inspect
+import json
+import logging
+import time
+from typing import Dict, FrozenSet, List, NoReturn, Optional, Tuple, Type
+
+from jupyter_client.kernelspec import KernelSpecManager
+import tornado.ioloop
+from tornado.httputil import HTTPHeaders, HTTPServerRequest
+from tornado.web import HTTPError, OutputTransform
+
+logger = logging.getLogger(__name__)
+
+# Header and query argument identifying a project session (i.e. a browser tab
+# having opened a project)
+SESSION_HEADER = "X-Jupyter-Project-Session"
+SESSION_ARGUMENT = "project_session"
+# Fallback session cookie; it is shared by all tabs of a browser
+SESSION_COOKIE = "jupyter-project-session"
+
+# Project session of the request being handled
+_request_session = contextvars.ContextVar("jupyter_project_session", default=None)
+
+
+def get_session_id(request: HTTPServerRequest) -> Optional[str]:
+    """Get the project session id of a request.
+
+    The frontend sends the session of its tab in the :py:data:`SESSION_HEADER`
+    header or the :py:data:`SESSION_ARGUMENT` query argument. The session
+    cookie is used for the other clients.
+
+    Args:
+        request (HTTPServerRequest): Server request
+
+    Returns:
+        Optional[str]: Session id; None if the request has none
+    """
+    session = request.headers.get(SESSION_HEADER)
+    if not session:
+        values = request.query_arguments.get(SESSION_ARGUMENT)
+        if values:
+            session = values[-1].decode("utf-8", errors="replace")
+    if not session:
+        cookie = request.cookies.get(SESSION_COOKIE)
+        if cookie is not None:
+            session = cookie.value
+    return session or None
+
+
+class KernelFilter:
+    """Allowed kernels per project session.
+
+    Instead of setting the kernel spec manager whitelist, which is shared by
+    all clients, the kernels allowed for each project session are stored here
+    and the kernel specs listing is filtered for each request.
+
+    The kernels matching a conda environment are cached; so opening a project
+    does not require to list the kernel specs once its environment is known.
+
+    The last activity of each session is recorded as a client may never close
+    its project; :py:meth:`expire` drops the idle sessions.
+    """
+
+    def __init__(self):
+        # Environment name -> kernel names
+        self._environments = dict()
+        # Session id -> allowed kernel names
+        self._sessions = dict()
+        # Session id -> last activity time
+        self._last_seen = dict()
+
+    def get_environment_kernels(
+        self, kernel_spec_manager: KernelSpecManager, environment: str
+    ) -> FrozenSet[str]:
+        """Get the kernels of a conda environment.
+
+        The kernel specs are listed only if the environment is unknown.
+
+        Args:
+            kernel_spec_manager (KernelSpecManager): Kernel spec manager
+            environment (str): Conda environment name
+
+        Returns:
+            FrozenSet[str]: Kernel names of the environment
+        """
+        if environment not in self._environments:
+            self.refresh(kernel_spec_manager)
+        return self._environments.get(environment, frozenset())
+
+    def refresh(self, kernel_spec_manager: KernelSpecManager):
+        """Refresh the kernels cache for all conda environments.
+
+        Args:
+            kernel_spec_manager (KernelSpecManager): Kernel spec manager
+        """
+        # Trick nb_conda_kernels to for refreshing the spec
+        try:
+            kernel_spec_manager._conda_kernels_cache_expiry = None
+            kernel_spec_manager._conda_info_cache_expiry = None
+        except AttributeError:
+            pass
+
+        environments = dict()
+        for name, spec in kernel_spec_manager.get_all_specs().items():
+            environment = spec["spec"].get("metadata", {}).get("conda_env_name")
+            if environment is not None:
+                environments.setdefault(environment, set()).add(name)
+        # Environment without kernel are not cached as its kernel may be installed later
+        self._environments = {
+            environment: frozenset(kernels)
+            for environment, kernels in environments.items()
+        }
+
+    def set_session(self, session: str, kernels: FrozenSet[str]):
+        """Set the allowed kernels for a session.
+
+        Args:
+            session (str): Session id
+            kernels (FrozenSet[str]): Allowed kernel names; empty to allow all kernels
+        """
+        if len(kernels) == 0:
+            self._sessions.pop(session, None)
+        else:
+            self._sessions[session] = frozenset(kernels)
+        self._last_seen[session] = time.monotonic()
+
+    def clear_session(self, session: str):
+        """Allow all kernels for a session and stop tracking it.
+
+        Args:
+            session (str): Session id
+        """
+        self._sessions.pop(session, None)
+        self._last_seen.pop(session, None)
+
+    def get_session(self, session: Optional[str]) -> Optional[FrozenSet[str]]:
+        """Get the allowed kernels for a session.
+
+        Args:
+            session (str): Session id
+
+        Returns:
+            Optional[FrozenSet[str]]: Allowed kernel names or None if all kernels are allowed
+        """
+        return self._sessions.get(session)
+
+    def touch(self, session: Optional[str]):
+        """Record an activity of a tracked session.
+
+        Args:
+            session (str): Session id
+        """
+        if session in self._last_seen:
+            self._last_seen[session] = time.monotonic()
+
+    def expire(self, timeout: float, now: Optional[float] = None) -> List[str]:
+        """Drop the sessions without activity for longer than the timeout.
+
+        Args:
+            timeout (float): Idle duration in seconds
+            now (float): Current :py:func:`time.monotonic` time; default to now
+
+        Returns:
+            List[str]: Expired session ids
+        """
+        now = time.monotonic() if now is None else now
+        expired = [
+            session
+            for session, last_seen in self._last_seen.items()
+            if now - last_seen > timeout
+        ]
+        for session in expired:
+            self.clear_session(session)
+        return expired
+
+    def guard(self, kernel_manager: "MappingKernelManager") -> NoReturn:
+        """Reject the kernel starts not allowed for the requesting session.
+
+        The kernel manager ``start_kernel`` method is wrapped; it raises
+        a 403 error if the kernel is not allowed for the project session
+        of the request being handled.
+
+        Args:
+            kernel_manager (MappingKernelManager): Server kernel manager
+        """
+        start_kernel = kernel_manager.start_kernel
+
+        async def _filtering_start_kernel(
+            kernel_id: Optional[str] = None, **kwargs
+        ) -> str:
+            if kernel_id is None:
+                kernels = self.get_session(_request_session.get())
+                kernel_name = (
+                    kwargs.get("kernel_name") or kernel_manager.default_kernel_name
+                )
+                if kernels is not None and kernel_name not in kernels:
+                    raise HTTPError(
+                        403,
+                        reason=f"Kernel {kernel_name} is not allowed in the opened project.",
+                    )
+            result = start_kernel(kernel_id=kernel_id, **kwargs)
+            if inspect.isawaitable(result):
+                result = await result
+            return result
+
+        kernel_manager.start_kernel = _filtering_start_kernel
+
+    def filter_specs(self, model: Dict, kernels: FrozenSet[str]) -> Dict:
+        """Filter a kernel specs listing model.
+
+        Args:
+            model (Dict): Kernel specs model {default: str, kernelspecs: {name: spec}}
+            kernels (FrozenSet[str]): Allowed kernel names
+
+        Returns:
+            Dict: Filtered model
+        """
+        specs = {
+            name: spec
+            for name, spec in model.get("kernelspecs", {}).items()
+            if name in kernels
+        }
+        default = model.get("default")
+        if default not in specs and len(specs) > 0:
+            default = sorted(specs)[0]
+        return {**model, "default": default, "kernelspecs": specs}
+
+
+class KernelPrespawner:
+    """Start a kernel in advance when a project is opened.
+
+    The kernel is started in the project default folder. The first session
+    requesting a kernel with the same name and working directory adopts it
+    instead of starting a new one: the kernel manager ``start_kernel`` method
+    is wrapped for that. The kernel is shut down if it is not adopted within
+    the timeout or if the project is closed.
+    """
+
+    def __init__(self, kernel_manager: "MappingKernelManager", timeout: float):
+        """Initialize the prespawner
+
+        Args:
+            kernel_manager (MappingKernelManager): Server kernel manager; its start_kernel method is wrapped
+            timeout (float): Duration in seconds after which an unused kernel is shut down
+        """
+        self.kernel_manager = kernel_manager
+        self.timeout = timeout
+        # Kernel path -> (kernel name, kernel id, culling timeout handle)
+        self._kernels = dict()
+        # Kernel paths being started
+        self._starting = set()
+        # Session id -> kernel path
+        self._sessions = dict()
+
+        self._start_kernel = kernel_manager.start_kernel
+        kernel_manager.start_kernel = self._adopting_start_kernel
+
+    async def _adopting_start_kernel(
+        self, kernel_id: Optional[str] = None, path: Optional[str] = None, **kwargs
+    ) -> str:
+        if kernel_id is None and path is not None:
+            kernel_id = self.adopt(path, kwargs.get("kernel_name"))
+        result = self._start_kernel(kernel_id=kernel_id, path=path, **kwargs)
+        if inspect.isawaitable(result):
+            result = await result
+        return result
+
+    async def spawn(self, session: str, path: str, kernel_name: str) -> NoReturn:
+        """Start a kernel for a project session.
+
+        Nothing is started if a kernel is already waiting in the same path.
+
+        Args:
+            session (str): Project session id
+            path (str): Kernel working directory; API path
+            kernel_name (str): Kernel name
+        """
+        path = path.strip("/")
+        previous = self._sessions.get(session)
+        self._sessions[session] = path
+        if previous is not None and previous != path:
+            self._release(previous)
+
+        if path in self._kernels or path in self._starting:
+            return
+
+        self._starting.add(path)
+        try:
+            kernel_id = self._start_kernel(path=path, kernel_name=kernel_name)
+            if inspect.isawaitable(kernel_id):
+                kernel_id = await kernel_id
+        except Exception as error:
+            logger.warning(f"Fail to prespawn a {kernel_name} kernel in '{path}': {error!s}")
+            return
+        finally:
+            self._starting.discard(path)
+
+        loop = tornado.ioloop.IOLoop.current()
+        handle = loop.call_later(
+            self.timeout, lambda: loop.spawn_callback(self.cull, path, kernel_id)
+        )
+        self._kernels[path] = (kernel_name, kernel_id, handle)
+        logger.debug(f"Kernel {kernel_id} prespawned in '{path}'.")
+
+    def adopt(self, path: str, kernel_name: Optional[str] = None) -> Optional[str]:
+        """Take the kernel waiting in a path.
+
+        Args:
+            path (str): Kernel working directory; API path
+            kernel_name (str): Requested kernel name; None for any
+
+        Returns:
+            Optional[str]: Kernel id; None if no kernel matches
+        """
+        path = path.strip("/")
+        entry = self._kernels.get(path)
+        if entry is None:
+            return None
+        name, kernel_id, handle = entry
+        if kernel_name is not None and kernel_name != name:
+            return None
+
+        del self._kernels[path]
+        tornado.ioloop.IOLoop.current().remove_timeout(handle)
+        if kernel_id not in self.kernel_manager:
+            return None  # The kernel died in between
+        logger.debug(f"Prespawned kernel {kernel_id} adopted in '{path}'.")
+        return kernel_id
+
+    async def cull(self, path: str, kernel_id: Optional[str] = None) -> NoReturn:
+        """Shut down the kernel waiting in a path.
+
+        Args:
+            path (str): Kernel working directory; API path
+            kernel_id (str): Only shut down this kernel; None for any
+        """
+        entry = self._kernels.get(path)
+        if entry is None or (kernel_id is not None and entry[1] != kernel_id):
+            return
+
+        del self._kernels[path]
+        _, kernel_id, handle = entry
+        tornado.ioloop.IOLoop.current().remove_timeout(handle)
+        if kernel_id in self.kernel_manager:
+            logger.debug(f"Shutting down unused prespawned kernel {kernel_id}.")
+            result = self.kernel_manager.shutdown_kernel(kernel_id)
+            if inspect.isawaitable(result):
+                await result
+
+    def close(self, session: str) -> NoReturn:
+        """Release the kernel prespawned for a project session.
+
+        Args:
+            session (str): Project session id
+        """
+        path = self._sessions.pop(session, None)
+        if path is not None:
+            self._release(path)
+
+    def _release(self, path: str) -> NoReturn:
+        # Keep the kernel if another session opened the same project
+        if path not in self._sessions.values():
+            tornado.ioloop.IOLoop.current().spawn_callback(self.cull, path)
+
+
+def kernelspecs_transform(
+    kernel_filter: KernelFilter, url: str
+) -> Type[OutputTransform]:
+    """Build the transform filtering the kernel specs listing for each session.
+
+    The transform also records the project session of every request; the
+    kernel starts are checked against it (see :py:meth:`KernelFilter.guard`).
+
+    Args:
+        kernel_filter (KernelFilter): Allowed kernels per session
+        url (str): Kernel specs listing URL path
+
+    Returns:
+        Type[OutputTransform]: Tornado output transform class
+    """
+
+    class KernelSpecsTransform(OutputTransform):
+        def __init__(self, request: HTTPServerRequest):
+            self.kernels = None
+            self.if_none_match = None
+            session = get_session_id(request)
+            _request_session.set(session)
+            kernel_filter.touch(session)
+            if request.method == "GET" and request.path.rstrip("/") == url:
+                self.kernels = kernel_filter.get_session(session)
+                if self.kernels is not None:
+                    # The server checks the Etag of the unfiltered listing
+                    self.if_none_match = request.headers.pop("If-None-Match", None)
+
+        def transform_first_chunk(
+            self, status_code: int, headers: HTTPHeaders, chunk: bytes, finishing: bool
+        ) -> Tuple[int, HTTPHeaders, bytes]:
+            if self.kernels is None or status_code != 200 or not finishing:
+                return status_code, headers, chunk
+
+            try:
+                model = json.loads(chunk)
+            except ValueError:
+                logger.debug("Unable to filter the kernel specs listing.")
+                return status_code, headers, chunk
+
+            chunk = json.dumps(kernel_filter.filter_specs(model, self.kernels)).encode(
+                "utf-8"
+            )
+            # Same Etag as the server computes on the unfiltered listing
+            etag = '"{}"'.format(hashlib.sha1(chunk).hexdigest())
+            headers["Etag"] = etag
+            if self.if_none_match is not None and etag in (
+                tag.strip()[2:] if tag.strip().startswith("W/") else tag.strip()
+                for tag in self.if_none_match.split(",")
+            ):
+                headers.pop("Content-Type", None)
+                headers.pop("Content-Length", None)
+                return 304, headers, b""
+            if "Content-Length" in headers:
+                headers["Content-Length"] = str(len(chunk))
+            return status_code, headers, chunk
+
+    return KernelSpecsTransform
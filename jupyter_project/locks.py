@@ -0,0 +1,70 @@
+import asyncio
+import os
+import pathlib
+from typing import Union
+
+
+class PathLocks:
+    """Registry of asyncio locks keyed by path.
+
+    Requests on the same path are serialized while requests on different
+    paths run in parallel. A lock is dropped from the registry as soon as
+    nobody holds or waits for it.
+
+    Example:
+        async with locks.lock(path):
+            ...
+    """
+
+    def __init__(self):
+        # Normalized path -> [lock, number of users]
+        self._locks = dict()
+
+    def __len__(self) -> int:
+        return len(self._locks)
+
+    def lock(self, path: Union[str, pathlib.Path]) -> "_PathLock":
+        """Get the lock context manager for a path.
+
+        Args:
+            path (str or pathlib.Path): Path to lock
+
+        Returns:
+            Asynchronous context manager holding the path lock
+        """
+        return _PathLock(self, os.path.normcase(os.path.abspath(str(path))))
+
+    def _acquire_entry(self, key: str) -> asyncio.Lock:
+        entry = self._locks.get(key)
+        if entry is None:
+            entry = self._locks[key] = [asyncio.Lock(), 0]
+        entry[1] += 1
+        return entry[0]
+
+    def _release_entry(self, key: str):
+        entry = self._locks[key]
+        entry[1] -= 1
+        if entry[1] == 0:
+            del self._locks[key]
+
+
+class _PathLock:
+    """Asynchronous context manager holding a path lock."""
+
+    def __init__(self, registry: PathLocks, key: str):
+        self._registry = registry
+        self._key = key
+        self._lock = None
+
+    async def __aenter__(self):
+        self._lock = self._registry._acquire_entry(self._key)
+        try:
+            await self._lock.acquire()
+        except BaseException:
+            self._registry._release_entry(self._key)
+            raise
+        return self
+
+    async def __aexit__(self, exc_type, exc_value, traceback):
+        self._lock.release()
+        self._registry._release_entry(self._key)
@@ -0,0 +1,279 @@
+"""
+Hash manifest of the files rendered from the project template.
+
+The manifest is written in the project at creation. It stores the template
+parameters and the hash of each rendered file; that is the common ancestor
+used to update a project from a newer template revision by a three-way
+comparison. Only the files changed by the template are read and replaced.
+
+The files copied without rendering (see :py:mod:`jupyter_project.fastcopy`)
+are not read; they are identified by their size and modification time, the
+copies keeping the template file modification time.
+"""
+import concurrent.futures
+import hashlib
+import json
+import os
+import pathlib
+import stat
+import tempfile
+from typing import Any, Dict, Iterable, List, NoReturn, Optional
+
+# Name of the manifest file in the project folder
+MANIFEST_FILENAME = ".jupyter-project-manifest.json"
+# Manifest format version
+MANIFEST_VERSION = 1
+# Size in bytes of the chunks read to hash a file
+CHUNK_SIZE = 1024 * 1024
+# Prefix of the signature of the files identified by their status
+STAT_PREFIX = "stat:"
+
+
+def hash_file(path: pathlib.Path) -> Optional[str]:
+    """Hash the content of a file; symbolic links are hashed from their target.
+
+    Args:
+        path (pathlib.Path): File path
+
+    Returns:
+        Optional[str]: SHA-256 hex digest; None if the file does not exist
+    """
+    digest = hashlib.sha256()
+    try:
+        if stat.S_ISLNK(path.lstat().st_mode):
+            digest.update(b"link:" + os.fsencode(os.readlink(path)))
+        else:
+            digest.update(b"file:")
+            with path.open("rb") as f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    digest.update(chunk)
+    except (FileNotFoundError, NotADirectoryError, IsADirectoryError):
+        return None
+    return digest.hexdigest()
+
+
+def stat_file(path: pathlib.Path) -> Optional[str]:
+    """Sign a file from its size and modification time; its content is not read.
+
+    Args:
+        path (pathlib.Path): File path
+
+    Returns:
+        Optional[str]: Signature; None if the file does not exist
+    """
+    try:
+        status = path.lstat()
+    except (FileNotFoundError, NotADirectoryError):
+        return None
+    return f"{STAT_PREFIX}{status.st_size:x}-{status.st_mtime_ns:x}"
+
+
+def hash_files(
+    root: pathlib.Path,
+    names: Iterable[str],
+    max_workers: Optional[int] = None,
+    copied: Iterable[str] = (),
+) -> Dict[str, Optional[str]]:
+    """Hash files in parallel.
+
+    Args:
+        root (pathlib.Path): Root folder
+        names (Iterable[str]): POSIX paths relative to root
+        max_workers (int): Maximal number of files hashed concurrently [optional]
+        copied (Iterable[str]): Paths signed with :py:func:`stat_file` rather than hashed [optional]
+
+    Returns:
+        Dict[str, Optional[str]]: Path -> hash or None if the file does not exist
+    """
+    names = list(names)
+    copied = set(copied)
+
+    def sign(name: str) -> Optional[str]:
+        return (stat_file if name in copied else hash_file)(root / name)
+
+    with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+        return dict(zip(names, executor.map(sign, names)))
+
+
+def list_files(root: pathlib.Path, exclude: Iterable[str] = ()) -> List[str]:
+    """List recursively the files of a folder; symbolic links are not followed.
+
+    Args:
+        root (pathlib.Path): Folder
+        exclude (Iterable[str]): Relative POSIX paths to skip
+
+    Returns:
+        List[str]: Sorted POSIX paths relative to root
+    """
+    exclude = set(exclude)
+    names = list()
+    for dirpath, dirnames, filenames in os.walk(str(root)):
+        relative = pathlib.PurePath(dirpath).relative_to(root)
+        # Symbolic links to folders are listed in dirnames but not walked
+        for name in filenames + [
+            d for d in dirnames if os.path.islink(os.path.join(dirpath, d))
+        ]:
+            posix = (relative / name).as_posix()
+            if posix not in exclude:
+                names.append(posix)
+    return sorted(names)
+
+
+def build_manifest(
+    root: pathlib.Path,
+    params: Dict[str, Any],
+    exclude: Iterable[str] = (),
+    copied: Iterable[str] = (),
+) -> Dict[str, Any]:
+    """Build the manifest of a rendered project.
+
+    Args:
+        root (pathlib.Path): Rendered project folder
+        params (Dict): Template parameters
+        exclude (Iterable[str]): Relative POSIX paths not managed by the template
+        copied (Iterable[str]): Relative POSIX paths copied without rendering [optional]
+
+    Returns:
+        Dict: {version, params, files: {path: hash}}
+    """
+    exclude = {MANIFEST_FILENAME, *exclude}
+    hashes = hash_files(root, list_files(root, exclude), copied=copied)
+    return {
+        "version": MANIFEST_VERSION,
+        "params": params,
+        "files": {name: h for name, h in hashes.items() if h is not None},
+    }
+
+
+def read_manifest(root: pathlib.Path) -> Dict[str, Any]:
+    """Read the manifest of a project.
+
+    Args:
+        root (pathlib.Path): Project folder
+
+    Returns:
+        Dict: Manifest
+
+    Raises:
+        ValueError: if the manifest does not exist or is invalid
+    """
+    try:
+        manifest = json.loads((root / MANIFEST_FILENAME).read_text())
+    except FileNotFoundError:
+        raise ValueError("Project has no template manifest.")
+    except json.JSONDecodeError as error:
+        raise ValueError(f"Invalid template manifest: {error!s}")
+    if (
+        not isinstance(manifest, dict)
+        or manifest.get("version") != MANIFEST_VERSION
+        or not isinstance(manifest.get("params"), dict)
+        or not isinstance(manifest.get("files"), dict)
+    ):
+        raise ValueError("Invalid template manifest.")
+    return manifest
+
+
+def write_manifest(root: pathlib.Path, manifest: Dict[str, Any]) -> NoReturn:
+    """Write atomically the manifest of a project.
+
+    Args:
+        root (pathlib.Path): Project folder
+        manifest (Dict): Manifest
+    """
+    fd, tmp_name = tempfile.mkstemp(
+        dir=str(root), prefix=MANIFEST_FILENAME, suffix=".tmp"
+    )
+    try:
+        with os.fdopen(fd, "w") as tmp_file:
+            json.dump(manifest, tmp_file, indent=1, sort_keys=True)
+        os.replace(tmp_name, root / MANIFEST_FILENAME)
+    except BaseException:
+        os.unlink(tmp_name)
+        raise
+
+
+def _remove_empty_parents(root: pathlib.Path, path: pathlib.Path) -> NoReturn:
+    parent = path.parent
+    while parent != root:
+        try:
+            parent.rmdir()
+        except OSError:
+            break  # Not empty
+        parent = parent.parent
+
+
+def apply_update(
+    root: pathlib.Path,
+    staging: pathlib.Path,
+    manifest: Dict[str, Any],
+    exclude: Iterable[str] = (),
+    copied: Iterable[str] = (),
+) -> Dict[str, List[str]]:
+    """Apply the changes between two template renders to a project.
+
+    For each file, the original render (the manifest hash) is compared to the
+    new render in staging and to the project file:
+
+    - unchanged by the template: the project file is not read.
+    - changed by the template and not modified in the project: the file is
+      moved from staging into the project (or removed).
+    - changed by the template and in the project: the project file is kept
+      and reported as conflict; its manifest hash is not updated so it is
+      reported again by the next update.
+
+    The manifest is updated in place.
+
+    Args:
+        root (pathlib.Path): Project folder
+        staging (pathlib.Path): Folder of the new render; its files are moved
+        manifest (Dict): Project manifest with the hashes of the original render
+        exclude (Iterable[str]): Relative POSIX paths not managed by the template
+        copied (Iterable[str]): Relative POSIX paths copied without rendering in staging [optional]
+
+    Returns:
+        Dict[str, List[str]]: {added, updated, removed, conflicts} paths
+    """
+    base = manifest["files"]
+    new = build_manifest(staging, manifest["params"], exclude, copied)["files"]
+
+    changed = sorted(
+        name for name in set(base) | set(new) if base.get(name) != new.get(name)
+    )
+    # The project file is signed as in the original render
+    current = hash_files(
+        root,
+        changed,
+        copied=(
+            name
+            for name in changed
+            if (base.get(name) or new[name]).startswith(STAT_PREFIX)
+        ),
+    )
+
+    files = dict(base)
+    summary = {"added": [], "updated": [], "removed": [], "conflicts": []}
+    for name in changed:
+        ours, theirs = current[name], new.get(name)
+        if ours == theirs:
+            pass  # Already up to date
+        elif ours != base.get(name):
+            summary["conflicts"].append(name)
+            continue
+        elif theirs is None:
+            target = root / name
+            target.unlink()
+            _remove_empty_parents(root, target)
+            summary["removed"].append(name)
+        else:
+            target = root / name
+            target.parent.mkdir(parents=True, exist_ok=True)
+            os.replace(staging / name, target)
+            summary["added" if ours is None else "updated"].append(name)
+
+        if theirs is None:
+            files.pop(name, None)
+        else:
+            files[name] = theirs
+
+    manifest["files"] = files
+    return summary
@@ -0,0 +1,55 @@
+"""
+JSON merge patch helpers (RFC 7386).
+
+A merge patch is a JSON object mirroring the target document: a key with
+a null value is removed, an object value is merged recursively and any
+other value replaces the target value.
+"""
+from typing import Any, Dict
+
+
+def merge_diff(source: Dict[str, Any], target: Dict[str, Any]) -> Dict[str, Any]:
+    """Compute the merge patch transforming source into target.
+
+    Args:
+        source (Dict): Original object
+        target (Dict): Modified object
+
+    Returns:
+        Dict: Merge patch; empty if both objects are equal
+    """
+    patch = dict()
+    for key in source:
+        if key not in target:
+            patch[key] = None
+    for key, value in target.items():
+        old_value = source.get(key)
+        if isinstance(value, dict) and isinstance(old_value, dict):
+            sub_patch = merge_diff(old_value, value)
+            if len(sub_patch) > 0:
+                patch[key] = sub_patch
+        elif key not in source or old_value != value:
+            patch[key] = value
+    return patch
+
+
+def merge_patch(target: Any, patch: Any) -> Any:
+    """Apply a merge patch to a JSON value.
+
+    Args:
+        target (Any): Original value; it is not modified
+        patch (Any): Merge patch
+
+    Returns:
+        Any: Patched value
+    """
+    if not isinstance(patch, dict):
+        return patch
+
+    result = dict(target) if isinstance(target, dict) else dict()
+    for key, value in patch.items():
+        if value is None:
+            result.pop(key, None)
+        else:
+            result[key] = merge_patch(result.get(key), value)
+    return result
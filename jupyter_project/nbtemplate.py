@@ -0,0 +1,212 @@
+"""
+Notebook file templates rendering only the cells containing Jinja2 syntax.
+
+The notebook is parsed once when the template is loaded. The source of the
+cells containing Jinja2 syntax is compiled as a template of its own; the other
+cells are serialized once. A notebook is then produced by rendering the
+dynamic cells and joining them with the cached static cells text. So the
+outputs embedded in the notebook are never tokenized by Jinja2 and the
+rendered values are JSON-escaped, which keeps the notebook valid.
+"""
+import asyncio
+import json
+import sys
+import textwrap
+from typing import Any, Callable, Dict, List, Optional, Union
+
+from jinja2 import Environment, Template
+
+# Placeholder of the cells in the serialized notebook
+_CELLS_PLACEHOLDER = '"cells": []'
+# Templates cache key prefix of the notebook templates
+_CACHE_KEY = "notebook"
+
+
+def _dumps(value: Any) -> str:
+    # Same layout as nbformat
+    return json.dumps(value, indent=1, sort_keys=True, ensure_ascii=False)
+
+
+def _join_source(source: Union[str, List[str]]) -> str:
+    return source if isinstance(source, str) else "".join(source)
+
+
+class NotebookTemplate:
+    """Notebook template rendering only its cells containing Jinja2 syntax.
+
+    It provides the part of the ``jinja2.Template`` interface used by the file
+    templates handler (``name``, ``environment``, ``render`` and
+    ``render_async``).
+    """
+
+    def __init__(
+        self,
+        environment: Environment,
+        name: str,
+        source: str,
+        uptodate: Optional[Callable[[], bool]] = None,
+    ):
+        """Parse and compile a notebook template.
+
+        Args:
+            environment (jinja2.Environment): Jinja environment compiling the cells
+            name (str): Template name
+            source (str): Notebook template content
+            uptodate (Callable[[], bool]): Whether the template source is unchanged; as returned by the loader [optional]
+
+        Raises:
+            ValueError: if the source is not a notebook
+            jinja2.TemplateSyntaxError: if a cell is not a valid template
+        """
+        self.environment = environment
+        self.name = name
+        self._uptodate = uptodate
+
+        notebook = json.loads(source)
+        if not isinstance(notebook, dict) or not isinstance(
+            notebook.get("cells"), list
+        ):
+            raise ValueError(f"Template '{name}' is not a notebook.")
+
+        header, _, footer = _dumps({**notebook, "cells": []}).partition(
+            _CELLS_PLACEHOLDER
+        )
+        self._header = header + '"cells": [\n'
+        self._footer = "\n ]" + footer + "\n"
+        # Static cell text or (cell without source, compiled source)
+        self._cells = list()
+        for cell in notebook["cells"]:
+            cell_source = _join_source(cell.get("source", ""))
+            if self._has_syntax(cell_source):
+                template = environment.from_string(cell_source)
+                self._cells.append(({**cell, "source": []}, template))
+            else:
+                self._cells.append(self._serialize(cell))
+
+    @property
+    def dynamic_cells(self) -> int:
+        """int: Number of cells rendered by Jinja2"""
+        return sum(1 for cell in self._cells if not isinstance(cell, str))
+
+    @property
+    def templates(self) -> List[Template]:
+        """List[jinja2.Template]: Compiled templates of the dynamic cells"""
+        return [cell[1] for cell in self._cells if not isinstance(cell, str)]
+
+    @property
+    def static_size(self) -> int:
+        """int: Approximate memory used by the serialized static text in bytes"""
+        return sum(
+            sys.getsizeof(text)
+            for text in (self._header, self._footer, *self._cells)
+            if isinstance(text, str)
+        )
+
+    @property
+    def is_up_to_date(self) -> bool:
+        """bool: Whether the template source is unchanged (as jinja2.Template)"""
+        return self._uptodate is None or self._uptodate()
+
+    def _has_syntax(self, source: str) -> bool:
+        env = self.environment
+        markers = (
+            env.block_start_string,
+            env.variable_start_string,
+            env.comment_start_string,
+            env.line_statement_prefix,
+            env.line_comment_prefix,
+        )
+        return any(marker and marker in source for marker in markers)
+
+    @staticmethod
+    def _serialize(cell: Dict) -> str:
+        return textwrap.indent(_dumps(cell), "  ")
+
+    def _assemble(self, rendered: List[Optional[str]]) -> str:
+        """Assemble the notebook from the static cells and the rendered sources.
+
+        Args:
+            rendered (List[Optional[str]]): Rendered source per cell; None for the static cells
+
+        Returns:
+            str: Notebook content
+        """
+        cells = list()
+        for cell, source in zip(self._cells, rendered):
+            if source is None:
+                cells.append(cell)
+            else:
+                skeleton, _ = cell
+                lines = source.splitlines(keepends=True)
+                cells.append(self._serialize({**skeleton, "source": lines}))
+        return self._header + ",\n".join(cells) + self._footer
+
+    def render(self, *args, **kwargs) -> str:
+        """Render the notebook.
+
+        Args:
+            args: Template context positional arguments
+            kwargs: Template context keyword arguments
+
+        Returns:
+            str: Notebook content
+        """
+        context = dict(*args, **kwargs)
+        return self._assemble(
+            [
+                None if isinstance(cell, str) else cell[1].render(context)
+                for cell in self._cells
+            ]
+        )
+
+    async def render_async(self, *args, **kwargs) -> str:
+        """Render the notebook with an asynchronous environment.
+
+        Args:
+            args: Template context positional arguments
+            kwargs: Template context keyword arguments
+
+        Returns:
+            str: Notebook content
+        """
+        context = dict(*args, **kwargs)
+
+        async def render_cell(cell) -> Optional[str]:
+            if isinstance(cell, str):
+                return None
+            return await cell[1].render_async(context)
+
+        rendered = await asyncio.gather(*(render_cell(cell) for cell in self._cells))
+        return self._assemble(rendered)
+
+
+def load_notebook_template(environment: Environment, name: str) -> NotebookTemplate:
+    """Load a notebook template from the environment loader.
+
+    The template is stored in the environment templates cache, next to the
+    text templates, and reused until its source changes.
+
+    Args:
+        environment (jinja2.Environment): Jinja environment
+        name (str): Template name
+
+    Returns:
+        NotebookTemplate: Compiled notebook template
+
+    Raises:
+        jinja2.TemplateNotFound: if the template does not exist
+        ValueError: if the template is not a notebook
+        jinja2.TemplateSyntaxError: if a cell is not a valid template
+    """
+    cache = environment.cache
+    key = (_CACHE_KEY, name)
+    if cache is not None:
+        template = cache.get(key)
+        if template is not None and template.is_up_to_date:
+            return template
+
+    source, _, uptodate = environment.loader.get_source(environment, name)
+    template = NotebookTemplate(environment, name, source, uptodate)
+    if cache is not None:
+        cache[key] = template
+    return template
@@ -1,27 +1,84 @@
 import importlib
 import json
 import logging
+import os
 import pathlib
-from typing import Any, Dict, NoReturn, Tuple
+import shutil
+import stat
+import tempfile
+from typing import Any, Dict, Iterable, NoReturn, Optional, Tuple
 
 from jinja2 import (
     Template,
     TemplateError,
 )
 import jsonschema
+from cookiecutter.config import get_user_config
 from cookiecutter.main import cookiecutter
-from traitlets import Bool, HasTraits, TraitError, TraitType, Unicode, validate
+from cookiecutter.repository import determine_repo_dir
+from traitlets import (
+    Bool,
+    Enum,
+    HasTraits,
+    Integer,
+    List,
+    TraitError,
+    TraitType,
+    Unicode,
+    validate,
+)
 from traitlets.utils.bunch import Bunch
 
+from .archive import extract_archive, is_archive
+from .fastcopy import COPY_MODES, clone_tree, static_files_copy
 from .jinja2 import jinja2_extensions
+from .manifest import (
+    MANIFEST_FILENAME,
+    apply_update,
+    build_manifest,
+    read_manifest,
+    write_manifest,
+)
+from .mergepatch import merge_patch
+from .tracing import span, trace_cookiecutter
 from .traits import JSONSchema, Path
 
 logger = logging.getLogger(__name__)
 
+# Prefix of the staging folders of the projects duplication
+CLONE_STAGING_PREFIX = ".jupyter-project-clone-"
+# Prefix of the staging folders of the projects update
+UPDATE_STAGING_PREFIX = ".jupyter-project-update-"
+
+
+def _dump_configuration(configuration: Dict) -> str:
+    """Serialize a project configuration; same format whatever the writer."""
+    return json.dumps(configuration)
+
+
+def _relative_copies(copied: Iterable[str], root: pathlib.Path) -> Tuple[str, ...]:
+    """Get the files copied without rendering in a project folder.
+
+    Args:
+        copied (Iterable[str]): Absolute paths of the copied files
+        root (pathlib.Path): Project folder
+
+    Returns:
+        Tuple[str, ...]: POSIX paths relative to root
+    """
+    root = os.path.abspath(str(root))
+    return tuple(
+        pathlib.PurePath(os.path.relpath(path, root)).as_posix()
+        for path in copied
+        if os.path.commonpath((root, path)) == root
+    )
+
 
 class ProjectTemplate(HasTraits):
     """Jinja2 template project class."""
 
+    _configuration_validator = None
+
     configuration_filename = Unicode(
         default_value="jupyter-project.json",
         help="Name of the project configuration JSON file [optional]",
@@ -42,6 +99,12 @@ class ProjectTemplate(HasTraits):
         help="Type of conda environment or space separated list of conda packages (requires `jupyter_conda`) [optional]",
         config=True
     )
+    copy_mode = Enum(
+        COPY_MODES,
+        default_value="reflink",
+        help="How the files not rendered (binary files or matching '_copy_without_render') are created: 'copy', 'reflink' (copy-on-write clone if supported, else kernel-side copy) or 'hardlink' (as 'reflink' but trying a hard link before copying; the project file then shares its content with the template file) [optional]",
+        config=True,
+    )
     default_path = Path(
         help="Default file or folder to open; relative to the project root [optional]",
         config=True,
@@ -51,6 +114,17 @@ class ProjectTemplate(HasTraits):
         help="Should the project be installed in pip editable mode in the conda environment?",
         config=True,
     )
+    export_ignore = List(
+        trait=Unicode(),
+        default_value=[
+            ".git",
+            ".ipynb_checkpoints",
+            "__pycache__",
+            MANIFEST_FILENAME,
+        ],
+        help="Glob patterns of the files and folders excluded from the project exports; matched against their name and their path relative to the project [optional]",
+        config=True,
+    )
     filter_kernel = Bool(
         default_value=True,
         help="Should the kernel be filtered to match only the conda environment?",
@@ -61,9 +135,20 @@ class ProjectTemplate(HasTraits):
         help="Project name (support Jinja2 templating using the schema parameters) [optional]",
         config=True,
     )
+    git_init = Bool(
+        default_value=False,
+        help="Initialize the new projects as git repository with an initial commit of all files on the server rather than from the frontend [optional]",
+        config=True,
+    )
     module = Unicode(
         help="Python package containing the template [optional]", config=True,
     )
+    render_size_limit = Integer(
+        default_value=0,
+        min=0,
+        help="Files bigger than this size (in bytes) are copied without rendering; 0 to disable [optional]",
+        config=True,
+    )
     schema = JSONSchema(
         default_value={
             "type": "object",
@@ -76,7 +161,12 @@ class ProjectTemplate(HasTraits):
     template = Unicode(
         default_value=None,
         allow_none=True,
-        help="Cookiecutter template source",
+        help="Cookiecutter template source (may be a local zip or tar archive)",
+        config=True,
+    )
+    with_git = Bool(
+        default_value=True,
+        help="Should the projects be connected to the git extension (`@jupyterlab/git`) in the frontend? [optional]",
         config=True,
     )
 
@@ -96,13 +186,18 @@ class ProjectTemplate(HasTraits):
         for attr in (
             "configuration_filename",
             "configuration_schema",
+            "copy_mode",
             "default_path",
             "editable_install",
+            "export_ignore",
             "filter_kernel",
             "folder_name",
+            "git_init",
             "module",
+            "render_size_limit",
             "schema",
             "template",
+            "with_git",
         ):
             if getattr(self, attr) != getattr(other, attr):
                 return False
@@ -122,6 +217,108 @@ class ProjectTemplate(HasTraits):
             raise TraitError("'template' cannot be empty.")
         return value
 
+    @staticmethod
+    def _extract_template(archive: pathlib.Path) -> pathlib.Path:
+        """Extract a cookiecutter template archive in the cookiecutter cache folder.
+
+        The archive is extracted only once per version.
+
+        Args:
+            archive (pathlib.Path): Template archive
+
+        Returns:
+            pathlib.Path: Folder containing the cookiecutter template
+        """
+        cache_dir = pathlib.Path(get_user_config()["cookiecutters_dir"])
+        folder = extract_archive(archive, cache_dir)
+        if not (folder / "cookiecutter.json").exists():
+            # Archive containing a single root folder
+            children = list(folder.iterdir())
+            if len(children) == 1 and children[0].is_dir():
+                folder = children[0]
+        return folder
+
+    def _resolve_template(self) -> str:
+        """Resolve the cookiecutter template source.
+
+        Templates within a module are resolved relatively to it and archives
+        are extracted.
+
+        Returns:
+            str: Cookiecutter template source
+        """
+        if len(self.module):
+            module = importlib.import_module(self.module)
+            template = str(pathlib.Path(module.__path__[0]) / self.template)
+        else:
+            template = self.template
+
+        if is_archive(pathlib.Path(template)):
+            template = str(self._extract_template(pathlib.Path(template)))
+        return template
+
+    def clone(
+        self,
+        source: pathlib.Path,
+        destination: pathlib.Path,
+        changes: Optional[Dict] = None,
+    ) -> Dict:
+        """Duplicate a project.
+
+        The files are cloned following 'copy_mode' in a staging folder next to
+        the destination. The configuration ``name`` is set from the destination
+        folder name, as the template parameter ``name`` stored in the manifest
+        so the clone is updated with its own name. Then the folder is moved to
+        the destination.
+
+        Args:
+            source (pathlib.Path): Source project folder
+            destination (pathlib.Path): New project folder
+            changes (Dict): Other changes of the configuration as JSON merge patch [optional]
+
+        Returns:
+            dict: New project configuration
+
+        Raises:
+            ValueError: if the source project configuration file does not exists
+            jsonschema.ValidationError: if the new configuration is invalid
+            FileExistsError: if the destination exists
+        """
+        configuration = self.get_configuration(source)
+
+        destination.parent.mkdir(parents=True, exist_ok=True)
+        staging = pathlib.Path(
+            tempfile.mkdtemp(prefix=CLONE_STAGING_PREFIX, dir=str(destination.parent))
+        )
+        try:
+            root = staging / destination.name
+            with span("project.copy"):
+                clone_tree(str(source), str(root), self.copy_mode)
+
+            if len(self.configuration_filename) > 0:
+                with span("configuration.write"):
+                    patch = {"name": destination.name.replace("_", " ").capitalize()}
+                    patch.update(changes or dict())
+                    configuration = self.update_configuration(root, patch)
+
+            with span("manifest.write"):
+                try:
+                    manifest = read_manifest(root)
+                except ValueError:
+                    pass  # Not created from the template
+                else:
+                    if "name" in manifest["params"]:
+                        manifest["params"]["name"] = destination.name
+                        write_manifest(root, manifest)
+
+            if destination.exists():
+                raise FileExistsError(f"{destination!s} already exists.")
+            root.rename(destination)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        return configuration
+
     def get_configuration(self, path: pathlib.Path) -> Dict:
         """Get and validate the project configuration in path.
         
@@ -141,11 +338,146 @@ class ProjectTemplate(HasTraits):
         if not configuration_file.exists():
             raise ValueError("Configuration file does not exists.")
         configuration = json.loads(configuration_file.read_text())
-        if len(self.configuration_schema) > 0:
-            jsonschema.validate(configuration, self.configuration_schema)
+        self._validate_configuration(configuration)
 
         return configuration
 
+    def get_configuration_etag(self, path: pathlib.Path) -> Optional[str]:
+        """Get the entity tag of the project configuration file in path.
+
+        The tag is built from the file inode, size and modification time; so
+        the file is not read.
+
+        Args:
+            path (pathlib.Path): Project folder
+
+        Returns:
+            Optional[str]: Quoted entity tag or None if the configuration file does not exist
+        """
+        if len(self.configuration_filename) == 0:
+            return None
+
+        try:
+            stat = (path / self.configuration_filename).stat()
+        except OSError:
+            return None
+        return f'"{stat.st_ino:x}-{stat.st_size:x}-{stat.st_mtime_ns:x}"'
+
+    def update_configuration(self, path: pathlib.Path, patch: Dict) -> Dict:
+        """Apply a JSON merge patch to the project configuration in path.
+
+        The patched configuration is validated then written atomically; the
+        file permissions are kept.
+
+        Args:
+            path (pathlib.Path): Project folder
+            patch (Dict): JSON merge patch (RFC 7386)
+
+        Returns:
+            dict: Updated project configuration
+
+        Raises:
+            ValueError: if the project configuration file does not exists
+            jsonschema.ValidationError: if the patched configuration is invalid
+        """
+        if len(self.configuration_filename) == 0 or self.template is None:
+            raise ValueError("Project has no configuration file.")
+
+        configuration_file = path / self.configuration_filename
+        if not configuration_file.exists():
+            raise ValueError("Configuration file does not exists.")
+        configuration = json.loads(configuration_file.read_text())
+        updated = merge_patch(configuration, patch)
+        if updated == configuration:
+            return configuration
+
+        self._validate_configuration(updated)
+
+        mode = stat.S_IMODE(configuration_file.stat().st_mode)
+        fd, tmp_name = tempfile.mkstemp(
+            dir=str(path), prefix=f".{self.configuration_filename}", suffix=".tmp"
+        )
+        try:
+            with os.fdopen(fd, "w") as tmp_file:
+                tmp_file.write(_dump_configuration(updated))
+            # mkstemp creates the file readable by its owner only
+            os.chmod(tmp_name, mode)
+            os.replace(tmp_name, configuration_file)
+        except BaseException:
+            os.unlink(tmp_name)
+            raise
+
+        return updated
+
+    def _validate_configuration(self, configuration: Dict) -> NoReturn:
+        """Validate a project configuration against the configuration schema.
+
+        The schema validator is created once per schema.
+
+        Args:
+            configuration (Dict): Project configuration
+
+        Raises:
+            jsonschema.ValidationError: if the configuration is invalid
+        """
+        schema = self.configuration_schema
+        if len(schema) == 0:
+            return
+
+        validator = self._configuration_validator
+        if validator is None or validator.schema is not schema:
+            validator_class = jsonschema.validators.validator_for(schema)
+            validator = self._configuration_validator = validator_class(schema)
+        error = jsonschema.exceptions.best_match(validator.iter_errors(configuration))
+        if error is not None:
+            raise error
+
+    def get_folder_name(self, params: Dict) -> str:
+        """Render the project folder name.
+
+        Args:
+            params (Dict): Cookiecutter template parameters
+
+        Returns:
+            str: Project folder name
+
+        Raises:
+            ValueError: if the folder name cannot be rendered
+        """
+        try:
+            return self._folder_name.render(**params)
+        except TemplateError as error:
+            raise ValueError("Project 'folder_name' cannot be rendered.")
+
+    def prefetch(self) -> Optional[str]:
+        """Fetch or refresh the cookiecutter template in the cookiecutter cache.
+
+        Remote repositories are cloned again, archives are extracted and the
+        template folder is checked to contain a ``cookiecutter.json`` file.
+
+        Returns:
+            Optional[str]: Cookiecutter template source; None if no template is defined
+
+        Raises:
+            cookiecutter.exceptions.CookiecutterException: if the template cannot be fetched
+        """
+        if self.template is None:
+            return None
+
+        template = self._resolve_template()
+        user_config = get_user_config()
+        repo_dir, cleanup = determine_repo_dir(
+            template,
+            abbreviations=user_config["abbreviations"],
+            clone_to_dir=user_config["cookiecutters_dir"],
+            checkout=None,
+            no_input=True,
+        )
+        if cleanup:
+            # Remote zip archive: only the downloaded archive is kept in cache
+            shutil.rmtree(repo_dir, ignore_errors=True)
+        return template
+
     def render(self, params: Dict, path: pathlib.Path) -> Tuple[str, Dict]:
         """Render the cookiecutter template.
         
@@ -159,38 +491,111 @@ class ProjectTemplate(HasTraits):
         if self.template is None:
             return None, dict()
 
-        try:
-            folder_name = self._folder_name.render(**params)
-        except TemplateError as error:
-            raise ValueError("Project 'folder_name' cannot be rendered.")
+        folder_name = self.get_folder_name(params)
 
         project_name = folder_name.replace("_", " ").capitalize()
 
-        if len(self.module):
-            module = importlib.import_module(self.module)
-            template = str(pathlib.Path(module.__path__[0]) / self.template)
-        else:
-            template = self.template
+        with span("template.resolve") as current:
+            template = self._resolve_template()
+            current.set_attribute("template", template)
 
-        cookiecutter(
-            template, no_input=True, extra_context=params, output_dir=str(path),
-        )
+        with span("cookiecutter"), trace_cookiecutter(), static_files_copy(
+            self.copy_mode, self.render_size_limit
+        ) as copied:
+            cookiecutter(
+                template, no_input=True, extra_context=params, output_dir=str(path),
+            )
 
         content = {"name": project_name}
         if len(self.configuration_filename) > 0:
             configuration_file = path / folder_name / self.configuration_filename
-            if configuration_file.exists():
-                try:
-                    content = json.loads(configuration_file.read_text())
-                except json.JSONDecodeError as error:
-                    logger.debug(
-                        f"Unable to load configuration file {configuration_file!s}:\n{error!s}"
-                    )
-                else:
-                    content["name"] = project_name
-            configuration_file.parent.mkdir(parents=True, exist_ok=True)
-            configuration_file.write_text(json.dumps(content))
+            with span("configuration.write"):
+                if configuration_file.exists():
+                    try:
+                        content = json.loads(configuration_file.read_text())
+                    except json.JSONDecodeError as error:
+                        logger.debug(
+                            f"Unable to load configuration file {configuration_file!s}:\n{error!s}"
+                        )
+                    else:
+                        content["name"] = project_name
+                configuration_file.parent.mkdir(parents=True, exist_ok=True)
+                configuration_file.write_text(_dump_configuration(content))
+
+            with span("configuration.validate"):
+                content = self.get_configuration(configuration_file.parent)
 
-            content = self.get_configuration(configuration_file.parent)
+        project = path / folder_name
+        if project.is_dir():
+            with span("manifest.write"):
+                manifest = build_manifest(
+                    project,
+                    params,
+                    self._unmanaged_files(),
+                    _relative_copies(copied, project),
+                )
+                write_manifest(project, manifest)
 
         return folder_name, content
+
+    def _unmanaged_files(self) -> Tuple[str, ...]:
+        """Files of the rendered projects not updated from the template."""
+        if len(self.configuration_filename) > 0:
+            return (self.configuration_filename,)
+        return tuple()
+
+    def update(self, path: pathlib.Path) -> Dict:
+        """Update a project from the current template revision.
+
+        The template is rendered with the project parameters stored in its
+        manifest in a staging folder next to the project. Then the files
+        changed by the template since the project creation (or the previous
+        update) are moved into the project, unless they were modified in the
+        project; those are reported as conflicts and left untouched. The
+        project configuration file is never updated.
+
+        Args:
+            path (pathlib.Path): Project folder
+
+        Returns:
+            dict: {added, updated, removed, conflicts} paths relative to the project
+
+        Raises:
+            ValueError: if the project has no (valid) manifest
+        """
+        manifest = read_manifest(path)
+        params = manifest["params"]
+        folder_name = self.get_folder_name(params)
+
+        with span("template.resolve") as current:
+            template = self._resolve_template()
+            current.set_attribute("template", template)
+
+        staging = pathlib.Path(
+            tempfile.mkdtemp(prefix=UPDATE_STAGING_PREFIX, dir=str(path.parent))
+        )
+        try:
+            with span("cookiecutter"), trace_cookiecutter(), static_files_copy(
+                self.copy_mode, self.render_size_limit
+            ) as copied:
+                cookiecutter(
+                    template,
+                    no_input=True,
+                    extra_context=params,
+                    output_dir=str(staging),
+                )
+
+            with span("project.update"):
+                rendered = staging / folder_name
+                changes = apply_update(
+                    path,
+                    rendered,
+                    manifest,
+                    self._unmanaged_files(),
+                    _relative_copies(copied, rendered),
+                )
+                write_manifest(path, manifest)
+        finally:
+            shutil.rmtree(staging, ignore_errors=True)
+
+        return changes
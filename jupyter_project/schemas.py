@@ -0,0 +1,232 @@
+"""
+Bundle the template JSON schemas referencing local schema files.
+
+A ``$ref`` to a local file (relative path or ``file://`` URI, with an optional
+JSON pointer fragment) is replaced by a reference to an entry of the root
+schema ``definitions``. Only the referenced parts of the files are included.
+Each file is read once and each referenced part is rewritten once, whatever
+the number of schemas using it; so the bundled schemas share their
+definitions.
+"""
+import json
+import pathlib
+import re
+from typing import Any, Dict, NoReturn, Optional, Set, Tuple
+from urllib.parse import unquote, urldefrag, urlparse
+from urllib.request import url2pathname
+
+# Keywords whose value is data rather than a schema
+DATA_KEYWORDS = frozenset(("const", "default", "enum", "examples"))
+# Keywords whose value maps names to schemas
+SCHEMA_MAPS = frozenset(
+    ("$defs", "definitions", "dependencies", "patternProperties", "properties")
+)
+# Characters not allowed in a definition name
+FORBIDDEN_NAME_CHAR = re.compile(r"[^\w.-]")
+
+# (file path, JSON pointer)
+_Target = Tuple[pathlib.Path, str]
+
+
+def _resolve_pointer(document: Any, pointer: str) -> Any:
+    """Get the part of a document designated by a JSON pointer (RFC 6901).
+
+    Args:
+        document (Any): JSON document
+        pointer (str): URI fragment JSON pointer
+
+    Returns:
+        Any: Designated value
+
+    Raises:
+        ValueError: if the pointer cannot be resolved
+    """
+    pointer = unquote(pointer)
+    if len(pointer) == 0:
+        return document
+    if not pointer.startswith("/"):
+        raise ValueError(f"Invalid JSON pointer '{pointer}'.")
+
+    value = document
+    for token in pointer[1:].split("/"):
+        token = token.replace("~1", "/").replace("~0", "~")
+        try:
+            value = value[int(token) if isinstance(value, list) else token]
+        except (KeyError, IndexError, TypeError, ValueError):
+            raise ValueError(f"Unable to resolve JSON pointer '{pointer}'.")
+    return value
+
+
+class SchemaBundler:
+    """Resolve and bundle the local files referenced by JSON schemas."""
+
+    def __init__(self, base_dir: pathlib.Path):
+        """Initialize the bundler
+
+        Args:
+            base_dir (pathlib.Path): Folder in which the relative references of the root schemas are resolved
+        """
+        self.base_dir = pathlib.Path(base_dir)
+        # File path -> JSON document
+        self._documents = dict()
+        # Target -> definition name
+        self._names = dict()
+        # Definition names of the root schemas
+        self._reserved = set()
+        # Target -> (rewritten schema, referenced targets)
+        self._definitions = dict()
+        # Serialized root schema -> bundled schema
+        self._bundles = dict()
+
+    def _load(self, path: pathlib.Path) -> Any:
+        if path not in self._documents:
+            try:
+                self._documents[path] = json.loads(path.read_text())
+            except (OSError, ValueError) as error:
+                raise ValueError(f"Unable to load JSON schema {path!s}: {error!s}")
+        return self._documents[path]
+
+    def _target(self, ref: str, document: Optional[pathlib.Path]) -> Optional[_Target]:
+        """Get the file and JSON pointer referenced by a ``$ref``.
+
+        Args:
+            ref (str): Reference
+            document (Optional[pathlib.Path]): File containing the reference; None for a root schema
+
+        Returns:
+            Optional[_Target]: (file path, JSON pointer); None if the reference is not bundled
+        """
+        url, fragment = urldefrag(ref)
+        if len(url) == 0:
+            # Local references of a root schema are kept
+            return None if document is None else (document, fragment)
+
+        parsed = urlparse(url)
+        if parsed.scheme == "file":
+            path = pathlib.Path(url2pathname(parsed.path))
+        elif len(parsed.scheme) == 0:
+            base = self.base_dir if document is None else document.parent
+            path = base / url2pathname(parsed.path)
+        else:
+            return None  # Remote reference
+        return (path.resolve(), fragment)
+
+    def _name(self, target: _Target) -> str:
+        if target not in self._names:
+            path, pointer = target
+            name = FORBIDDEN_NAME_CHAR.sub(
+                "_", path.stem + unquote(pointer).replace("/", ".").rstrip(".")
+            )
+            taken = self._reserved.union(self._names.values())
+            unique, count = name, 1
+            while unique in taken:
+                count += 1
+                unique = f"{name}_{count}"
+            self._names[target] = unique
+        return self._names[target]
+
+    def _rewrite(
+        self,
+        node: Any,
+        document: Optional[pathlib.Path],
+        targets: Set[_Target],
+        is_map: bool = False,
+    ) -> Any:
+        """Copy a schema replacing the file references by definition references.
+
+        Args:
+            node (Any): Schema or part of it
+            document (Optional[pathlib.Path]): File containing the node; None for a root schema
+            targets (Set[_Target]): Referenced targets; updated in place
+            is_map (bool): Whether the node maps names to schemas
+
+        Returns:
+            Any: Rewritten copy
+        """
+        if isinstance(node, list):
+            return [self._rewrite(value, document, targets) for value in node]
+        if not isinstance(node, dict):
+            return node
+
+        rewritten = dict()
+        for key, value in node.items():
+            if not is_map and key in DATA_KEYWORDS:
+                rewritten[key] = value
+            else:
+                rewritten[key] = self._rewrite(
+                    value, document, targets, not is_map and key in SCHEMA_MAPS
+                )
+        if is_map:
+            return rewritten
+
+        ref = node.get("$ref")
+        if isinstance(ref, str):
+            target = self._target(ref, document)
+            if target is not None:
+                targets.add(target)
+                rewritten["$ref"] = f"#/definitions/{self._name(target)}"
+        return rewritten
+
+    def _resolve(self, target: _Target) -> NoReturn:
+        if target in self._definitions:
+            return
+        path, pointer = target
+        schema = _resolve_pointer(self._load(path), pointer)
+        targets = set()
+        rewritten = self._rewrite(schema, path, targets)
+        self._definitions[target] = (rewritten, targets)
+
+    def bundle(self, schema: Dict) -> Dict:
+        """Bundle a JSON schema with the local files it references.
+
+        Args:
+            schema (Dict): JSON schema
+
+        Returns:
+            Dict: Self-contained schema; the schema itself if it has no file reference
+
+        Raises:
+            ValueError: if a reference cannot be resolved
+        """
+        key = json.dumps(schema, sort_keys=True)
+        if key in self._bundles:
+            return self._bundles[key]
+
+        # The generated names must not replace the root schema definitions
+        root_names = {
+            name
+            for keyword in ("$defs", "definitions")
+            for name in schema.get(keyword, dict())
+        }
+        self._reserved.update(root_names)
+
+        targets = set()
+        bundled = self._rewrite(schema, None, targets)
+        if len(targets) == 0:
+            bundled = schema
+        else:
+            definitions = dict()
+            pending = list(targets)
+            while len(pending) > 0:
+                target = pending.pop()
+                name = self._name(target)
+                if name in definitions:
+                    continue
+                self._resolve(target)
+                definition, references = self._definitions[target]
+                definitions[name] = definition
+                pending.extend(references)
+            if root_names.isdisjoint(definitions):
+                bundled["definitions"] = {
+                    **bundled.get("definitions", dict()),
+                    **{name: definitions[name] for name in sorted(definitions)},
+                }
+            else:
+                # Name generated for a previous schema; bundle without sharing
+                bundler = SchemaBundler(self.base_dir)
+                bundler._documents = self._documents
+                bundler._reserved = set(root_names)
+                bundled = bundler.bundle(schema)
+
+        self._bundles[key] = bundled
+        return bundled
@@ -0,0 +1,165 @@
+"""
+Deferred initialization of the server extension.
+
+Building the configuration, the template loaders and compiling every template
+may be slow. So only a router is registered when the extension is loaded; it
+answers 503 until the heavy initialization, executed in a background thread,
+is done and the actual handlers are built on the server loop.
+"""
+import contextlib
+import inspect
+import logging
+import time
+from typing import Any, Callable, Dict, Iterator, List, NoReturn, Optional, Sequence
+
+import tornado.ioloop
+from tornado.routing import RuleRouter
+from tornado.web import Application, RequestHandler
+
+logger = logging.getLogger(__name__)
+
+# Initialization states
+PENDING = "pending"
+READY = "ready"
+FAILED = "failed"
+
+
+class DeferredRouter(RuleRouter):
+    """Router whose rules can be replaced once the extension is initialized.
+
+    Rules are defined as for ``tornado.web.Application.add_handlers``.
+    """
+
+    def __init__(self, application: Application, rules: Optional[List] = None):
+        self.application = application
+        super().__init__(rules)
+
+    def set_rules(self, rules: List) -> NoReturn:
+        """Replace all rules.
+
+        Args:
+            rules (List): New rules
+        """
+        # Swap the rules at once so requests never see a partial list
+        self.rules = DeferredRouter(self.application, rules).rules
+
+    def get_target_delegate(self, target: Any, request, **target_params):
+        if inspect.isclass(target) and issubclass(target, RequestHandler):
+            return self.application.get_handler_delegate(
+                request, target, **target_params
+            )
+        return super().get_target_delegate(target, request, **target_params)
+
+
+class ExtensionInitializer:
+    """Track the progress of the extension initialization.
+
+    Example:
+        with initializer.stage("file_templates"):
+            for i, template in enumerate(templates):
+                initializer.set_progress(i / len(templates))
+                ...
+    """
+
+    def __init__(self, stages: Sequence[str]):
+        """Initialize the tracker
+
+        Args:
+            stages (Sequence[str]): Ordered initialization stages
+        """
+        self.stages = tuple(stages)
+        self.state = PENDING
+        self.current_stage = None
+        self.error = None
+        # Stage -> duration in seconds
+        self.durations = dict()
+        self._stage_progress = 0.0
+
+    @property
+    def ready(self) -> bool:
+        """bool: Whether the initialization succeeded"""
+        return self.state == READY
+
+    @property
+    def progress(self) -> float:
+        """float: Fraction of the initialization done"""
+        if self.state == READY:
+            return 1.0
+        done = len(self.durations) + (
+            self._stage_progress if self.current_stage is not None else 0.0
+        )
+        return min(done / max(len(self.stages), 1), 1.0)
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """Time an initialization stage.
+
+        Args:
+            name (str): Stage name
+        """
+        self.current_stage = name
+        self._stage_progress = 0.0
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.durations[name] = time.perf_counter() - start
+            self.current_stage = None
+
+    def set_progress(self, fraction: float) -> NoReturn:
+        """Set the progress of the current stage.
+
+        Args:
+            fraction (float): Fraction of the current stage done
+        """
+        self._stage_progress = max(0.0, min(fraction, 1.0))
+
+    def model(self) -> Dict[str, Any]:
+        """Get the initialization status.
+
+        Returns:
+            Dict: {state, stage, progress, durations (in ms), error}
+        """
+        return {
+            "state": self.state,
+            "stage": self.current_stage,
+            "progress": round(self.progress, 3),
+            "durations": {
+                name: round(duration * 1000.0, 3)
+                for name, duration in self.durations.items()
+            },
+            "error": self.error,
+        }
+
+    async def run(
+        self,
+        load: Callable[["ExtensionInitializer"], Any],
+        build: Callable[[Any], List],
+        router: DeferredRouter,
+        permanent_rules: List,
+    ) -> NoReturn:
+        """Load the templates in a background thread then build and install the handlers.
+
+        Only the blocking work is done in the thread; the handlers are built
+        on the server loop as they may create objects bound to it.
+
+        Args:
+            load (Callable[[ExtensionInitializer], Any]): Function doing the blocking initialization
+            build (Callable[[Any], List]): Function returning the handler rules from the load result
+            router (DeferredRouter): Router in which the rules are installed
+            permanent_rules (List): Rules installed after the built ones (e.g. the readiness endpoint)
+        """
+        loop = tornado.ioloop.IOLoop.current()
+        try:
+            loaded = await loop.run_in_executor(None, load, self)
+            rules = build(loaded)
+        except Exception as error:
+            logger.error("Fail to initialize jupyter_project extension.", exc_info=True)
+            self.error = repr(error)
+            self.state = FAILED
+        else:
+            router.set_rules(rules + permanent_rules)
+            self.state = READY
+            logger.info(
+                f"jupyter_project extension initialized in {sum(self.durations.values()):.3f}s"
+            )
@@ -0,0 +1,159 @@
+import json
+from unittest import mock
+
+import pytest
+from traitlets.config import Config
+
+from jupyter_project.app import WarmupApp, warmup
+from jupyter_project.config import JupyterProject
+from jupyter_project.files import FileTemplateLoader
+from jupyter_project.jinja2 import BYTECODE_CACHE_FOLDER
+
+from test_archive import write_archive
+from test_conda import get_calls, make_conda
+
+
+@pytest.fixture
+def user_config(tmp_path):
+    with mock.patch(
+        "jupyter_project.project.get_user_config",
+        return_value={
+            "abbreviations": {},
+            "cookiecutters_dir": str(tmp_path / "cookiecutters"),
+        },
+    ):
+        yield
+
+
+def make_config(tmp_path, files, project_template=None):
+    templates = tmp_path / "templates"
+    templates.mkdir(exist_ok=True)
+    for name, content in files.items():
+        (templates / name).write_text(content)
+    return JupyterProject(
+        cache_dir=str(tmp_path / "cache"),
+        file_templates=[
+            {
+                "name": "group",
+                "location": str(templates),
+                "files": [{"template": name} for name in files],
+            }
+        ],
+        project_template=project_template,
+    )
+
+
+def test_warmup(tmp_path, user_config):
+    archive = write_archive(
+        tmp_path / "project.zip",
+        {
+            "cookiecutter.json": json.dumps({"name": "project"}),
+            "{{ cookiecutter.name }}/README.md": "# {{ cookiecutter.name }}",
+        },
+    )
+    config = make_config(
+        tmp_path,
+        {"file1.py": "print('{{ message }}')", "file2.md": "# {{ title }}"},
+        {"template": str(archive)},
+    )
+
+    results = warmup(config, jobs=2)
+
+    assert [(r["kind"], r["name"]) for r in results] == [
+        ("schema", "project_template"),
+        ("project", str(archive)),
+        ("file", "group/file1.py"),
+        ("file", "group/file2.md"),
+    ]
+    assert all(r["error"] is None for r in results)
+    assert all(r["duration"] >= 0.0 for r in results)
+    # The project template is extracted and the file templates are compiled on disk
+    assert len(list((tmp_path / "cookiecutters").iterdir())) == 1
+    assert len(list((tmp_path / "cache" / BYTECODE_CACHE_FOLDER).iterdir())) == 2
+
+
+def test_warmup_failures(tmp_path):
+    config = make_config(tmp_path, {"good.py": "{{ a }}", "broken.py": "{% if %}"})
+    config.file_templates = config.file_templates + [
+        FileTemplateLoader(
+            name="missing",
+            location=str(tmp_path / "missing"),
+            files=[{"template": "file.py"}],
+        )
+    ]
+
+    results = {r["name"]: r for r in warmup(config)}
+
+    assert results["group/good.py"]["error"] is None
+    assert results["group/broken.py"]["error"] is not None
+    assert results["missing"]["error"] is not None
+
+
+def test_warmup_invalid_project_template(tmp_path, user_config):
+    folder = tmp_path / "project"
+    folder.mkdir()
+    config = make_config(tmp_path, {"file.py": ""}, {"template": str(folder)})
+
+    results = {r["kind"]: r for r in warmup(config)}
+
+    assert results["schema"]["error"] is None
+    # No cookiecutter.json in the template folder
+    assert results["project"]["error"] is not None
+    assert results["file"]["error"] is None
+
+
+def test_warmup_conda_pool(tmp_path, user_config):
+    conda_root = tmp_path / "conda"
+    archive = write_archive(
+        tmp_path / "project.zip",
+        {
+            "cookiecutter.json": json.dumps({"name": "project"}),
+            "{{ cookiecutter.name }}/README.md": "# {{ cookiecutter.name }}",
+        },
+    )
+    config = make_config(
+        tmp_path, {"file.py": ""}, {"template": str(archive), "conda_pkgs": "python3"}
+    )
+    config.conda_executable = make_conda(conda_root)
+    config.conda_pool_size = 2
+    config.conda_provisioning = True
+
+    results = {r["kind"]: r for r in warmup(config)}
+
+    assert results["conda"]["name"] == "python3"
+    assert results["conda"]["error"] is None
+    assert [call[0] for call in get_calls(conda_root)] == ["create", "create"]
+    # The pool is already full
+    warmup(config)
+    assert get_calls(conda_root) == []
+
+
+@pytest.mark.parametrize("content, code", (("{{ a }}", 0), ("{% if %}", 1)))
+def test_WarmupApp_exit_code(tmp_path, capsys, content, code):
+    templates = tmp_path / "templates"
+    templates.mkdir()
+    (templates / "file.py").write_text(content)
+    app = WarmupApp(
+        config=Config(
+            {
+                "JupyterProject": {
+                    "cache_dir": str(tmp_path / "cache"),
+                    "file_templates": [
+                        {
+                            "name": "group",
+                            "location": str(templates),
+                            "files": [{"template": "file.py"}],
+                        }
+                    ],
+                }
+            }
+        )
+    )
+
+    with pytest.raises(SystemExit) as exit_info:
+        app.start()
+
+    assert exit_info.value.code == code
+    output = capsys.readouterr().out
+    assert "group/file.py" in output
+    assert f"1 tasks, {code} failures" in output
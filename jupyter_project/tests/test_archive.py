@@ -0,0 +1,146 @@
+import io
+import json
+import os
+import tarfile
+import zipfile
+from pathlib import Path
+from unittest import mock
+
+import jinja2
+import pytest
+
+from jupyter_project.archive import Archive, extract_archive, is_archive
+from jupyter_project.index import METADATA_SUFFIX, TemplatesIndex
+from jupyter_project.jinja2 import ArchiveLoader
+from jupyter_project.project import ProjectTemplate
+
+FILES = {
+    "file1.py": b"def add(a, b):\n    return a + b\n",
+    "sub/file2.py": b"# {{ title }}\n",
+    "sub/file2.py" + METADATA_SUFFIX: json.dumps({"template_name": "Title"}).encode(),
+}
+
+
+def write_archive(path: Path, files: dict) -> Path:
+    if path.suffix == ".zip":
+        with zipfile.ZipFile(path, "w") as archive:
+            for index, (name, content) in enumerate(files.items()):
+                compression = (zipfile.ZIP_STORED, zipfile.ZIP_DEFLATED)[index % 2]
+                archive.writestr(name, content, compress_type=compression)
+    else:
+        mode = "w:gz" if path.name.endswith(".tar.gz") else "w"
+        with tarfile.open(path, mode) as archive:
+            for name, content in files.items():
+                info = tarfile.TarInfo("./" + name)
+                info.size = len(content)
+                archive.addfile(info, io.BytesIO(content))
+    return path
+
+
+@pytest.mark.parametrize("name", ["templates.zip", "templates.tar", "templates.tar.gz"])
+def test_Archive(tmp_path, name):
+    archive = Archive(write_archive(tmp_path / name, FILES))
+    try:
+        assert archive.names() == sorted(FILES)
+        for filename, content in FILES.items():
+            assert archive.read(filename) == content
+        with pytest.raises(KeyError):
+            archive.read("missing.py")
+    finally:
+        archive.close()
+
+
+def test_Archive_invalid(tmp_path):
+    path = tmp_path / "invalid.zip"
+    path.write_bytes(b"not an archive")
+    assert is_archive(path)
+    with pytest.raises(ValueError):
+        Archive(path)
+
+
+def test_Archive_extract_outside_root(tmp_path):
+    path = write_archive(tmp_path / "evil.tar", {"../evil.py": b"import os\n"})
+    archive = Archive(path)
+    try:
+        with pytest.raises(ValueError):
+            archive.extract(tmp_path / "extracted")
+    finally:
+        archive.close()
+    assert not (tmp_path / "evil.py").exists()
+
+
+def test_extract_archive_cached(tmp_path):
+    path = write_archive(tmp_path / "templates.zip", FILES)
+
+    folder = extract_archive(path, tmp_path / "cache")
+    assert (folder / "sub" / "file2.py").read_bytes() == FILES["sub/file2.py"]
+
+    with mock.patch("jupyter_project.archive.Archive") as mock_archive:
+        assert extract_archive(path, tmp_path / "cache") == folder
+    mock_archive.assert_not_called()
+
+
+def test_ArchiveLoader(tmp_path):
+    path = write_archive(tmp_path / "templates.tar", FILES)
+    env = jinja2.Environment(loader=ArchiveLoader(path))
+
+    assert env.get_template("sub/file2.py").render(title="Hello") == "# Hello"
+    assert "file1.py" in env.list_templates()
+    with pytest.raises(jinja2.TemplateNotFound):
+        env.get_template("missing.py")
+
+
+def test_TemplatesIndex_archive(tmp_path):
+    path = write_archive(tmp_path / "templates.zip", FILES)
+    index = TemplatesIndex()
+
+    assert index.glob(path, "**/*.py") == {
+        "file1.py": {},
+        "sub/file2.py": {"template_name": "Title"},
+    }
+    assert index.glob(path, "*.py") == {"file1.py": {}}
+
+
+def test_ProjectTemplate_render_archive(tmp_path):
+    path = write_archive(
+        tmp_path / "project.tar.gz",
+        {
+            "my-template/cookiecutter.json": b'{"name": "project"}',
+            "my-template/{{ cookiecutter.name }}/README.md": b"# {{ cookiecutter.name }}\n",
+        },
+    )
+    tpl = ProjectTemplate(template=str(path))
+    params = dict(name="my_project")
+
+    with mock.patch(
+        "jupyter_project.project.get_user_config",
+        return_value={"cookiecutters_dir": str(tmp_path / "cookiecutters")},
+    ):
+        with mock.patch("jupyter_project.project.cookiecutter") as cookiecutter:
+            tpl.render(params, tmp_path / "output")
+
+    template_dir = Path(cookiecutter.call_args[0][0])
+    assert template_dir.name == "my-template"
+    assert (template_dir / "cookiecutter.json").exists()
+
+
+@pytest.mark.parametrize("name", ["templates.zip", "templates.tar.gz"])
+def test_ArchiveLoader_archive_replaced(tmp_path, name):
+    path = write_archive(tmp_path / name, FILES)
+    env = jinja2.Environment(loader=ArchiveLoader(path))
+    assert env.get_template("sub/file2.py").render(title="Hello") == "# Hello"
+
+    replacement = write_archive(
+        tmp_path / ("new-" + name),
+        {**FILES, "sub/file2.py": b"## {{ title }}\n", "file3.py": b"pass\n"},
+    )
+    stat = path.stat()
+    replacement.replace(path)
+    # Ensure a distinct modification time
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+
+    assert env.get_template("sub/file2.py").render(title="Hello") == "## Hello"
+    assert "file3.py" in env.list_templates()
+    # The new version is cached
+    template = env.get_template("sub/file2.py")
+    assert env.get_template("sub/file2.py") is template
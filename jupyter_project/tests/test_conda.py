@@ -0,0 +1,355 @@
+import json
+import os
+import stat
+import sys
+import tempfile
+import time
+from pathlib import Path
+from unittest import mock
+
+import pytest
+from traitlets.config import Config
+
+from jupyter_project.conda import (
+    POOL_PREFIX,
+    CondaEnvironments,
+    CondaError,
+    environment_name,
+    resolve_packages,
+    spec_hash,
+)
+from utils import ServerTest, generate_path
+
+# Stub of the conda executable managing empty environments in <root>/envs
+# and logging its calls in <root>/calls.jsonl
+STUB_CONDA = """#!{python}
+import json, pathlib, shutil, sys
+
+root = pathlib.Path({root!r})
+envs = root / "envs"
+args = sys.argv[1:]
+with (root / "calls.jsonl").open("a") as f:
+    f.write(json.dumps(args) + "\\n")
+
+def option(name):
+    return args[args.index(name) + 1] if name in args else None
+
+def fail(message):
+    print(json.dumps({{"message": message}}))
+    sys.exit(1)
+
+command = " ".join(args[:2]) if args[0] == "env" else args[0]
+if command == "env list":
+    print(json.dumps({{"envs": sorted(str(p) for p in envs.iterdir())}}))
+elif command in ("create", "env create"):
+    if "broken" in args:
+        fail("PackagesNotFoundError: broken")
+    prefix = envs / option("--name")
+    if option("--clone") is not None:
+        shutil.copytree(str(envs / option("--clone")), str(prefix))
+    else:
+        (prefix / "conda-meta").mkdir(parents=True)
+elif command == "rename":
+    if (root / "no-rename").exists():
+        fail("Invalid choice: 'rename'")
+    (envs / option("--name")).rename(envs / args[-1])
+elif command == "env remove":
+    shutil.rmtree(str(envs / option("--name")))
+"""
+
+
+def make_conda(root: Path) -> str:
+    (root / "envs").mkdir(parents=True)
+    executable = root / "conda"
+    executable.write_text(STUB_CONDA.format(python=sys.executable, root=str(root)))
+    executable.chmod(executable.stat().st_mode | stat.S_IXUSR)
+    return str(executable)
+
+
+def get_calls(root: Path) -> list:
+    calls_file = root / "calls.jsonl"
+    if not calls_file.exists():
+        return []
+    calls = [json.loads(line) for line in calls_file.read_text().splitlines()]
+    calls_file.unlink()
+    # Skip the listing calls
+    return [call for call in calls if call[:2] != ["env", "list"]]
+
+
+@pytest.fixture
+def conda(tmp_path):
+    root = tmp_path / "conda"
+    executable = make_conda(root)
+    return root, executable
+
+
+@pytest.fixture
+def project(tmp_path):
+    path = tmp_path / "projects" / "my_project"
+    path.mkdir(parents=True)
+    return path
+
+
+@pytest.mark.parametrize(
+    "configuration, name",
+    (
+        ({"name": "My Project: #1/2"}, "my_project___1_2"),
+        ({"name": "project", "environment": "MyEnv"}, "myenv"),
+    ),
+)
+def test_environment_name(configuration, name):
+    assert environment_name(configuration) == name
+
+
+def test_resolve_packages():
+    assert resolve_packages("python3") == ["ipykernel", "python=3"]
+    assert resolve_packages("numpy  python=3.8") == ["numpy", "python=3.8"]
+
+
+def test_spec_hash():
+    assert spec_hash(["b", "a"]) == spec_hash(["a", "b"])
+    assert spec_hash(["a"]) != spec_hash(["a", "b"])
+    assert spec_hash(["a"], b"name: a") == spec_hash(None, b"name: a")
+
+
+@pytest.mark.asyncio
+async def test_CondaEnvironments_provision(conda, project):
+    root, executable = conda
+    environments = CondaEnvironments(executable, pool_size=1)
+
+    result = await environments.provision(project, {"name": "Project"}, "python3")
+
+    assert result == {"environment": "project", "reused": False, "pooled": False}
+    hash = spec_hash(["ipykernel", "python=3"])
+    assert CondaEnvironments.get_hash(root / "envs" / "project") == hash
+    # The pool is filled in the background
+    await environments.start_fill_pool(["ipykernel", "python=3"])
+    calls = get_calls(root)
+    assert calls[0] == [
+        "create",
+        "--yes",
+        "--quiet",
+        "--json",
+        "--name",
+        "project",
+        "ipykernel",
+        "python=3",
+    ]
+    assert len(calls) == 2
+    assert calls[1][5].startswith(POOL_PREFIX)
+
+    # The next project with another environment name takes the pool environment
+    result = await environments.provision(
+        project, {"name": "Other", "environment": "other"}, "python3"
+    )
+
+    assert result == {"environment": "other", "reused": False, "pooled": True}
+    assert CondaEnvironments.get_hash(root / "envs" / "other") == hash
+    await environments.start_fill_pool(["ipykernel", "python=3"])
+    calls = get_calls(root)
+    assert calls[0][0] == "rename"
+    assert calls[1][0] == "create"
+    pool = [p for p in (root / "envs").iterdir() if p.name.startswith(POOL_PREFIX)]
+    assert len(pool) == 1
+
+
+@pytest.mark.asyncio
+async def test_CondaEnvironments_provision_reuse(conda, project):
+    root, executable = conda
+    environments = CondaEnvironments(executable, pool_size=0)
+    await environments.provision(project, {"name": "project"}, "python3")
+    get_calls(root)
+
+    result = await environments.provision(project, {"name": "project"}, "python3")
+
+    assert result == {"environment": "project", "reused": True, "pooled": False}
+    assert get_calls(root) == []
+
+    with pytest.raises(CondaError):
+        await environments.provision(project, {"name": "project"}, "numpy")
+
+    # Environment not created by the provisioner
+    (root / "envs" / "user_env").mkdir()
+    with pytest.raises(CondaError, match="not provisioned"):
+        await environments.provision(project, {"name": "user_env"}, "numpy")
+
+
+@pytest.mark.asyncio
+async def test_CondaEnvironments_provision_same_specification(conda, project):
+    root, executable = conda
+    environments = CondaEnvironments(executable, pool_size=1)
+    (root / "envs" / "user_env").mkdir()
+    await environments.fill_pool(["numpy"])
+    await environments.provision(project, {"name": "first"}, "numpy")
+    await environments.start_fill_pool(["numpy"])
+    get_calls(root)
+
+    result = await environments.provision(project, {"name": "second"}, "numpy")
+
+    # The environment with the same specification is used rather than the pool
+    assert result == {"environment": "first", "reused": True, "pooled": False}
+    assert get_calls(root) == []
+    assert not (root / "envs" / "second").exists()
+
+
+@pytest.mark.asyncio
+async def test_CondaEnvironments_provision_same_specification_editable(
+    conda, project
+):
+    root, executable = conda
+    (project / "setup.py").write_text("")
+    environments = CondaEnvironments(executable, pool_size=0)
+    await environments.provision(
+        project, {"name": "first"}, "numpy", editable_install=True
+    )
+    get_calls(root)
+
+    result = await environments.provision(
+        project, {"name": "second"}, "numpy", editable_install=True
+    )
+
+    # The project is not installed in the environment of another project
+    assert result == {"environment": "second", "reused": False, "pooled": False}
+    calls = get_calls(root)
+    assert calls[0][:4] == ["create", "--yes", "--quiet", "--json"]
+    assert all("first" not in call for call in calls)
+
+
+@pytest.mark.asyncio
+async def test_CondaEnvironments_provision_clone(conda, project):
+    root, executable = conda
+    (root / "no-rename").touch()
+    environments = CondaEnvironments(executable, pool_size=1)
+    await environments.fill_pool(["numpy"])
+    get_calls(root)
+
+    result = await environments.provision(project, {"name": "project"}, "numpy")
+    await environments.start_fill_pool(["numpy"])
+
+    assert result["pooled"]
+    calls = get_calls(root)
+    assert [call[0] for call in calls[:3]] == ["rename", "create", "env"]
+    assert "--clone" in calls[1]
+    assert calls[2][:2] == ["env", "remove"]
+
+
+@pytest.mark.asyncio
+async def test_CondaEnvironments_provision_file(conda, project):
+    root, executable = conda
+    (project / "environment.yml").write_text("dependencies:\n  - numpy\n")
+    (project / "setup.py").write_text("")
+    environments = CondaEnvironments(executable, pool_size=1)
+
+    result = await environments.provision(
+        project, {"name": "project"}, "python3", editable_install=True
+    )
+
+    assert result == {"environment": "project", "reused": False, "pooled": False}
+    assert get_calls(root) == [
+        [
+            "env",
+            "create",
+            "--quiet",
+            "--json",
+            "--name",
+            "project",
+            "--file",
+            str(project / "environment.yml"),
+        ],
+        [
+            "run",
+            "--name",
+            "project",
+            "python",
+            "-m",
+            "pip",
+            "install",
+            "--no-deps",
+            "--editable",
+            str(project),
+        ],
+    ]
+
+
+@pytest.mark.asyncio
+async def test_CondaEnvironments_provision_errors(conda, project):
+    root, executable = conda
+    environments = CondaEnvironments(executable, pool_size=1)
+
+    with pytest.raises(CondaError, match="PackagesNotFoundError"):
+        await environments.provision(project, {"name": "project"}, "broken")
+    with pytest.raises(CondaError):
+        await environments.provision(project, {"name": "project"}, None)
+    with pytest.raises(CondaError):
+        await CondaEnvironments(str(root / "missing")).list()
+
+
+class TestCondaProvisioning(ServerTest):
+    @classmethod
+    def setup_class(cls):
+        cls.conda_root = Path(tempfile.mkdtemp())
+        cls.config = Config(
+            {
+                "NotebookApp": {"nbserver_extensions": {"jupyter_project": True}},
+                "JupyterProject": {
+                    "conda_executable": make_conda(cls.conda_root),
+                    "conda_pool_size": 1,
+                    "conda_provisioning": True,
+                    "project_template": {
+                        "configuration_filename": "my-project.json",
+                        "conda_pkgs": "python=3 ipykernel",
+                        "editable_install": False,
+                        "template": "my-project-template",
+                    },
+                },
+            }
+        )
+        super().setup_class()
+
+    def test_project_post_provision(self):
+        path = generate_path()
+
+        def render(params, realpath):
+            project = realpath / "project_name"
+            project.mkdir(parents=True)
+            (project / "my-project.json").write_text(json.dumps(params))
+            return "project_name", dict(params)
+
+        with mock.patch(
+            "jupyter_project.handlers.ProjectTemplate.render", side_effect=render
+        ):
+            answer = self.api_tester.post(["projects", path], body={"name": "Project"})
+            assert answer.status_code == 201
+
+        configuration_file = (
+            Path(self.notebook_dir) / path / "project_name" / "my-project.json"
+        )
+        deadline = time.monotonic() + 10.0
+        while time.monotonic() < deadline:
+            configuration = json.loads(configuration_file.read_text())
+            if "environment" in configuration:
+                break
+            time.sleep(0.05)
+
+        assert configuration == {"name": "Project", "environment": "project"}
+        assert (self.conda_root / "envs" / "project").exists()
+
+    def test_pool_filled_at_start(self):
+        hash = spec_hash(resolve_packages("python=3 ipykernel"))
+        deadline = time.monotonic() + 10.0
+        while time.monotonic() < deadline:
+            pool = [
+                p
+                for p in (self.conda_root / "envs").iterdir()
+                if p.name.startswith(POOL_PREFIX)
+                and CondaEnvironments.get_hash(p) == hash
+            ]
+            if len(pool) > 0:
+                break
+            time.sleep(0.05)
+
+        assert len(pool) == 1
+
+    def test_settings_provisioning(self):
+        answer = self.api_tester.get(["settings"])
+        assert answer.json()["projectTemplate"]["serverProvisioning"]
@@ -28,6 +28,23 @@ from jupyter_project.config import FileTemplateLoader, JupyterProject, ProjectTe
             ],
             None,
         ),
+        (
+            {
+                "file_templates": [
+                    {
+                        "name": "template1",
+                        "location": "/dummy/file_templates",
+                        "glob": "**/*.py",
+                    }
+                ],
+            },
+            [
+                dict(
+                    name="template1", location="/dummy/file_templates", glob="**/*.py",
+                )
+            ],
+            None,
+        ),
         (
             {
                 "file_templates": [
@@ -0,0 +1,151 @@
+import asyncio
+import json
+import time
+from unittest import mock
+
+import pytest
+
+from jupyter_project.events import ProjectsWatcher
+from jupyter_project.project import ProjectTemplate
+
+
+@pytest.fixture
+def template():
+    return ProjectTemplate(
+        template="https://github.com/me/my-template",
+        configuration_filename="my-project.json",
+    )
+
+
+@pytest.fixture(params=[True, False], ids=["watchdog", "polling"])
+def watchdog(request):
+    if request.param:
+        yield
+    else:
+        with mock.patch("jupyter_project.events.Observer", None):
+            yield
+
+
+async def _next_event(queue):
+    return await asyncio.wait_for(queue.get(), 5)
+
+
+@pytest.mark.asyncio
+async def test_ProjectsWatcher_changed(tmp_path, template, watchdog):
+    configuration = dict(name="project", environment="env1")
+    conf_file = tmp_path / template.configuration_filename
+    conf_file.write_text(json.dumps(configuration))
+
+    watcher = ProjectsWatcher(template, poll_interval=0.05)
+    queue = watcher.subscribe()
+    watcher.open("session1", "my/project", tmp_path, configuration)
+    watcher.open("session2", "my/project", tmp_path, configuration)
+    await asyncio.sleep(0.1)
+
+    # Invalid or partially written file are ignored
+    conf_file.write_text('{"name": "proj')
+    await asyncio.sleep(0.2)
+    assert queue.empty()
+
+    conf_file.write_text(json.dumps(dict(name="project", environment="env2")))
+    event = await _next_event(queue)
+    assert event == ("changed", {"path": "my/project", "diff": {"environment": "env2"}})
+    await asyncio.sleep(0.2)
+    # The project is watched once
+    assert queue.empty()
+
+    watcher.close("session1")
+    watcher.close("session2")
+    watcher.unsubscribe(queue)
+
+
+@pytest.mark.asyncio
+async def test_ProjectsWatcher_changed_during_check(tmp_path, template, watchdog):
+    configuration = dict(name="a")
+    conf_file = tmp_path / template.configuration_filename
+    conf_file.write_text(json.dumps(configuration))
+    get_configuration = template.get_configuration
+    checking = asyncio.Event()
+    loop = asyncio.get_event_loop()
+
+    def slow_get_configuration(*args):
+        result = get_configuration(*args)
+        if not checking.is_set():
+            loop.call_soon_threadsafe(checking.set)
+            # Change the file while the first check is running
+            time.sleep(0.5)
+        return result
+
+    watcher = ProjectsWatcher(template, poll_interval=0.05)
+    queue = watcher.subscribe()
+    watcher.open("session", "project", tmp_path, configuration)
+    await asyncio.sleep(0.1)
+
+    with mock.patch.object(template, "get_configuration", slow_get_configuration):
+        conf_file.write_text(json.dumps(dict(name="b")))
+        await asyncio.wait_for(checking.wait(), 5)
+        conf_file.write_text(json.dumps(dict(name="cc")))
+
+        assert await _next_event(queue) == (
+            "changed",
+            {"path": "project", "diff": {"name": "b"}},
+        )
+        assert await _next_event(queue) == (
+            "changed",
+            {"path": "project", "diff": {"name": "cc"}},
+        )
+
+    watcher.close("session")
+    watcher.unsubscribe(queue)
+
+
+@pytest.mark.asyncio
+async def test_ProjectsWatcher_deleted(tmp_path, template, watchdog):
+    configuration = dict(name="project")
+    conf_file = tmp_path / template.configuration_filename
+    conf_file.write_text(json.dumps(configuration))
+
+    watcher = ProjectsWatcher(template, poll_interval=0.05)
+    queue = watcher.subscribe()
+    watcher.open("session", "project", tmp_path, configuration)
+    await asyncio.sleep(0.1)
+
+    conf_file.unlink()
+    event = await _next_event(queue)
+    assert event == ("deleted", {"path": "project"})
+
+    # Project is not watched anymore
+    conf_file.write_text(json.dumps(configuration))
+    await asyncio.sleep(0.2)
+    assert queue.empty()
+
+
+@pytest.mark.asyncio
+async def test_ProjectsWatcher_close(tmp_path, template, watchdog):
+    configuration = dict(name="project")
+    conf_file = tmp_path / template.configuration_filename
+    conf_file.write_text(json.dumps(configuration))
+
+    watcher = ProjectsWatcher(template, poll_interval=0.05)
+    queue = watcher.subscribe()
+    watcher.open("session", "project", tmp_path, configuration)
+    # Closing the project
+    watcher.close("session")
+    await asyncio.sleep(0.1)
+
+    conf_file.write_text(json.dumps(dict(name="new name")))
+    await asyncio.sleep(0.2)
+    assert queue.empty()
+
+
+def test_ProjectsWatcher_publish_slow_subscriber(template):
+    watcher = ProjectsWatcher(template)
+    queue = watcher.subscribe()
+
+    for i in range(queue.maxsize + 10):
+        watcher.publish("deleted", {"path": str(i)})
+
+    assert queue.full()
+    watcher.unsubscribe(queue)
+    watcher.publish("deleted", {"path": "other"})
+    assert queue.qsize() == queue.maxsize
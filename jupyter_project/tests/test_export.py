@@ -0,0 +1,98 @@
+import io
+import os
+import tarfile
+import zipfile
+from unittest import mock
+
+import pytest
+
+from jupyter_project import export
+from jupyter_project.export import iter_project_files, stream_archive
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "my_project"
+    (root / "src" / "__pycache__").mkdir(parents=True)
+    (root / "data" / "raw").mkdir(parents=True)
+    (root / "empty").mkdir()
+    (root / "README.md").write_text("# My project")
+    (root / "src" / "main.py").write_text("print('hello')")
+    (root / "src" / "__pycache__" / "main.cpython-38.pyc").write_bytes(b"\0")
+    (root / "data" / "raw" / "big.bin").write_bytes(os.urandom(100_000))
+    (root / "data" / "small.csv").write_text("a,b\n1,2\n")
+    secret = tmp_path / "secret.txt"
+    secret.write_text("secret")
+    os.symlink(secret, root / "link.txt")
+    return root
+
+
+def test_iter_project_files(project):
+    names = [name for _, name in iter_project_files(project, ["__pycache__", "data/raw"])]
+
+    assert names == [
+        "data",
+        "empty",
+        "src",
+        "README.md",
+        "data/small.csv",
+        "src/main.py",
+    ]
+
+
+@pytest.mark.parametrize("format", ("tar.gz", "zip"))
+def test_stream_archive(project, format):
+    chunk_size = 16 * 1024
+    chunks = list(stream_archive(project, format, ["__pycache__"], chunk_size))
+
+    # The memory is bounded by the chunk size
+    assert max(len(chunk) for chunk in chunks) < 2 * chunk_size
+    content = io.BytesIO(b"".join(chunks))
+    if format == "zip":
+        with zipfile.ZipFile(content) as archive:
+            assert archive.testzip() is None
+            names = [name.rstrip("/") for name in archive.namelist()]
+            big = archive.read("my_project/data/raw/big.bin")
+    else:
+        with tarfile.open(fileobj=content) as archive:
+            names = archive.getnames()
+            assert archive.getmember("my_project/empty").isdir()
+            big = archive.extractfile("my_project/data/raw/big.bin").read()
+
+    assert sorted(names) == [
+        "my_project/README.md",
+        "my_project/data",
+        "my_project/data/raw",
+        "my_project/data/raw/big.bin",
+        "my_project/data/small.csv",
+        "my_project/empty",
+        "my_project/src",
+        "my_project/src/main.py",
+    ]
+    assert big == (project / "data" / "raw" / "big.bin").read_bytes()
+
+
+def test_stream_archive_truncated_file(project):
+    read_chunks = export._read_chunks
+
+    def truncated_read(path, chunk_size):
+        # The file shrinks after its size was written in the archive
+        for chunk in read_chunks(path, chunk_size):
+            yield chunk[:10]
+            break
+
+    with mock.patch("jupyter_project.export._read_chunks", side_effect=truncated_read):
+        content = b"".join(stream_archive(project, "tar.gz"))
+
+    with tarfile.open(fileobj=io.BytesIO(content)) as archive:
+        member = archive.getmember("my_project/data/raw/big.bin")
+        assert member.size == 100_000
+        assert archive.extractfile(member).read() == (
+            (project / "data" / "raw" / "big.bin").read_bytes()[:10] + b"\0" * 99_990
+        )
+        assert archive.extractfile("my_project/README.md").read() == b"# My proje\0\0"
+
+
+def test_stream_archive_unknown_format(project):
+    with pytest.raises(ValueError):
+        stream_archive(project, "rar")
@@ -0,0 +1,188 @@
+import json
+import os
+import shutil
+import threading
+from unittest import mock
+
+import cookiecutter.generate
+import pytest
+
+from jupyter_project.fastcopy import clone_file, clone_tree, static_files_copy
+from jupyter_project.project import ProjectTemplate
+
+
+@pytest.fixture
+def cookiecutter_template(tmp_path):
+    template = tmp_path / "template"
+    project = template / "{{ cookiecutter.name }}"
+    (project / "data").mkdir(parents=True)
+    (template / "cookiecutter.json").write_text(
+        json.dumps({"name": "project", "_copy_without_render": ["data/*"]})
+    )
+    (project / "README.md").write_text("# {{ cookiecutter.name }}\n")
+    (project / "model.bin").write_bytes(bytes(range(256)) * 64)
+    (project / "data" / "dataset.csv").write_text("a,b\n{{ not rendered }}\n")
+    (project / "big.csv").write_text("x,{{ cookiecutter.name }}\n" * 1000)
+    return template
+
+
+@pytest.mark.parametrize("hardlink", [False, True])
+def test_clone_file(tmp_path, hardlink):
+    src = tmp_path / "src.bin"
+    src.write_bytes(os.urandom(4096))
+    dst = tmp_path / "dst.bin"
+
+    assert clone_file(str(src), str(dst), hardlink=hardlink) == str(dst)
+    assert dst.read_bytes() == src.read_bytes()
+
+
+def test_clone_file_hardlink_fallback(tmp_path):
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"static asset")
+    dst = tmp_path / "dst.bin"
+
+    with mock.patch("jupyter_project.fastcopy._reflink", return_value=False):
+        clone_file(str(src), str(dst), hardlink=True)
+
+    assert os.path.samefile(src, dst)
+
+
+def test_clone_file_copy_file_range_fallback(tmp_path):
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"static asset")
+    dst = tmp_path / "dst.bin"
+
+    with mock.patch("jupyter_project.fastcopy._reflink", return_value=False):
+        clone_file(str(src), str(dst), hardlink=False)
+
+    assert not os.path.samefile(src, dst)
+    assert dst.read_bytes() == b"static asset"
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="Named pipes not supported")
+def test_clone_file_special_file(tmp_path):
+    src = tmp_path / "pipe"
+    os.mkfifo(str(src))
+
+    # Opening the pipe would block
+    with pytest.raises(shutil.SpecialFileError):
+        clone_file(str(src), str(tmp_path / "dst"))
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = tmp_path / "project"
+    (project / "data" / "raw").mkdir(parents=True)
+    (project / "empty").mkdir()
+    (project / "README.md").write_text("# Project")
+    (project / "data" / "raw" / "values.bin").write_bytes(os.urandom(4096))
+    (project / "run.sh").write_text("#!/bin/sh")
+    (project / "run.sh").chmod(0o755)
+    os.symlink("data/raw", project / "raw")
+    return project
+
+
+@pytest.mark.parametrize("mode", ["copy", "reflink", "hardlink"])
+def test_clone_tree(tmp_path, project, mode):
+    destination = tmp_path / "clone"
+
+    with mock.patch("jupyter_project.fastcopy._reflink", return_value=False):
+        assert clone_tree(str(project), str(destination), mode, max_workers=2) == str(
+            destination
+        )
+
+    assert sorted(p.relative_to(destination).as_posix() for p in destination.rglob("*")) == [
+        "README.md",
+        "data",
+        "data/raw",
+        "data/raw/values.bin",
+        "empty",
+        "raw",
+        "run.sh",
+    ]
+    values = "data/raw/values.bin"
+    assert (destination / values).read_bytes() == (project / values).read_bytes()
+    assert os.path.samefile(project / values, destination / values) == (mode == "hardlink")
+    assert os.readlink(destination / "raw") == "data/raw"
+    assert os.access(destination / "run.sh", os.X_OK)
+    assert (destination / "data").stat().st_mtime == (project / "data").stat().st_mtime
+
+
+@pytest.mark.skipif(not hasattr(os, "mkfifo"), reason="Named pipes not supported")
+def test_clone_tree_special_file(tmp_path, project):
+    os.mkfifo(str(project / "data" / "pipe"))
+    destination = tmp_path / "clone"
+
+    clone_tree(str(project), str(destination))
+
+    assert not (destination / "data" / "pipe").exists()
+    assert (destination / "data" / "raw" / "values.bin").is_file()
+
+
+def test_clone_tree_invalid_mode(tmp_path, project):
+    with pytest.raises(ValueError):
+        clone_tree(str(project), str(tmp_path / "clone"), "symlink")
+
+
+def test_static_files_copy_invalid_mode():
+    with pytest.raises(ValueError):
+        with static_files_copy("symlink"):
+            pass
+
+
+def test_static_files_copy_scoped(tmp_path):
+    originals = (cookiecutter.generate.shutil, cookiecutter.generate.is_binary)
+    src = tmp_path / "src.bin"
+    src.write_bytes(b"static asset")
+    os.utime(src, (0, 0))
+    copies = list()
+
+    def other_caller():
+        # Another thread gets the shutil behavior
+        dst = tmp_path / "other.bin"
+        cookiecutter.generate.shutil.copyfile(str(src), str(dst))
+        copies.append(dst)
+
+    with static_files_copy("copy") as outer:
+        with static_files_copy("copy") as inner:
+            thread = threading.Thread(target=other_caller)
+            thread.start()
+            thread.join()
+            cookiecutter.generate.shutil.copyfile(str(src), str(tmp_path / "dst.bin"))
+        assert cookiecutter.generate.shutil is not originals[0]
+
+    assert copies[0].stat().st_mtime != 0
+    assert inner == {str(tmp_path / "dst.bin")}
+    assert outer == set()
+    # cookiecutter is restored for the other callers
+    assert (cookiecutter.generate.shutil, cookiecutter.generate.is_binary) == originals
+
+
+def test_ProjectTemplate_render_hardlink(tmp_path, cookiecutter_template):
+    tpl = ProjectTemplate(
+        template=str(cookiecutter_template),
+        copy_mode="hardlink",
+        render_size_limit=4096,
+    )
+    source = cookiecutter_template / "{{ cookiecutter.name }}"
+
+    with mock.patch("jupyter_project.fastcopy._reflink", return_value=False):
+        folder, _ = tpl.render({"name": "my_project"}, tmp_path / "output")
+
+    project = tmp_path / "output" / folder
+    assert (project / "README.md").read_text() == "# my_project\n"
+    for asset in ("model.bin", "data/dataset.csv", "big.csv"):
+        assert os.path.samefile(source / asset, project / asset)
+
+
+def test_ProjectTemplate_render_copy(tmp_path, cookiecutter_template):
+    tpl = ProjectTemplate(template=str(cookiecutter_template), copy_mode="copy")
+    source = cookiecutter_template / "{{ cookiecutter.name }}"
+
+    folder, _ = tpl.render({"name": "my_project"}, tmp_path / "output")
+
+    project = tmp_path / "output" / folder
+    assert (project / "model.bin").read_bytes() == (source / "model.bin").read_bytes()
+    assert not os.path.samefile(source / "model.bin", project / "model.bin")
+    # Big text file is rendered
+    assert (project / "big.csv").read_text() == "x,my_project\n" * 1000
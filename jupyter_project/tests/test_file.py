@@ -2,22 +2,83 @@ import os
 import re
 import sys
 import tempfile
+import time
 import uuid
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from unittest import mock
 from urllib.parse import quote
 
 import jinja2
+import nbformat
 import pytest
 import tornado
+from notebook.services.contents.filemanager import FileContentsManager
 from traitlets.config import Config
 
+from jupyter_project.files import SVG_MAX_SIZE, is_svg
 from jupyter_project.handlers import FileTemplatesHandler
 
 from utils import ServerTest, assert_http_error, url_path_join, generate_path
 
 template_folder = tempfile.TemporaryDirectory(suffix="files")
 
+# Regex formerly used to validate the icons; kept as reference for the corpus
+LEGACY_SVG_PATTERN = re.compile(
+    r"^\s*(?:<\?xml[^>]*>\s*)?(?:<!doctype svg[^>]*\s*(?:\[?(?:\s*<![^>]*>\s*)*\]?)*[^>]*>\s*)?(?:<svg[^>]*>.*<\/svg>|<svg[^/>]*\/\s*>)\s*$",
+    re.IGNORECASE | re.DOTALL,
+)
+
+SVG_CORPUS = [
+    '<svg viewBox="0 0 100 100" xmlns="http://www.w3.org/2000/svg"><rect width="100" height="100" /></svg>',
+    '<svg xmlns="http://www.w3.org/2000/svg" viewBox="0 0 16 16"> <rect class="jp-icon3" fill="#ffffff" width="16" height="16" rx="2" style="fill-opacity:1" /> <path class="jp-icon-accent0" fill="#faff00" d="m 12.098275,4.7065364 -4.9999997,-0.62651 v 8.9554396 l 4.9999997,-0.32893 v -1.1 l -3.4999997,0.19305 V 8.9065364 h 1.9999997 v -1.1 l -1.9999997,-0.1 V 5.3539365 l 3.4999997,0.3526 z" style="fill-opacity:1;stroke:none" /> </svg> ',
+    '<?xml version="1.0" encoding="UTF-8"?>\n<svg xmlns="http://www.w3.org/2000/svg"><g><!-- comment --></g></svg>\n',
+    '<!DOCTYPE svg PUBLIC "-//W3C//DTD SVG 1.1//EN" "http://www.w3.org/Graphics/SVG/1.1/DTD/svg11.dtd">\n<svg width="10" height="10"/>',
+    '<?xml version="1.0"?><!DOCTYPE svg [<!ENTITY ns_svg "http://www.w3.org/2000/svg">]><svg xmlns="&ns_svg;"></svg>',
+    "  <SVG></SVG>  ",
+    "<svg/>",
+    '<svg:svg xmlns:svg="http://www.w3.org/2000/svg"></svg:svg>',
+    "",
+    "   ",
+    "<notsvg></svg>",
+    "<html><svg></svg></html>",
+    "<svg>",
+    "</svg>",
+    "svg",
+    "<!-- Generator: editor --><svg></svg>",
+    "<svg></svg><!-- trailing -->",
+    "<svg></svg>trailing text",
+    '<?xml version="1.0"?>',
+    "<!doctype html><svg></svg>",
+]
+
+SVG_WORST_CASES = [
+    "<!doctype svg" + "[]" * 100_000,
+    "<!doctype svg [" + "<!x>" * 100_000,
+    "<svg" + " a" * 100_000,
+    "<svg>" + "</svg>x" * 100_000,
+    " " * 200_000 + "x",
+]
+
+
+@pytest.mark.parametrize("icon", SVG_CORPUS)
+def test_is_svg_corpus(icon):
+    assert is_svg(icon) == (LEGACY_SVG_PATTERN.match(icon) is not None)
+
+
+def test_is_svg_size_limit():
+    icon = "<svg>" + " " * SVG_MAX_SIZE + "</svg>"
+    assert not is_svg(icon)
+    assert is_svg(icon, max_size=len(icon))
+
+
+@pytest.mark.parametrize("icon", SVG_WORST_CASES)
+def test_is_svg_worst_case(icon):
+    # Those inputs make the legacy regex backtrack for ages
+    start = time.perf_counter()
+    assert not is_svg(icon)
+    assert time.perf_counter() - start < 1.0
+
 
 class TestPathFileTemplate(ServerTest):
 
@@ -87,6 +148,17 @@ class TestPathFileTemplate(ServerTest):
         sys.path.remove(str(Path(template_folder.name) / "file_templates"))
         template_folder.cleanup()
 
+    def test_templates_cache(self):
+        answer = self.api_tester.get(["cache"])
+        assert answer.status_code == 200
+        stats = answer.json()
+        # All file templates are compiled at startup
+        assert stats["entries"] == 4
+        assert stats["compilations"] == 4
+        assert stats["maxEntries"] == 400
+        assert stats["maxBytes"] == 0
+        assert stats["bytes"] > 0
+
     @mock.patch("jupyter_project.handlers.Template")
     @mock.patch("jinja2.Template.render")
     def test_template1_file1(self, renderer, default_name):
@@ -175,6 +247,51 @@ class TestPathFileTemplate(ServerTest):
         assert model["name"] == name + ".py"
         assert model["path"] == url_path_join(path, name + ".py")
 
+    def test_concurrent_creations(self):
+        path = generate_path()
+        n_requests = 20
+
+        def create(_):
+            return self.api_tester.post(
+                ["files", quote("template1/file1", safe=""), path], body={}
+            ).json()
+
+        with ThreadPoolExecutor(max_workers=n_requests) as executor:
+            models = list(executor.map(create, range(n_requests)))
+
+        names = {model["name"] for model in models}
+        assert len(names) == n_requests
+        folder = Path(self.notebook_dir) / path
+        assert sorted(f.name for f in folder.iterdir()) == sorted(names)
+        for name in names:
+            assert (folder / name).read_text() == "def add(a, b):\n    return a + b"
+
+    def test_concurrent_creations_interleaved(self):
+        path = generate_path()
+        n_requests = 5
+        increment_filename = FileContentsManager.increment_filename
+
+        def slow_increment_filename(cm, *args, **kwargs):
+            name = increment_filename(cm, *args, **kwargs)
+            # Let the other requests pick a name before this one is reserved
+            time.sleep(0.1)
+            return name
+
+        def create(_):
+            return self.api_tester.post(
+                ["files", quote("template1/file1", safe=""), path], body={}
+            ).json()
+
+        with mock.patch.object(
+            FileContentsManager, "increment_filename", slow_increment_filename
+        ), ThreadPoolExecutor(max_workers=n_requests) as executor:
+            models = list(executor.map(create, range(n_requests)))
+
+        names = {model["name"] for model in models}
+        assert len(names) == n_requests
+        folder = Path(self.notebook_dir) / path
+        assert sorted(f.name for f in folder.iterdir()) == sorted(names)
+
     def test_missing_endpoint(self):
         with assert_http_error(404):
             self.api_tester.post(["files", quote("template4/file", safe="")], body={})
@@ -219,4 +336,246 @@ class TestPathFileTemplate(ServerTest):
             self.api_tester.post(
                 ["files", quote("template1/file1", safe=""), path], body=body
             )
+        folder = Path(self.notebook_dir) / path
+        assert not (folder / (name + ".py")).exists()
+
+
+class AsyncContentsManager(FileContentsManager):
+    """Contents manager exposing coroutines like remote storage managers."""
+
+    async def dir_exists(self, path):
+        return super().dir_exists(path)
+
+    async def increment_filename(self, filename, path="", insert=""):
+        return super().increment_filename(filename, path, insert)
+
+    async def save(self, model, path=""):
+        return super().save(model, path)
+
+    async def delete(self, path):
+        return super().delete(path)
+
+
+class TestAsyncContentsManager(ServerTest):
+
+    config = Config(
+        {
+            "NotebookApp": {
+                "nbserver_extensions": {"jupyter_project": True},
+                "contents_manager_class": AsyncContentsManager,
+            },
+            "JupyterProject": {
+                "file_templates": [
+                    {
+                        "name": "template1",
+                        "location": str(Path(template_folder.name) / "async_templates"),
+                        "files": [{"template": "file1.py"}],
+                    }
+                ]
+            },
+        }
+    )
+
+    @classmethod
+    def setup_class(cls):
+        folder = Path(template_folder.name) / "async_templates"
+        folder.mkdir(exist_ok=True, parents=True)
+        (folder / "file1.py").write_text("print('{{ message }}')\n")
+        super().setup_class()
+
+    def test_create_file(self):
+        path = url_path_join(generate_path(), "sub")
+
+        answer = self.api_tester.post(
+            ["files", quote("template1/file1", safe=""), path], body={"message": "hello"}
+        )
+        assert answer.status_code == 201
+
+        model = answer.json()
+        assert model["content"] is None
+        assert model["path"] == url_path_join(path, model["name"])
+        assert (Path(self.notebook_dir) / model["path"]).read_text() == "print('hello')"
+
+    def test_concurrent_creations(self):
+        path = generate_path()
+        n_requests = 10
+
+        def create(_):
+            return self.api_tester.post(
+                ["files", quote("template1/file1", safe=""), path], body={"message": ""}
+            ).json()
+
+        with ThreadPoolExecutor(max_workers=n_requests) as executor:
+            models = list(executor.map(create, range(n_requests)))
+
+        assert len({model["name"] for model in models}) == n_requests
+
+
+class TestAsyncRendering(ServerTest):
+
+    config = Config(
+        {
+            "NotebookApp": {"nbserver_extensions": {"jupyter_project": True}},
+            "JupyterProject": {
+                "file_templates": [
+                    {
+                        "name": "template1",
+                        "location": str(Path(template_folder.name) / "async_templates"),
+                        "files": [{"template": "file1.py"}],
+                    }
+                ],
+                "template_enable_async": True,
+            },
+        }
+    )
 
+    @classmethod
+    def setup_class(cls):
+        folder = Path(template_folder.name) / "async_templates"
+        folder.mkdir(exist_ok=True, parents=True)
+        (folder / "file1.py").write_text("print('{{ message }}')\n")
+        super().setup_class()
+
+    @mock.patch("jupyter_project.handlers.Template")
+    @mock.patch("jinja2.Template.render", side_effect=AssertionError)
+    def test_render_async(self, renderer, default_name):
+        name = str(uuid.uuid4())
+        default_name.return_value.render.return_value = name
+        path = generate_path()
+
+        answer = self.api_tester.post(
+            ["files", quote("template1/file1", safe=""), path], body={"message": "hello"}
+        )
+        assert answer.status_code == 201
+
+        renderer.assert_not_called()
+        model = answer.json()
+        assert model["name"] == name + ".py"
+        assert (Path(self.notebook_dir) / model["path"]).read_text() == "print('hello')"
+
+
+class TestNotebookRendering(ServerTest):
+
+    config = Config(
+        {
+            "NotebookApp": {"nbserver_extensions": {"jupyter_project": True}},
+            "JupyterProject": {
+                "file_templates": [
+                    {
+                        "name": "template1",
+                        "location": str(Path(template_folder.name) / "nb_templates"),
+                        "files": [
+                            {"template": "example.ipynb", "render_mode": "notebook"},
+                            {"template": "invalid.ipynb", "render_mode": "notebook"},
+                        ],
+                    }
+                ],
+            },
+        }
+    )
+
+    @classmethod
+    def setup_class(cls):
+        folder = Path(template_folder.name) / "nb_templates"
+        folder.mkdir(exist_ok=True, parents=True)
+        example = Path(__file__).parents[1] / "examples" / "example.ipynb"
+        (folder / "example.ipynb").write_text(example.read_text())
+        (folder / "invalid.ipynb").write_text("{{ message }}")
+        super().setup_class()
+
+    def test_render_notebook(self):
+        path = generate_path()
+        params = dict(
+            exampleBoolean=False,
+            exampleList=[],
+            exampleNumber=1,
+            exampleObject={},
+            exampleString='a "quoted" string',
+        )
+
+        answer = self.api_tester.post(
+            ["files", quote("template1/example", safe=""), path], body=params
+        )
+        assert answer.status_code == 201
+
+        model = answer.json()
+        content = (Path(self.notebook_dir) / model["path"]).read_text()
+        notebook = nbformat.reads(content, as_version=4)
+        nbformat.validate(notebook)
+        assert notebook.cells[5].source.startswith("string = 'a \"quoted\" string'")
+
+    def test_render_invalid_notebook_as_text(self):
+        path = generate_path()
+
+        answer = self.api_tester.post(
+            ["files", quote("template1/invalid", safe=""), path],
+            body={"message": "hello"},
+        )
+        assert answer.status_code == 201
+
+        model = answer.json()
+        assert (Path(self.notebook_dir) / model["path"]).read_text() == "hello"
+
+
+class TestTemplatesCacheLimit(ServerTest):
+
+    config = Config(
+        {
+            "NotebookApp": {"nbserver_extensions": {"jupyter_project": True}},
+            "JupyterProject": {
+                "file_templates": [
+                    {
+                        "name": "template1",
+                        "location": str(Path(template_folder.name) / "cache_templates"),
+                        "files": [
+                            {"template": "file1.py"},
+                            {"template": "file2.py"},
+                            {"template": "example.ipynb", "render_mode": "notebook"},
+                        ],
+                    }
+                ],
+                "template_cache_size": 1,
+            },
+        }
+    )
+
+    @classmethod
+    def setup_class(cls):
+        folder = Path(template_folder.name) / "cache_templates"
+        folder.mkdir(exist_ok=True, parents=True)
+        (folder / "file1.py").write_text("one = {{ value }}\n")
+        (folder / "file2.py").write_text("two = {{ value }}\n")
+        example = Path(__file__).parents[1] / "examples" / "example.ipynb"
+        (folder / "example.ipynb").write_text(example.read_text())
+        super().setup_class()
+
+    def test_cache_bounded(self):
+        # The handlers do not keep the templates evicted from the cache
+        assert self.api_tester.get(["cache"]).json()["entries"] == 1
+
+        for name, body in (
+            ("file1", {"value": 1}),
+            ("file2", {"value": 2}),
+            (
+                "example",
+                dict(
+                    exampleBoolean=False,
+                    exampleList=[],
+                    exampleNumber=1,
+                    exampleObject={},
+                    exampleString="",
+                ),
+            ),
+            ("file1", {"value": 3}),
+        ):
+            answer = self.api_tester.post(
+                ["files", quote(f"template1/{name}", safe=""), generate_path()],
+                body=body,
+            )
+            assert answer.status_code == 201
+
+        model = answer.json()
+        assert (Path(self.notebook_dir) / model["path"]).read_text() == "one = 3"
+        stats = self.api_tester.get(["cache"]).json()
+        assert stats["entries"] == 1
+        assert stats["evictions"] >= 6
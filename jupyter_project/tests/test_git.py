@@ -0,0 +1,100 @@
+import os
+import subprocess
+from unittest import mock
+
+import pytest
+
+from jupyter_project.git import GitError, init_repository
+
+
+def git(root, *args):
+    return subprocess.run(
+        ["git", *args], cwd=str(root), stdout=subprocess.PIPE, check=True
+    ).stdout.decode("utf-8")
+
+
+@pytest.fixture
+def project(tmp_path):
+    root = tmp_path / "project"
+    (root / "src" / "__pycache__").mkdir(parents=True)
+    (root / "empty").mkdir()
+    (root / ".gitignore").write_text("__pycache__/\n*.log\n")
+    (root / "README.md").write_text("# Project\n")
+    (root / "src" / "main.py").write_text("print('hello')\n")
+    (root / "src" / "__pycache__" / "main.cpython-38.pyc").write_bytes(b"\0")
+    (root / "run.log").write_text("log")
+    (root / "data with space.bin").write_bytes(os.urandom(300_000))
+    script = root / "run.sh"
+    script.write_text("#!/bin/sh\n")
+    script.chmod(0o755)
+    os.symlink("README.md", root / "link.md")
+    return root
+
+
+def test_init_repository(project, monkeypatch):
+    monkeypatch.setenv("GIT_AUTHOR_NAME", "John Doe")
+    monkeypatch.setenv("GIT_AUTHOR_EMAIL", "john.doe@example.com")
+    monkeypatch.setenv("GIT_COMMITTER_NAME", "John Doe")
+    monkeypatch.setenv("GIT_COMMITTER_EMAIL", "john.doe@example.com")
+
+    commit = init_repository(project, "Initialize project Project")
+
+    assert git(project, "rev-parse", "HEAD").strip() == commit
+    assert git(project, "log", "--format=%an <%ae>|%s").strip() == (
+        "John Doe <john.doe@example.com>|Initialize project Project"
+    )
+    tree = list()
+    for line in git(project, "ls-tree", "-r", "HEAD").splitlines():
+        meta, path = line.split("\t")
+        tree.append(f"{meta.split()[0]} {path}")
+    assert tree == [
+        "100644 .gitignore",
+        "100644 README.md",
+        "100644 data with space.bin",
+        "120000 link.md",
+        "100755 run.sh",
+        "100644 src/main.py",
+    ]
+    # Working tree and index match the commit
+    assert git(project, "status", "--porcelain") == ""
+    # The objects are written in a single pack
+    assert len(list((project / ".git" / "objects" / "pack").glob("*.pack"))) == 1
+
+
+def test_init_repository_no_file(tmp_path):
+    assert init_repository(tmp_path, "Initialize") is None
+    assert (tmp_path / ".git").is_dir()
+
+
+def test_init_repository_no_git(tmp_path):
+    with mock.patch("jupyter_project.git.shutil.which", return_value=None):
+        with pytest.raises(GitError):
+            init_repository(tmp_path, "Initialize")
+
+
+def test_init_repository_exclude(project):
+    (project / ".manifest.json").write_text("{}")
+
+    init_repository(project, "Initialize project", exclude=["/.manifest.json"])
+
+    assert ".manifest.json" not in git(project, "ls-tree", "-r", "--name-only", "HEAD")
+    # The file stays ignored
+    assert git(project, "status", "--porcelain") == ""
+
+
+@pytest.mark.parametrize("size", [1, 100000])
+def test_init_repository_changed_file(project, size):
+    # The file size changes between the blob header and its content
+    with mock.patch(
+        "jupyter_project.git.os.fstat", return_value=mock.Mock(st_size=size)
+    ):
+        with pytest.raises(GitError, match="changed while being committed"):
+            init_repository(project, "Initialize project")
+
+    # Nothing is committed
+    assert (
+        subprocess.run(
+            ["git", "rev-parse", "--verify", "--quiet", "HEAD"], cwd=str(project)
+        ).returncode
+        != 0
+    )
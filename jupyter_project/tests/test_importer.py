@@ -0,0 +1,156 @@
+import asyncio
+import concurrent.futures
+import io
+import json
+import tarfile
+import zipfile
+
+import pytest
+
+from jupyter_project.export import stream_archive
+from jupyter_project.importer import STAGING_PREFIX, ArchiveImporter, _member_path
+
+
+def make_archive(format: str, files: dict) -> bytes:
+    content = io.BytesIO()
+    if format == "zip":
+        with zipfile.ZipFile(content, "w") as archive:
+            for name, data in files.items():
+                archive.writestr(name, data)
+    else:
+        with tarfile.open(fileobj=content, mode="w:gz" if format == "tar.gz" else "w") as archive:
+            for name, data in files.items():
+                info = tarfile.TarInfo(name)
+                info.size = len(data)
+                archive.addfile(info, io.BytesIO(data))
+    return content.getvalue()
+
+
+async def import_archive(parent, data: bytes, chunk_size: int = 1000):
+    importer = ArchiveImporter(parent)
+    try:
+        for index in range(0, len(data), chunk_size):
+            await importer.feed(data[index : index + chunk_size])
+        root = await importer.finish()
+        return {
+            path.relative_to(root).as_posix(): path.read_bytes()
+            for path in root.rglob("*")
+            if path.is_file()
+        }
+    finally:
+        await importer.cleanup()
+        assert not any(p.name.startswith(STAGING_PREFIX) for p in parent.iterdir())
+
+
+@pytest.mark.parametrize(
+    "name, expected",
+    (
+        ("project/file.txt", ("project", "file.txt")),
+        ("./project//file.txt", ("project", "file.txt")),
+        ("project\\file.txt", ("project", "file.txt")),
+        ("./", None),
+    ),
+)
+def test_member_path(tmp_path, name, expected):
+    path = _member_path(tmp_path, name)
+    if expected is None:
+        assert path is None
+    else:
+        assert path == tmp_path.joinpath(*expected)
+
+
+@pytest.mark.parametrize(
+    "name", ("/etc/passwd", "../outside.txt", "project/../../outside.txt", "C:/file.txt")
+)
+def test_member_path_unsafe(tmp_path, name):
+    with pytest.raises(ValueError):
+        _member_path(tmp_path, name)
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("format", ("tar", "tar.gz", "zip"))
+async def test_ArchiveImporter(tmp_path, format):
+    data = make_archive(
+        format,
+        {"my-project.json": b'{"name": "project"}', "src/main.py": b"print('hello')"},
+    )
+
+    files = await import_archive(tmp_path, data)
+
+    assert files == {
+        "my-project.json": b'{"name": "project"}',
+        "src/main.py": b"print('hello')",
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("format", ("tar.gz", "zip"))
+async def test_ArchiveImporter_export_roundtrip(tmp_path, format):
+    project = tmp_path / "project"
+    (project / "data").mkdir(parents=True)
+    (project / "my-project.json").write_text(json.dumps({"name": "project"}))
+    (project / "data" / "values.bin").write_bytes(bytes(range(256)) * 1000)
+    destination = tmp_path / "imports"
+    destination.mkdir()
+
+    data = b"".join(stream_archive(project, format))
+    # The single root folder is removed
+    files = await import_archive(destination, data, chunk_size=4096)
+
+    assert files == {
+        "my-project.json": (project / "my-project.json").read_bytes(),
+        "data/values.bin": (project / "data" / "values.bin").read_bytes(),
+    }
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("format", ("tar.gz", "zip"))
+async def test_ArchiveImporter_path_traversal(tmp_path, format):
+    destination = tmp_path / "imports"
+    destination.mkdir()
+    data = make_archive(format, {"file.txt": b"", "../outside.txt": b"evil"})
+
+    with pytest.raises(ValueError):
+        await import_archive(destination, data)
+    assert not (tmp_path / "outside.txt").exists()
+
+
+@pytest.mark.asyncio
+async def test_ArchiveImporter_invalid(tmp_path):
+    # More chunks than the queue size to check the extraction does not block
+    with pytest.raises(ValueError):
+        await import_archive(tmp_path, b"not an archive" * 10_000, chunk_size=100)
+
+    with pytest.raises(ValueError):
+        await import_archive(tmp_path, b"")
+
+
+@pytest.mark.asyncio
+async def test_ArchiveImporter_abort(tmp_path):
+    importer = ArchiveImporter(tmp_path)
+    await importer.feed(make_archive("tar", {"file.txt": b"x" * 10_000})[:1024])
+
+    importer.abort()
+    await importer.cleanup()
+
+    assert list(tmp_path.iterdir()) == []
+
+
+@pytest.mark.asyncio
+async def test_ArchiveImporter_client_disconnect(tmp_path):
+    # A single thread to detect an extraction blocked forever
+    loop = asyncio.get_event_loop()
+    loop.set_default_executor(concurrent.futures.ThreadPoolExecutor(1))
+    importer = ArchiveImporter(tmp_path)
+    await importer.feed(make_archive("tar", {"file.txt": b"x" * 10_000})[:1024])
+    # Wait for the extraction to block on the next chunk
+    while not importer._queue.empty():
+        await asyncio.sleep(0.01)
+    await asyncio.sleep(0.1)
+
+    importer.abort()
+    await asyncio.wait_for(importer.cleanup(), timeout=5)
+
+    assert list(tmp_path.iterdir()) == []
+    # The executor thread is released
+    assert await asyncio.wait_for(loop.run_in_executor(None, int, "1"), 5) == 1
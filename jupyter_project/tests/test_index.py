@@ -0,0 +1,119 @@
+import json
+import os
+from pathlib import Path
+from unittest import mock
+
+import pytest
+
+from jupyter_project.files import FileTemplate, FileTemplateLoader
+from jupyter_project.index import METADATA_SUFFIX, TemplatesIndex
+
+
+@pytest.fixture
+def templates_dir(tmp_path):
+    folder = tmp_path / "templates"
+    (folder / "sub").mkdir(parents=True)
+    (folder / "file1.py").write_text("def add(a, b):\n    return a + b\n")
+    (folder / "sub" / "file2.py").write_text("# {{ title }}\n")
+    (folder / "sub" / ("file2.py" + METADATA_SUFFIX)).write_text(
+        json.dumps(
+            {
+                "default_name": "{{ title }}",
+                "schema": {"properties": {"title": {"type": "string"}}},
+            }
+        )
+    )
+    (folder / "readme.md").write_text("Not a template")
+    return folder
+
+
+def test_TemplatesIndex_glob(templates_dir):
+    index = TemplatesIndex()
+
+    templates = index.glob(templates_dir, "**/*.py")
+
+    assert templates == {
+        "file1.py": {},
+        "sub/file2.py": {
+            "default_name": "{{ title }}",
+            "schema": {"properties": {"title": {"type": "string"}}},
+        },
+    }
+
+
+def test_TemplatesIndex_persistence(tmp_path, templates_dir):
+    cache_file = tmp_path / "cache" / "index.json"
+    index = TemplatesIndex(cache_file)
+    expected = index.glob(templates_dir, "**/*.py")
+    index.save()
+    assert cache_file.exists()
+
+    index = TemplatesIndex(cache_file)
+    with mock.patch("pathlib.Path.glob") as mock_glob:
+        assert index.glob(templates_dir, "**/*.py") == expected
+    mock_glob.assert_not_called()
+
+
+def test_TemplatesIndex_new_file(tmp_path, templates_dir):
+    cache_file = tmp_path / "index.json"
+    index = TemplatesIndex(cache_file)
+    index.glob(templates_dir, "**/*.py")
+    index.save()
+
+    new_file = templates_dir / "sub" / "file3.py"
+    new_file.write_text("print('hello')\n")
+    # Ensure the directory mtime changes on coarse resolution filesystems
+    stat = os.stat(new_file.parent)
+    os.utime(new_file.parent, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    index = TemplatesIndex(cache_file)
+    assert "sub/file3.py" in index.glob(templates_dir, "**/*.py")
+
+
+def test_TemplatesIndex_metadata_update(tmp_path, templates_dir):
+    cache_file = tmp_path / "index.json"
+    index = TemplatesIndex(cache_file)
+    index.glob(templates_dir, "**/*.py")
+    index.save()
+
+    sidecar = templates_dir / "sub" / ("file2.py" + METADATA_SUFFIX)
+    sidecar.write_text(json.dumps({"template_name": "Title"}))
+    stat = os.stat(sidecar)
+    os.utime(sidecar, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000_000))
+
+    index = TemplatesIndex(cache_file)
+    with mock.patch("pathlib.Path.glob") as mock_glob:
+        templates = index.glob(templates_dir, "**/*.py")
+    mock_glob.assert_not_called()
+    assert templates["sub/file2.py"] == {"template_name": "Title"}
+
+
+def test_FileTemplateLoader_discover_files(templates_dir, caplog):
+    (templates_dir / ("file1.py" + METADATA_SUFFIX)).write_text(
+        json.dumps({"icon": "<notsvg></svg>"})
+    )
+    loader = FileTemplateLoader(
+        name="discovered",
+        location=str(templates_dir),
+        glob="**/*.py",
+        files=[{"template": "readme.md"}],
+    )
+
+    files = loader.discover_files(templates_dir)
+
+    assert files == [
+        FileTemplate(
+            template="sub/file2.py",
+            default_name="{{ title }}",
+            schema={"properties": {"title": {"type": "string"}}},
+        )
+    ]
+    assert "discovered/file1.py" in caplog.text
+
+
+def test_FileTemplateLoader_no_glob(templates_dir):
+    loader = FileTemplateLoader(
+        name="listed", location=str(templates_dir), files=[{"template": "file1.py"}]
+    )
+
+    assert loader.discover_files(templates_dir) == list()
@@ -0,0 +1,74 @@
+from jinja2 import DictLoader
+
+from jupyter_project.jinja2 import CachedEnvironment, TemplateCache, template_size
+
+TEMPLATES = {
+    "small.txt": "Hello {{ name }}",
+    "big.txt": "{% for i in range(10) %}{{ i }}{% endfor %}\n" * 200,
+    "include.txt": "{% include 'small.txt' %} and {% include 'big.txt' %}",
+}
+
+
+def test_template_size():
+    env = CachedEnvironment(loader=DictLoader(TEMPLATES))
+    assert 0 < template_size(env.get_template("small.txt")) < template_size(
+        env.get_template("big.txt")
+    )
+
+
+def test_TemplateCache_max_entries():
+    cache = TemplateCache(max_entries=2)
+    env = CachedEnvironment(loader=DictLoader(TEMPLATES), cache=cache)
+
+    env.get_template("small.txt")
+    env.get_template("big.txt")
+    env.get_template("small.txt")  # small.txt is now the most recently used
+    env.get_template("include.txt")
+
+    assert len(cache) == 2
+    stats = cache.stats()
+    assert stats["entries"] == 2
+    assert stats["hits"] == 1
+    assert stats["misses"] == 3
+    assert stats["evictions"] == 1
+    assert stats["compilations"] == 3
+    assert stats["compileTimeMs"] > 0
+    # big.txt was the least recently used
+    env.get_template("small.txt")
+    assert cache.stats()["hits"] == 2
+
+
+def test_TemplateCache_max_bytes():
+    env = CachedEnvironment(loader=DictLoader(TEMPLATES))
+    small = template_size(env.get_template("small.txt"))
+    big = template_size(env.get_template("big.txt"))
+
+    cache = TemplateCache(max_entries=10, max_bytes=big + small // 2)
+    env = CachedEnvironment(loader=DictLoader(TEMPLATES), cache=cache)
+    env.get_template("big.txt")
+    env.get_template("small.txt")
+
+    stats = cache.stats()
+    # Adding small.txt exceeds the budget; big.txt is evicted
+    assert stats["entries"] == 1
+    assert stats["bytes"] == small
+    assert stats["evictions"] == 1
+
+    cache = TemplateCache(max_entries=10, max_bytes=small)
+    env = CachedEnvironment(loader=DictLoader(TEMPLATES), cache=cache)
+    env.get_template("big.txt")
+    # Template bigger than the budget is not kept
+    assert len(cache) == 0
+
+
+def test_CachedEnvironment_render_include():
+    cache = TemplateCache()
+    env = CachedEnvironment(loader=DictLoader(TEMPLATES), cache=cache)
+    template = env.get_template("include.txt")
+
+    template.render(name="world")
+    template.render(name="world")
+
+    stats = cache.stats()
+    assert stats["compilations"] == 3
+    assert stats["hits"] == 2
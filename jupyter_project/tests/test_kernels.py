@@ -0,0 +1,157 @@
+import asyncio
+import time
+from unittest import mock
+
+import pytest
+
+from jupyter_project.kernels import KernelFilter, KernelPrespawner
+
+
+def spec(environment=None):
+    metadata = {} if environment is None else {"conda_env_name": environment}
+    return {"spec": {"metadata": metadata}}
+
+
+def test_KernelFilter_environment_cache():
+    ksm = mock.MagicMock()
+    ksm.get_all_specs.return_value = {
+        "python3": spec(),
+        "conda-env-a-py": spec("a"),
+        "conda-env-a-r": spec("a"),
+        "conda-env-b-py": spec("b"),
+    }
+    kernel_filter = KernelFilter()
+
+    assert kernel_filter.get_environment_kernels(ksm, "a") == {
+        "conda-env-a-py",
+        "conda-env-a-r",
+    }
+    assert kernel_filter.get_environment_kernels(ksm, "b") == {"conda-env-b-py"}
+    ksm.get_all_specs.assert_called_once()
+
+    # Unknown environment triggers a refresh
+    assert kernel_filter.get_environment_kernels(ksm, "c") == frozenset()
+    assert ksm.get_all_specs.call_count == 2
+
+
+def test_KernelFilter_sessions():
+    kernel_filter = KernelFilter()
+
+    kernel_filter.set_session("s1", {"k1"})
+    kernel_filter.set_session("s2", {"k2"})
+    assert kernel_filter.get_session("s1") == {"k1"}
+    assert kernel_filter.get_session("s2") == {"k2"}
+
+    kernel_filter.clear_session("s1")
+    assert kernel_filter.get_session("s1") is None
+    kernel_filter.set_session("s2", set())
+    assert kernel_filter.get_session("s2") is None
+
+
+def test_KernelFilter_expire():
+    kernel_filter = KernelFilter()
+    kernel_filter.set_session("s1", {"k1"})
+    kernel_filter.set_session("s2", set())
+    kernel_filter.set_session("s3", {"k3"})
+    kernel_filter.clear_session("s3")
+    now = time.monotonic()
+
+    assert kernel_filter.expire(10.0, now) == []
+    kernel_filter.touch("unknown")
+    assert sorted(kernel_filter.expire(10.0, now + 11.0)) == ["s1", "s2"]
+    assert kernel_filter.get_session("s1") is None
+    assert kernel_filter.expire(10.0, now + 11.0) == []
+
+
+def test_KernelFilter_filter_specs():
+    model = {
+        "default": "python3",
+        "kernelspecs": {"python3": {}, "conda-env-a-py": {}, "conda-env-a-r": {}},
+    }
+
+    filtered = KernelFilter().filter_specs(model, {"conda-env-a-r", "conda-env-a-py"})
+
+    assert filtered == {
+        "default": "conda-env-a-py",
+        "kernelspecs": {"conda-env-a-py": {}, "conda-env-a-r": {}},
+    }
+
+
+class FakeKernelManager:
+    def __init__(self):
+        self.kernels = dict()
+        self.started = 0
+
+    async def start_kernel(self, kernel_id=None, path=None, **kwargs):
+        if kernel_id is None:
+            self.started += 1
+            kernel_id = f"kernel-{self.started}"
+            self.kernels[kernel_id] = (path, kwargs.get("kernel_name"))
+        return kernel_id
+
+    async def shutdown_kernel(self, kernel_id):
+        del self.kernels[kernel_id]
+
+    def __contains__(self, kernel_id):
+        return kernel_id in self.kernels
+
+
+@pytest.mark.asyncio
+async def test_KernelPrespawner_adopt():
+    manager = FakeKernelManager()
+    prespawner = KernelPrespawner(manager, 10.0)
+
+    await prespawner.spawn("session", "/project/notebooks", "python3")
+    await prespawner.spawn("other-session", "project/notebooks", "python3")
+    assert manager.kernels == {"kernel-1": ("project/notebooks", "python3")}
+
+    # Different kernel or folder starts a new kernel
+    kernel_id = await manager.start_kernel(path="project/notebooks", kernel_name="r")
+    assert kernel_id == "kernel-2"
+    kernel_id = await manager.start_kernel(path="project", kernel_name="python3")
+    assert kernel_id == "kernel-3"
+    # Same kernel and folder adopts the prespawned kernel once
+    assert (
+        await manager.start_kernel(path="project/notebooks", kernel_name="python3")
+        == "kernel-1"
+    )
+    assert (
+        await manager.start_kernel(path="project/notebooks", kernel_name="python3")
+        == "kernel-4"
+    )
+
+
+@pytest.mark.asyncio
+async def test_KernelPrespawner_timeout():
+    manager = FakeKernelManager()
+    prespawner = KernelPrespawner(manager, 0.05)
+
+    await prespawner.spawn("session", "project", "python3")
+    assert "kernel-1" in manager
+    await asyncio.sleep(0.2)
+
+    assert "kernel-1" not in manager
+    assert prespawner.adopt("project") is None
+
+
+@pytest.mark.asyncio
+async def test_KernelPrespawner_close():
+    manager = FakeKernelManager()
+    prespawner = KernelPrespawner(manager, 10.0)
+    await prespawner.spawn("session1", "project", "python3")
+    await prespawner.spawn("session2", "project", "python3")
+
+    # Still used by the second session
+    prespawner.close("session1")
+    await asyncio.sleep(0)
+    assert "kernel-1" in manager
+
+    prespawner.close("session2")
+    await asyncio.sleep(0.01)
+    assert "kernel-1" not in manager
+
+    # Opening another project releases the previous kernel
+    await prespawner.spawn("session1", "project", "python3")
+    await prespawner.spawn("session1", "other", "python3")
+    await asyncio.sleep(0.01)
+    assert list(manager.kernels) == ["kernel-3"]
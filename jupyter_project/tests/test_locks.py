@@ -0,0 +1,80 @@
+import asyncio
+from unittest import mock
+
+import pytest
+
+from jupyter_project.locks import PathLocks
+
+
+async def _worker(locks, path, events, delay=0.01):
+    async with locks.lock(path):
+        events.append(("enter", path))
+        await asyncio.sleep(delay)
+        events.append(("exit", path))
+
+
+@pytest.mark.asyncio
+async def test_PathLocks_same_path(tmp_path):
+    locks = PathLocks()
+    events = list()
+
+    await asyncio.gather(*[_worker(locks, tmp_path / "a", events) for _ in range(10)])
+
+    # Same path requests are serialized
+    assert events == [("enter", tmp_path / "a"), ("exit", tmp_path / "a")] * 10
+    assert len(locks) == 0
+
+
+@pytest.mark.asyncio
+async def test_PathLocks_different_paths(tmp_path):
+    locks = PathLocks()
+    events = list()
+    paths = [tmp_path / str(i) for i in range(10)]
+
+    await asyncio.gather(*[_worker(locks, path, events) for path in paths])
+
+    # Different path requests run in parallel
+    assert [e[0] for e in events[:10]] == ["enter"] * 10
+    assert len(locks) == 0
+
+
+@pytest.mark.asyncio
+async def test_PathLocks_normalized_path(tmp_path):
+    locks = PathLocks()
+    events = list()
+
+    await asyncio.gather(
+        _worker(locks, tmp_path / "a", events),
+        _worker(locks, str(tmp_path / "b" / ".." / "a"), events),
+    )
+
+    assert [e[0] for e in events] == ["enter", "exit", "enter", "exit"]
+
+
+@pytest.mark.asyncio
+async def test_PathLocks_release_on_error(tmp_path):
+    locks = PathLocks()
+
+    with pytest.raises(RuntimeError):
+        async with locks.lock(tmp_path):
+            raise RuntimeError()
+
+    assert len(locks) == 0
+    async with locks.lock(tmp_path):
+        pass
+
+
+@pytest.mark.asyncio
+async def test_PathLocks_single_lock_per_path(tmp_path):
+    locks = PathLocks()
+    events = list()
+
+    with mock.patch(
+        "jupyter_project.locks.asyncio.Lock", wraps=asyncio.Lock
+    ) as lock_class:
+        await asyncio.gather(
+            *[_worker(locks, tmp_path / "a", events) for _ in range(10)]
+        )
+
+    # The lock is created only for the first request
+    assert lock_class.call_count == 1
@@ -0,0 +1,208 @@
+import json
+import os
+from unittest import mock
+
+import pytest
+
+from jupyter_project.manifest import (
+    MANIFEST_FILENAME,
+    STAT_PREFIX,
+    apply_update,
+    build_manifest,
+    hash_file,
+    list_files,
+    read_manifest,
+    stat_file,
+    write_manifest,
+)
+
+
+@pytest.fixture
+def rendered(tmp_path):
+    root = tmp_path / "project"
+    (root / "src").mkdir(parents=True)
+    (root / "README.md").write_text("# Project\n")
+    (root / "src" / "main.py").write_text("print('hello')\n")
+    (root / "config.json").write_text("{}")
+    os.symlink("README.md", root / "link.md")
+    return root
+
+
+def test_hash_file(tmp_path):
+    a = tmp_path / "a.txt"
+    a.write_text("content")
+    b = tmp_path / "b.txt"
+    b.write_text("content")
+    link = tmp_path / "link"
+    os.symlink("a.txt", link)
+
+    assert hash_file(a) == hash_file(b)
+    assert hash_file(link) != hash_file(a)
+    assert hash_file(tmp_path / "missing") is None
+
+
+def test_stat_file(tmp_path):
+    a = tmp_path / "a.bin"
+    a.write_bytes(b"content")
+    b = tmp_path / "b.bin"
+    b.write_bytes(b"content")
+    status = a.stat()
+    os.utime(b, ns=(status.st_atime_ns, status.st_mtime_ns))
+
+    assert stat_file(a).startswith(STAT_PREFIX)
+    assert stat_file(a) == stat_file(b)
+    a.write_bytes(b"new content")
+    assert stat_file(a) != stat_file(b)
+    assert stat_file(tmp_path / "missing") is None
+
+
+def test_list_files(rendered):
+    (rendered / MANIFEST_FILENAME).write_text("{}")
+
+    assert list_files(rendered, exclude=[MANIFEST_FILENAME, "config.json"]) == [
+        "README.md",
+        "link.md",
+        "src/main.py",
+    ]
+
+
+def test_build_manifest(rendered):
+    manifest = build_manifest(rendered, {"name": "project"}, exclude=["config.json"])
+
+    assert manifest["version"] == 1
+    assert manifest["params"] == {"name": "project"}
+    assert sorted(manifest["files"]) == ["README.md", "link.md", "src/main.py"]
+    assert manifest["files"]["README.md"] == hash_file(rendered / "README.md")
+
+
+def test_build_manifest_copied(rendered):
+    with mock.patch("jupyter_project.manifest.hash_file", return_value="hash"):
+        manifest = build_manifest(rendered, dict(), copied=["src/main.py"])
+
+    assert manifest["files"]["src/main.py"] == stat_file(rendered / "src" / "main.py")
+    assert manifest["files"]["README.md"] == "hash"
+
+
+def test_read_write_manifest(rendered):
+    with pytest.raises(ValueError):
+        read_manifest(rendered)
+
+    manifest = build_manifest(rendered, {"name": "project"})
+    write_manifest(rendered, manifest)
+
+    assert read_manifest(rendered) == manifest
+    # No temporary file left
+    assert [p.name for p in rendered.glob(f"{MANIFEST_FILENAME}*")] == [
+        MANIFEST_FILENAME
+    ]
+
+    (rendered / MANIFEST_FILENAME).write_text(json.dumps({"version": 42}))
+    with pytest.raises(ValueError):
+        read_manifest(rendered)
+
+
+def test_apply_update(tmp_path, rendered):
+    manifest = build_manifest(rendered, {"name": "project"}, exclude=["config.json"])
+    (rendered / "src" / "main.py").write_text("print('modified')\n")
+    (rendered / "notes.txt").write_text("user file")
+    (rendered / "config.json").write_text('{"name": "project"}')
+
+    staging = tmp_path / "staging"
+    (staging / "src").mkdir(parents=True)
+    (staging / "docs").mkdir()
+    (staging / "README.md").write_text("# New Project\n")
+    (staging / "src" / "main.py").write_text("print('new')\n")
+    (staging / "docs" / "index.md").write_text("# Doc\n")
+    (staging / "config.json").write_text("{}")
+    readme = hash_file(staging / "README.md")
+    main = manifest["files"]["src/main.py"]
+
+    changes = apply_update(rendered, staging, manifest, exclude=["config.json"])
+
+    assert changes == {
+        "added": ["docs/index.md"],
+        "updated": ["README.md"],
+        "removed": ["link.md"],
+        "conflicts": ["src/main.py"],
+    }
+    assert (rendered / "README.md").read_text() == "# New Project\n"
+    assert (rendered / "docs" / "index.md").read_text() == "# Doc\n"
+    assert not os.path.lexists(rendered / "link.md")
+    # The project modifications are kept
+    assert (rendered / "src" / "main.py").read_text() == "print('modified')\n"
+    assert (rendered / "notes.txt").read_text() == "user file"
+    assert (rendered / "config.json").read_text() == '{"name": "project"}'
+    # The conflicting file keeps its original hash
+    assert manifest["files"] == {
+        "README.md": readme,
+        "docs/index.md": hash_file(rendered / "docs" / "index.md"),
+        "src/main.py": main,
+    }
+
+
+def test_apply_update_unchanged(tmp_path, rendered):
+    manifest = build_manifest(rendered, {"name": "project"})
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    # Removed by the template and in the project
+    (rendered / "link.md").unlink()
+    for name in ("README.md", "config.json", "src/main.py"):
+        (staging / name).parent.mkdir(parents=True, exist_ok=True)
+        (staging / name).write_bytes((rendered / name).read_bytes())
+    # Same change in the template and in the project
+    (rendered / "config.json").write_text('{"a": 1}')
+    (staging / "config.json").write_text('{"a": 1}')
+    mtime = (rendered / "README.md").stat().st_mtime_ns
+
+    changes = apply_update(rendered, staging, manifest)
+
+    assert changes == {"added": [], "updated": [], "removed": [], "conflicts": []}
+    assert (rendered / "README.md").stat().st_mtime_ns == mtime
+    assert "link.md" not in manifest["files"]
+    assert manifest["files"]["config.json"] == hash_file(staging / "config.json")
+
+
+def test_apply_update_remove_empty_folder(tmp_path, rendered):
+    manifest = build_manifest(rendered, {"name": "project"})
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    for name in ("README.md", "config.json"):
+        (staging / name).write_bytes((rendered / name).read_bytes())
+    os.symlink("README.md", staging / "link.md")
+
+    changes = apply_update(rendered, staging, manifest)
+
+    assert changes["removed"] == ["src/main.py"]
+    assert not (rendered / "src").exists()
+
+
+def test_apply_update_copied(tmp_path, rendered):
+    manifest = build_manifest(rendered, dict(), copied=["src/main.py"])
+    staging = tmp_path / "staging"
+    staging.mkdir()
+    for name in ("README.md", "config.json", "link.md", "src/main.py"):
+        source = rendered / name
+        (staging / name).parent.mkdir(parents=True, exist_ok=True)
+        if name == "link.md":
+            os.symlink(os.readlink(source), staging / name)
+        else:
+            (staging / name).write_bytes(source.read_bytes())
+            status = source.stat()
+            os.utime(staging / name, ns=(status.st_atime_ns, status.st_mtime_ns))
+
+    with mock.patch(
+        "jupyter_project.manifest.hash_file", wraps=hash_file
+    ) as hash_mock:
+        changes = apply_update(rendered, staging, manifest, copied=["src/main.py"])
+
+    assert changes == {"added": [], "updated": [], "removed": [], "conflicts": []}
+    # The copied file is not read
+    assert staging / "src" / "main.py" not in {c.args[0] for c in hash_mock.mock_calls}
+
+    # New template revision of the copied file
+    (staging / "src" / "main.py").write_text("print('new')\n")
+    changes = apply_update(rendered, staging, manifest, copied=["src/main.py"])
+
+    assert changes["updated"] == ["src/main.py"]
+    assert (rendered / "src" / "main.py").read_text() == "print('new')\n"
+    assert manifest["files"]["src/main.py"] == stat_file(rendered / "src" / "main.py")
@@ -0,0 +1,54 @@
+import pytest
+
+from jupyter_project.mergepatch import merge_diff, merge_patch
+
+@pytest.mark.parametrize(
+    "source, target, patch",
+    (
+        (dict(a=1), dict(a=1), dict()),
+        (dict(a=1), dict(a=2), dict(a=2)),
+        (dict(a=1), dict(), dict(a=None)),
+        (dict(), dict(a=[1, 2]), dict(a=[1, 2])),
+        (dict(a=dict(b=1, c=2)), dict(a=dict(b=1, c=3)), dict(a=dict(c=3))),
+        (dict(a=dict(b=1)), dict(a=dict()), dict(a=dict(b=None))),
+        (dict(a=dict(b=1)), dict(a="b"), dict(a="b")),
+        (dict(a=[1, 2]), dict(a=[1]), dict(a=[1])),
+    ),
+)
+def test_merge_diff(source, target, patch):
+    assert merge_diff(source, target) == patch
+
+
+@pytest.mark.parametrize(
+    "target, patch, result",
+    (
+        # Examples from RFC 7386 Appendix A
+        (dict(a="b"), dict(a="c"), dict(a="c")),
+        (dict(a="b"), dict(b="c"), dict(a="b", b="c")),
+        (dict(a="b"), dict(a=None), dict()),
+        (dict(a="b", b="c"), dict(a=None), dict(b="c")),
+        (dict(a=["b"]), dict(a="c"), dict(a="c")),
+        (dict(a="c"), dict(a=["b"]), dict(a=["b"])),
+        (dict(a=dict(b="c")), dict(a=dict(b="d", c=None)), dict(a=dict(b="d"))),
+        (dict(a=[dict(b="c")]), dict(a=[1]), dict(a=[1])),
+        (dict(e=None), dict(a=1), dict(e=None, a=1)),
+        (dict(), dict(a=dict(bb=dict(ccc=None))), dict(a=dict(bb=dict()))),
+    ),
+)
+def test_merge_patch(target, patch, result):
+    original = repr(target)
+    assert merge_patch(target, patch) == result
+    # Target is not modified
+    assert repr(target) == original
+
+
+@pytest.mark.parametrize(
+    "source, target",
+    (
+        (dict(name="p", environment="env1"), dict(name="p", environment="env2")),
+        (dict(a=dict(b=1, c=[1])), dict(a=dict(c=[2]), d="e")),
+        (dict(a=1, b=2), dict()),
+    ),
+)
+def test_merge_patch_roundtrip(source, target):
+    assert merge_patch(source, merge_diff(source, target)) == target
@@ -0,0 +1,143 @@
+import asyncio
+import json
+from pathlib import Path
+
+import nbformat
+import pytest
+from jinja2 import DictLoader, Environment, TemplateSyntaxError
+
+from jupyter_project.jinja2 import CachedEnvironment, template_size
+from jupyter_project.nbtemplate import NotebookTemplate, load_notebook_template
+
+EXAMPLE = Path(__file__).parents[1] / "examples" / "example.ipynb"
+
+PARAMS = dict(
+    exampleBoolean=True,
+    exampleList=[1, 2],
+    exampleNumber=42,
+    exampleObject={"a": 1},
+    exampleString='say "hello"',
+    jproject={"name": "Project"},
+)
+
+
+def test_NotebookTemplate_render():
+    env = CachedEnvironment()
+    source = EXAMPLE.read_text()
+    compilations = env.cache.stats()["compilations"]
+
+    template = NotebookTemplate(env, "example.ipynb", source)
+
+    assert template.name == "example.ipynb"
+    assert template.dynamic_cells == 6
+    assert env.cache.stats()["compilations"] == compilations + 6
+
+    content = template.render(**PARAMS)
+
+    notebook = nbformat.reads(content, as_version=4)
+    nbformat.validate(notebook)
+    assert notebook.cells[0].source == "# Examples of parameters in Project"
+    # The values are JSON escaped
+    assert notebook.cells[5].source == (
+        "string = 'say \"hello\"'\nassert isinstance(string, str)"
+    )
+    # Same layout as nbformat
+    assert content == nbformat.writes(notebook) + "\n"
+
+
+def test_NotebookTemplate_static_cells():
+    output = nbformat.v4.new_output(
+        "execute_result",
+        data={"text/plain": "{'a': 1}", "image/png": "iVBORw0KGgo="},
+        execution_count=1,
+    )
+    notebook = nbformat.v4.new_notebook(
+        cells=[
+            nbformat.v4.new_markdown_cell("# {{ title }}"),
+            nbformat.v4.new_code_cell("x = {'a': 1}\nx", outputs=[output]),
+            nbformat.v4.new_raw_cell("é"),
+        ]
+    )
+    source = nbformat.writes(notebook)
+    env = Environment()
+
+    template = NotebookTemplate(env, "static.ipynb", source)
+
+    assert template.dynamic_cells == 1
+    rendered = nbformat.reads(template.render(title="Title"), as_version=4)
+    nbformat.validate(rendered)
+    assert rendered.cells[0].source == "# Title"
+    assert rendered.cells[1] == notebook.cells[1]
+    assert rendered.cells[2].source == "é"
+    assert rendered.metadata == notebook.metadata
+
+
+def test_NotebookTemplate_render_async():
+    env = Environment(enable_async=True)
+    template = NotebookTemplate(env, "example.ipynb", EXAMPLE.read_text())
+
+    content = asyncio.run(template.render_async(**PARAMS))
+
+    sync_template = NotebookTemplate(Environment(), "example.ipynb", EXAMPLE.read_text())
+    assert content == sync_template.render(**PARAMS)
+
+
+def test_NotebookTemplate_empty():
+    source = nbformat.writes(nbformat.v4.new_notebook())
+
+    template = NotebookTemplate(Environment(), "empty.ipynb", source)
+
+    nbformat.validate(nbformat.reads(template.render(), as_version=4))
+
+
+@pytest.mark.parametrize(
+    "source, error",
+    [
+        ("not json", ValueError),
+        ("[]", ValueError),
+        (json.dumps({"metadata": {}}), ValueError),
+        (
+            nbformat.writes(
+                nbformat.v4.new_notebook(
+                    cells=[nbformat.v4.new_code_cell("{% if a %}")]
+                )
+            ),
+            TemplateSyntaxError,
+        ),
+    ],
+)
+def test_NotebookTemplate_invalid(source, error):
+    with pytest.raises(error):
+        NotebookTemplate(Environment(), "invalid.ipynb", source)
+
+
+def test_load_notebook_template():
+    env = Environment(loader=DictLoader({"example.ipynb": EXAMPLE.read_text()}))
+
+    template = load_notebook_template(env, "example.ipynb")
+
+    assert template.environment is env
+    assert template.name == "example.ipynb"
+    assert template.dynamic_cells == 6
+
+
+def test_load_notebook_template_cached():
+    templates = {"example.ipynb": EXAMPLE.read_text()}
+    env = CachedEnvironment(loader=DictLoader(templates))
+
+    template = load_notebook_template(env, "example.ipynb")
+
+    assert load_notebook_template(env, "example.ipynb") is template
+    stats = env.cache.stats()
+    assert stats["entries"] == 1
+    assert stats["bytes"] == template_size(template)
+    assert template_size(template) > template.static_size > 0
+
+    # Loaded again once changed
+    templates["example.ipynb"] = nbformat.writes(
+        nbformat.v4.new_notebook(cells=[nbformat.v4.new_code_cell("{{ a }}")])
+    )
+    changed = load_notebook_template(env, "example.ipynb")
+    assert changed is not template
+    assert changed.dynamic_cells == 1
+    assert env.cache.stats()["entries"] == 1
@@ -1,22 +1,36 @@
+import io
+import hashlib
+import itertools
 import json
 import logging
 import os
 import re
+import stat
+import subprocess
 import sys
+import tarfile
 import tempfile
+import threading
+import time
 import uuid
+import zipfile
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 from unittest import mock
 from urllib.parse import quote
 
 import jsonschema
 import pytest
+import requests
 import tornado
 from cookiecutter.exceptions import CookiecutterException
 from jupyter_client.kernelspec import KernelSpecManager
 from traitlets import TraitError
 from traitlets.config import Config
 
+from jupyter_project.git import GitError
+from jupyter_project.kernels import SESSION_COOKIE, SESSION_HEADER
+from jupyter_project.manifest import MANIFEST_FILENAME, STAT_PREFIX, read_manifest
 from jupyter_project.project import ProjectTemplate
 from utils import ServerTest, assert_http_error, url_path_join, generate_path
 
@@ -82,6 +96,171 @@ def test_ProjectTemplate_get_configuration(tmp_path, kwargs, configuration, exce
             tpl.get_configuration(tmp_path)
 
 
+def test_ProjectTemplate_update_configuration(tmp_path):
+    tpl = ProjectTemplate(template="https://github.com/me/my-template")
+    conf_file = tmp_path / tpl.configuration_filename
+    conf_file.write_text(json.dumps(dict(name="project", environment="env1", a=1)))
+    etag = tpl.get_configuration_etag(tmp_path)
+    assert etag is not None
+    # Tag is stable
+    assert etag == tpl.get_configuration_etag(tmp_path)
+
+    configuration = tpl.update_configuration(
+        tmp_path, dict(environment="env2", a=None)
+    )
+
+    assert configuration == dict(name="project", environment="env2")
+    assert json.loads(conf_file.read_text()) == configuration
+    assert tpl.get_configuration_etag(tmp_path) != etag
+    # No temporary file left
+    assert sorted(p.name for p in tmp_path.iterdir()) == [tpl.configuration_filename]
+
+
+@pytest.mark.parametrize("mode", [0o644, 0o640, 0o600])
+def test_ProjectTemplate_update_configuration_mode(tmp_path, mode):
+    tpl = ProjectTemplate(template="https://github.com/me/my-template")
+    conf_file = tmp_path / tpl.configuration_filename
+    conf_file.write_text(json.dumps(dict(name="project")))
+    conf_file.chmod(mode)
+
+    tpl.update_configuration(tmp_path, dict(environment="env"))
+
+    assert stat.S_IMODE(conf_file.stat().st_mode) == mode
+    # Same format as the rendered configuration
+    assert conf_file.read_text() == json.dumps(dict(name="project", environment="env"))
+
+
+def test_ProjectTemplate_update_configuration_invalid(tmp_path):
+    tpl = ProjectTemplate(template="https://github.com/me/my-template")
+    conf_file = tmp_path / tpl.configuration_filename
+    content = json.dumps(dict(name="project"))
+    conf_file.write_text(content)
+
+    with pytest.raises(jsonschema.ValidationError):
+        tpl.update_configuration(tmp_path, dict(name=None))
+
+    assert conf_file.read_text() == content
+    assert sorted(p.name for p in tmp_path.iterdir()) == [tpl.configuration_filename]
+
+
+def test_ProjectTemplate_update_configuration_no_file(tmp_path):
+    tpl = ProjectTemplate(template="https://github.com/me/my-template")
+
+    assert tpl.get_configuration_etag(tmp_path) is None
+    with pytest.raises(ValueError):
+        tpl.update_configuration(tmp_path, dict(name="project"))
+
+
+def test_ProjectTemplate_clone(tmp_path):
+    tpl = ProjectTemplate(template="https://github.com/me/my-template", copy_mode="copy")
+    source = tmp_path / "source"
+    (source / "src").mkdir(parents=True)
+    (source / tpl.configuration_filename).write_text(
+        json.dumps(dict(name="Source", environment="env1"))
+    )
+    (source / "src" / "main.py").write_text("print('hello')")
+    (source / MANIFEST_FILENAME).write_text(
+        json.dumps(
+            dict(version=1, params=dict(name="source", version="2"), files=dict())
+        )
+    )
+    destination = tmp_path / "projects" / "my_variant"
+
+    configuration = tpl.clone(source, destination, dict(environment="env2"))
+
+    assert configuration == dict(name="My variant", environment="env2")
+    assert tpl.get_configuration(destination) == configuration
+    assert (destination / "src" / "main.py").read_text() == "print('hello')"
+    assert tpl.get_configuration(source) == dict(name="Source", environment="env1")
+    # The clone is updated with its own name
+    assert read_manifest(destination)["params"] == dict(name="my_variant", version="2")
+    assert read_manifest(source)["params"] == dict(name="source", version="2")
+    # No staging folder left
+    assert [p.name for p in destination.parent.iterdir()] == ["my_variant"]
+
+    with pytest.raises(FileExistsError):
+        tpl.clone(source, destination)
+    assert [p.name for p in destination.parent.iterdir()] == ["my_variant"]
+
+
+def test_ProjectTemplate_clone_invalid(tmp_path):
+    tpl = ProjectTemplate(template="https://github.com/me/my-template")
+    source = tmp_path / "source"
+    source.mkdir()
+
+    with pytest.raises(ValueError):
+        tpl.clone(source, tmp_path / "destination")
+    assert not (tmp_path / "destination").exists()
+
+    (source / tpl.configuration_filename).write_text(json.dumps(dict(name="Source")))
+    with pytest.raises(jsonschema.ValidationError):
+        tpl.clone(source, tmp_path / "destination", dict(name=None))
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["source"]
+
+
+def test_ProjectTemplate_update(tmp_path):
+    template = tmp_path / "template"
+    folder = template / "{{ cookiecutter.name }}"
+    (folder / "src").mkdir(parents=True)
+    (template / "cookiecutter.json").write_text(
+        json.dumps({"name": "project", "version": "1"})
+    )
+    (folder / "README.md").write_text("# {{ cookiecutter.name }}\n")
+    (folder / "src" / "main.py").write_text("VERSION = '{{ cookiecutter.version }}'\n")
+    (folder / "setup.py").write_text("# v1\n")
+    (folder / "logo.png").write_bytes(bytes(range(256)) * 64)
+    tpl = ProjectTemplate(template=str(template))
+    output = tmp_path / "output"
+
+    folder_name, _ = tpl.render({"name": "my_project", "version": "2"}, output)
+
+    project = output / folder_name
+    manifest = json.loads((project / MANIFEST_FILENAME).read_text())
+    assert manifest["params"] == {"name": "my_project", "version": "2"}
+    assert sorted(manifest["files"]) == [
+        "README.md",
+        "logo.png",
+        "setup.py",
+        "src/main.py",
+    ]
+    # The files copied without rendering are not hashed
+    assert manifest["files"]["logo.png"].startswith(STAT_PREFIX)
+    assert not manifest["files"]["README.md"].startswith(STAT_PREFIX)
+
+    # New template revision
+    (folder / "README.md").write_text("# {{ cookiecutter.name }} v2\n")
+    (folder / "setup.py").write_text("# v2\n")
+    (folder / "LICENSE").write_text("MIT\n")
+    # Project modifications
+    (project / "setup.py").write_text("# modified\n")
+    mtime = (project / "src" / "main.py").stat().st_mtime_ns
+
+    changes = tpl.update(project)
+
+    assert changes == {
+        "added": ["LICENSE"],
+        "updated": ["README.md"],
+        "removed": [],
+        "conflicts": ["setup.py"],
+    }
+    assert (project / "README.md").read_text() == "# my_project v2\n"
+    assert (project / "setup.py").read_text() == "# modified\n"
+    assert (project / "src" / "main.py").stat().st_mtime_ns == mtime
+    assert (project / "logo.png").read_bytes() == bytes(range(256)) * 64
+    assert json.loads((project / tpl.configuration_filename).read_text()) == {
+        "name": "My project"
+    }
+    # No staging folder left
+    assert [p.name for p in output.iterdir()] == ["my_project"]
+
+
+def test_ProjectTemplate_update_no_manifest(tmp_path):
+    tpl = ProjectTemplate(template="https://github.com/me/my-template")
+
+    with pytest.raises(ValueError):
+        tpl.update(tmp_path)
+
+
 @pytest.mark.parametrize(
     "kwargs, nfolder",
     [
@@ -240,7 +419,9 @@ class TestProjectTemplate(ServerTest):
         assert answer.status_code == 200
         conf = answer.json()
         assert conf == {"project": None}
-        assert self.notebook.kernel_spec_manager.whitelist == set()
+        # The global whitelist is not modified
+        assert self.notebook.kernel_spec_manager.whitelist == {"tic", "tac"}
+        assert SESSION_COOKIE in answer.cookies
 
     def test_project_get_no_configuration(self):
         path = generate_path()
@@ -270,7 +451,7 @@ class TestProjectTemplate(ServerTest):
 
         mock_configuration.assert_called_once_with(Path(self.notebook_dir) / path)
 
-    def test_project_get_set_whitelist(self):
+    def test_project_get_set_session_kernels(self):
         path = generate_path()
         env_name = "banana"
         kernel_name = "conda-kernel-myname"
@@ -294,12 +475,128 @@ class TestProjectTemplate(ServerTest):
                 )
                 answer = self.api_tester.get(["projects", path])
                 assert answer.status_code == 200
+                cookies = answer.cookies
+
+                # Reopening a project with a known environment does not list the specs
+                answer = self.request(
+                    "GET",
+                    url_path_join(self.api_tester.url, "projects", path),
+                    cookies=cookies,
+                )
+                assert answer.status_code == 200
 
         mocked_specs.get_all_specs.assert_called_once()
-        assert mocked_specs.whitelist == {
-            kernel_name,
-        }
-        mock_configuration.assert_called_once_with(Path(self.notebook_dir) / path)
+        assert not isinstance(mocked_specs.whitelist, set)
+        assert self.notebook.kernel_spec_manager.whitelist == {"tic", "tac"}
+        mock_configuration.assert_called_with(Path(self.notebook_dir) / path)
+
+        # Kernel specs listing is filtered for the project session only
+        self.notebook.kernel_spec_manager.whitelist = set()
+        specs = self.request("GET", "api/kernelspecs", cookies=cookies).json()
+        assert specs["kernelspecs"] == {}
+        specs = self.request("GET", "api/kernelspecs").json()
+        assert len(specs["kernelspecs"]) > 0
+
+        # Closing the project allows all kernels
+        answer = self.request(
+            "GET", url_path_join(self.api_tester.url, "projects"), cookies=cookies
+        )
+        assert answer.status_code == 200
+        specs = self.request("GET", "api/kernelspecs", cookies=cookies).json()
+        assert len(specs["kernelspecs"]) > 0
+
+    def test_project_get_session_per_tab(self):
+        path = generate_path()
+        env_name = "cherry"
+        kernel_name = "conda-kernel-myname"
+        self.notebook.kernel_spec_manager.whitelist = set()
+        # Both tabs share the browser cookie
+        cookies = self.api_tester.get(["projects",]).cookies
+        tab_a = {SESSION_HEADER: "tab-a"}
+        tab_b = {SESSION_HEADER: "tab-b"}
+
+        with mock.patch(
+            "jupyter_project.handlers.ProjectTemplate.get_configuration"
+        ) as mock_configuration:
+            mock_configuration.return_value = {"environment": env_name}
+            with mock.patch(
+                "jupyter_project.handlers.ProjectsHandler.kernel_spec_manager"
+            ) as mocked_specs:
+                mocked_specs.get_all_specs.return_value = {
+                    kernel_name: {"spec": {"metadata": {"conda_env_name": env_name}}}
+                }
+                answer = self.request(
+                    "GET",
+                    url_path_join(self.api_tester.url, "projects", path),
+                    cookies=cookies,
+                    headers=dict(tab_a),
+                )
+                assert answer.status_code == 200
+                assert SESSION_COOKIE not in answer.cookies
+
+        # Only the tab having opened the project is filtered
+        answer = self.request(
+            "GET", "api/kernelspecs", cookies=cookies, headers=dict(tab_a)
+        )
+        assert answer.json()["kernelspecs"] == {}
+        # The Etag is the one of the filtered listing
+        etag = answer.headers["Etag"]
+        assert etag == '"{}"'.format(hashlib.sha1(answer.content).hexdigest())
+        answer = self.request(
+            "GET",
+            "api/kernelspecs",
+            cookies=cookies,
+            headers={"If-None-Match": etag, **tab_a},
+        )
+        assert answer.status_code == 304
+        answer = self.request(
+            "GET",
+            "api/kernelspecs",
+            cookies=cookies,
+            headers={"If-None-Match": etag, **tab_b},
+        )
+        assert answer.status_code == 200
+        assert len(answer.json()["kernelspecs"]) > 0
+        specs = self.request(
+            "GET",
+            "api/kernelspecs",
+            cookies=cookies,
+            params={"project_session": "tab-a"},
+        ).json()
+        assert specs["kernelspecs"] == {}
+
+        # Starting a kernel not allowed for the session is rejected
+        answer = self.request(
+            "POST",
+            "api/kernels",
+            cookies=cookies,
+            headers=dict(tab_a),
+            data=json.dumps({"name": "python3"}),
+        )
+        assert answer.status_code == 403
+        assert len(self.request("GET", "api/kernels").json()) == 0
+        answer = self.request(
+            "POST",
+            "api/kernels",
+            cookies=cookies,
+            headers=dict(tab_b),
+            data=json.dumps({"name": "python3"}),
+        )
+        assert answer.status_code == 201
+        self.request("DELETE", url_path_join("api/kernels", answer.json()["id"]))
+
+        # Closing the project allows all kernels
+        answer = self.request(
+            "GET",
+            url_path_join(self.api_tester.url, "projects"),
+            cookies=cookies,
+            headers=dict(tab_a),
+        )
+        assert answer.status_code == 200
+        specs = self.request(
+            "GET", "api/kernelspecs", cookies=cookies, headers=dict(tab_a)
+        ).json()
+        assert len(specs["kernelspecs"]) > 0
 
     def test_project_get_no_conda(self):
         path = generate_path()
@@ -364,7 +661,7 @@ class TestProjectTemplate(ServerTest):
         assert answer.status_code == 200
         conf = answer.json()
         assert conf == {"project": None}
-        assert self.notebook.kernel_spec_manager.whitelist == set()
+        assert self.notebook.kernel_spec_manager.whitelist == {"tic", "tac"}
 
     def test_project_post(self):
         path = generate_path()
@@ -383,6 +680,57 @@ class TestProjectTemplate(ServerTest):
 
         mock_render.assert_called_once_with(body, Path(self.notebook_dir) / path)
 
+    def test_project_post_update_folder(self):
+        # A folder named update in a project is not an update request
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        project.mkdir(parents=True)
+        (project / "my-project.json").write_text(json.dumps({"name": "project"}))
+        body = dict(name="Project Name")
+        configuration = dict(name="Project Name")
+
+        with mock.patch(
+            "jupyter_project.handlers.ProjectTemplate.render"
+        ) as mock_render, mock.patch(
+            "jupyter_project.handlers.ProjectTemplate.update"
+        ) as mock_update:
+            mock_render.return_value = ("project_name", configuration)
+            answer = self.api_tester.post(["projects", path, "update"], body=body)
+            assert answer.status_code == 201
+            assert answer.json() == {"project": configuration}
+
+        mock_render.assert_called_once_with(body, project / "update")
+        mock_update.assert_not_called()
+
+    def test_project_post_concurrent(self):
+        path = generate_path()
+        n_requests = 5
+        lock = threading.Lock()
+        renders = {"active": 0, "max": 0}
+
+        def render(params, realpath):
+            with lock:
+                renders["active"] += 1
+                renders["max"] = max(renders["max"], renders["active"])
+            # Let the other requests start rendering the same project
+            time.sleep(0.1)
+            (realpath / "project_name").mkdir(parents=True, exist_ok=True)
+            with lock:
+                renders["active"] -= 1
+            return "project_name", dict(params)
+
+        def create(_):
+            return self.api_tester.post(["projects", path], body={"name": "Project"})
+
+        with mock.patch(
+            "jupyter_project.handlers.ProjectTemplate.render", side_effect=render
+        ), ThreadPoolExecutor(max_workers=n_requests) as executor:
+            answers = list(executor.map(create, range(n_requests)))
+
+        assert [answer.status_code for answer in answers] == [201] * n_requests
+        # The renders of the same project are serialized
+        assert renders["max"] == 1
+
     def test_project_post_cookiecutter_failure(self):
         path = generate_path()
         body = dict(dummy="hello", smart="world")
@@ -411,6 +759,413 @@ class TestProjectTemplate(ServerTest):
 
         mock_render.assert_called_once_with(body, Path(self.notebook_dir) / path)
 
+    def test_project_events(self):
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        project.mkdir(parents=True)
+        conf_file = project / "my-project.json"
+        conf_file.write_text(json.dumps({"name": "project", "environment": "env1"}))
+
+        answer = self.request("GET", "jupyter-project/events", stream=True, timeout=10)
+        assert answer.status_code == 200
+        assert answer.headers["Content-Type"] == "text/event-stream"
+        lines = answer.iter_lines(decode_unicode=True)
+        assert next(lines) == ": connected"
+
+        # Opening the project starts watching its configuration
+        self.api_tester.get(["projects", path])
+        conf_file.write_text(
+            json.dumps({"name": "project", "environment": "env2", "count": 1})
+        )
+        event = list(itertools.islice(lines, 1, 3))
+        assert event == [
+            "event: changed",
+            "data: "
+            + json.dumps(
+                {"path": "/" + path, "diff": {"environment": "env2", "count": 1}}
+            ),
+        ]
+
+        self.api_tester.delete(["projects", path])
+        event = list(itertools.islice(lines, 1, 3))
+        assert event == ["event: deleted", "data: " + json.dumps({"path": "/" + path})]
+        answer.close()
+
+    def test_project_patch(self):
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        project.mkdir(parents=True)
+        conf_file = project / "my-project.json"
+        conf_file.write_text(json.dumps({"name": "project", "environment": "env1"}))
+        url = url_path_join(self.api_tester.url, "projects", path)
+
+        answer = self.api_tester.get(["projects", path])
+        etag = answer.headers["Etag"]
+
+        answer = self.request(
+            "PATCH",
+            url,
+            data=json.dumps({"environment": "env2", "count": 2}),
+            headers={"If-Match": etag},
+        )
+        assert answer.status_code == 200
+        configuration = {"name": "project", "environment": "env2", "count": 2}
+        assert answer.json() == {"project": {**configuration, "path": "/" + path}}
+        assert json.loads(conf_file.read_text()) == configuration
+        new_etag = answer.headers["Etag"]
+        assert new_etag != etag
+
+        # Outdated tag
+        answer = self.request(
+            "PATCH", url, data=json.dumps({"count": 3}), headers={"If-Match": etag}
+        )
+        assert answer.status_code == 412
+        assert json.loads(conf_file.read_text()) == configuration
+
+        # Unconditional update
+        answer = self.request(
+            "PATCH", url, data=json.dumps({"count": None}), headers={"If-Match": "*"}
+        )
+        assert answer.status_code == 200
+        assert json.loads(conf_file.read_text()) == {
+            "name": "project",
+            "environment": "env2",
+        }
+
+    def test_project_patch_errors(self):
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        project.mkdir(parents=True)
+        conf_file = project / "my-project.json"
+        conf_file.write_text(json.dumps({"name": "project"}))
+        url = url_path_join(self.api_tester.url, "projects", path)
+
+        # Missing If-Match
+        answer = self.request("PATCH", url, data=json.dumps({"count": 1}))
+        assert answer.status_code == 428
+
+        # Invalid patch
+        answer = self.request(
+            "PATCH", url, data=json.dumps([1]), headers={"If-Match": "*"}
+        )
+        assert answer.status_code == 400
+
+        # Invalid configuration
+        answer = self.request(
+            "PATCH", url, data=json.dumps({"name": None}), headers={"If-Match": "*"}
+        )
+        assert answer.status_code == 422
+        assert json.loads(conf_file.read_text()) == {"name": "project"}
+
+        # Not a project
+        answer = self.request(
+            "PATCH",
+            url_path_join(self.api_tester.url, "projects", generate_path()),
+            data=json.dumps({"count": 1}),
+            headers={"If-Match": "*"},
+        )
+        assert answer.status_code == 404
+
+    def test_project_export(self):
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        (project / "data").mkdir(parents=True)
+        (project / "my-project.json").write_text(json.dumps({"name": "project"}))
+        (project / "data" / "values.csv").write_text("a,b\n1,2\n")
+        (project / ".git").mkdir()
+        (project / ".git" / "HEAD").write_text("ref: refs/heads/master")
+
+        for format in ("tar.gz", "zip"):
+            answer = self.request(
+                "GET",
+                url_path_join(self.api_tester.url, "projects", path),
+                params={"export": format},
+                stream=True,
+            )
+            assert answer.status_code == 200
+            assert answer.headers["Content-Disposition"].endswith(
+                f"{project.name}.{format}"
+            )
+            content = io.BytesIO(answer.raw.read())
+            if format == "zip":
+                with zipfile.ZipFile(content) as archive:
+                    names = set(archive.namelist())
+                    data = archive.read(f"{project.name}/data/values.csv")
+            else:
+                with tarfile.open(fileobj=content) as archive:
+                    names = {
+                        name + ("/" if archive.getmember(name).isdir() else "")
+                        for name in archive.getnames()
+                    }
+                    data = archive.extractfile(f"{project.name}/data/values.csv").read()
+            assert names == {
+                f"{project.name}/data/",
+                f"{project.name}/data/values.csv",
+                f"{project.name}/my-project.json",
+            }
+            assert data == b"a,b\n1,2\n"
+
+    def test_project_export_errors(self):
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        project.mkdir(parents=True)
+        (project / "my-project.json").write_text(json.dumps({"name": "project"}))
+
+        answer = self.request(
+            "GET",
+            url_path_join(self.api_tester.url, "projects", path),
+            params={"export": "rar"},
+        )
+        assert answer.status_code == 400
+
+        answer = self.request(
+            "GET",
+            url_path_join(self.api_tester.url, "projects", generate_path()),
+            params={"export": "zip"},
+        )
+        assert answer.status_code == 404
+
+    def test_project_export_read_error(self):
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        project.mkdir(parents=True)
+        (project / "my-project.json").write_text(json.dumps({"name": "project"}))
+
+        def chunks(fail_after):
+            for _ in range(fail_after):
+                yield b"\0" * 100
+            raise PermissionError("unreadable file")
+
+        # Before any data is sent
+        with mock.patch(
+            "jupyter_project.handlers.stream_archive", return_value=chunks(0)
+        ):
+            answer = self.request(
+                "GET",
+                url_path_join(self.api_tester.url, "projects", path),
+                params={"export": "zip"},
+            )
+            assert answer.status_code == 500
+
+        # While the archive is downloaded
+        with mock.patch(
+            "jupyter_project.handlers.stream_archive", return_value=chunks(2)
+        ):
+            answer = self.request(
+                "GET",
+                url_path_join(self.api_tester.url, "projects", path),
+                params={"export": "zip"},
+                stream=True,
+            )
+            assert answer.status_code == 200
+            with pytest.raises(requests.exceptions.ChunkedEncodingError):
+                answer.content
+
+    def test_project_import(self):
+        source_path = generate_path()
+        source = Path(self.notebook_dir) / source_path
+        (source / "src").mkdir(parents=True)
+        (source / "my-project.json").write_text(json.dumps({"name": "project"}))
+        (source / "src" / "main.py").write_text("print('hello')")
+        export = self.request(
+            "GET",
+            url_path_join(self.api_tester.url, "projects", source_path),
+            params={"export": "tar.gz"},
+        ).content
+        path = generate_path()
+
+        def body():
+            # Chunked upload
+            for index in range(0, len(export), 100):
+                yield export[index : index + 100]
+
+        answer = self.request(
+            "PUT", url_path_join(self.api_tester.url, "projects", path), data=body()
+        )
+        assert answer.status_code == 201
+        assert answer.json() == {"project": {"name": "project", "path": "/" + path}}
+        assert "Etag" in answer.headers
+        project = Path(self.notebook_dir) / path
+        assert (project / "src" / "main.py").read_text() == "print('hello')"
+        assert not any(
+            p.name.startswith(".jupyter-project-import-") for p in project.parent.iterdir()
+        )
+
+        # Existing path
+        answer = self.request(
+            "PUT", url_path_join(self.api_tester.url, "projects", path), data=export
+        )
+        assert answer.status_code == 409
+
+    def test_project_import_errors(self):
+        def archive(files):
+            content = io.BytesIO()
+            with zipfile.ZipFile(content, "w") as zip_file:
+                for name, data in files.items():
+                    zip_file.writestr(name, data)
+            return content.getvalue()
+
+        for files, status in (
+            ({"file.txt": "no configuration"}, 422),
+            ({"my-project.json": json.dumps({"name": 1})}, 422),
+            ({"../my-project.json": json.dumps({"name": "project"})}, 400),
+        ):
+            path = generate_path()
+            answer = self.request(
+                "PUT",
+                url_path_join(self.api_tester.url, "projects", path),
+                data=archive(files),
+            )
+            assert answer.status_code == status
+            parent = (Path(self.notebook_dir) / path).parent
+            assert not (Path(self.notebook_dir) / path).exists()
+            assert not parent.exists() or not any(
+                p.name.startswith(".jupyter-project-import-") for p in parent.iterdir()
+            )
+
+    def test_project_clone(self):
+        source = generate_path()
+        (Path(self.notebook_dir) / source / "data").mkdir(parents=True)
+        (Path(self.notebook_dir) / source / "my-project.json").write_text(
+            json.dumps({"name": "Source", "path": source, "count": 1})
+        )
+        (Path(self.notebook_dir) / source / "data" / "values.csv").write_text("a,b")
+        path = url_path_join(generate_path(), "my_variant")
+
+        answer = self.request(
+            "POST",
+            url_path_join(self.api_tester.url, "projects", path),
+            params={"from": source},
+        )
+        assert answer.status_code == 201
+        configuration = {"name": "My variant", "path": "/" + path, "count": 1}
+        assert answer.json() == {"project": configuration}
+        assert "Etag" in answer.headers
+        project = Path(self.notebook_dir) / path
+        assert json.loads((project / "my-project.json").read_text()) == configuration
+        assert (project / "data" / "values.csv").read_text() == "a,b"
+
+        # Existing path
+        answer = self.request(
+            "POST",
+            url_path_join(self.api_tester.url, "projects", path),
+            params={"from": source},
+        )
+        assert answer.status_code == 409
+
+    def test_project_clone_errors(self):
+        source = generate_path()
+        (Path(self.notebook_dir) / source).mkdir(parents=True)
+        (Path(self.notebook_dir) / source / "my-project.json").write_text(
+            json.dumps({"name": "Source"})
+        )
+
+        for destination, origin, status in (
+            (generate_path(), generate_path(), 404),
+            (generate_path(), "../..", 404),
+            (url_path_join(source, "sub"), source, 400),
+        ):
+            answer = self.request(
+                "POST",
+                url_path_join(self.api_tester.url, "projects", destination),
+                params={"from": origin},
+            )
+            assert answer.status_code == status
+            assert not (Path(self.notebook_dir) / destination).exists()
+
+    def test_project_stats(self):
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        (project / "data" / "raw").mkdir(parents=True)
+        (project / "src").mkdir()
+        (project / "my-project.json").write_text(json.dumps({"name": "project"}))
+        (project / "data" / "raw" / "values.bin").write_bytes(b"\0" * 1000)
+        (project / "data" / "values.csv").write_text("a,b\n1,2\n")
+
+        answer = self.api_tester.get(["projects", path], params={"stats": ""})
+        assert answer.status_code == 200
+        assert answer.json() == {
+            "files": 3,
+            "bytes": 1027,
+            "folders": {
+                "data": {"files": 2, "bytes": 1008},
+                "src": {"files": 0, "bytes": 0},
+            },
+        }
+
+        (project / "src" / "main.py").write_text("print('hello')")
+        answer = self.api_tester.get(["projects", path], params={"stats": ""})
+        assert answer.status_code == 200
+        assert answer.json()["folders"]["src"] == {"files": 1, "bytes": 14}
+
+    def test_project_get_stats_folder(self):
+        # A project named stats is opened
+        path = generate_path()
+        configuration = dict(name="stats")
+
+        with mock.patch(
+            "jupyter_project.handlers.ProjectTemplate.get_configuration",
+            return_value=configuration,
+        ) as mock_configuration:
+            answer = self.api_tester.get(["projects", path, "stats"])
+            assert answer.status_code == 200
+            assert answer.json() == {"project": configuration}
+
+        mock_configuration.assert_called_once_with(
+            Path(self.notebook_dir) / path / "stats"
+        )
+
+    def test_project_stats_no_configuration(self):
+        path = generate_path()
+        (Path(self.notebook_dir) / path).mkdir(parents=True)
+
+        with assert_http_error(404):
+            self.api_tester.get(["projects", path], params={"stats": ""})
+
+    def test_project_update(self):
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        project.mkdir(parents=True)
+        (project / "my-project.json").write_text(json.dumps({"name": "project"}))
+        changes = {
+            "added": ["LICENSE"],
+            "updated": ["README.md"],
+            "removed": [],
+            "conflicts": ["setup.py"],
+        }
+
+        with mock.patch(
+            "jupyter_project.handlers.ProjectTemplate.update", return_value=changes
+        ) as mock_update:
+            answer = self.api_tester.post(["projects", path], body={}, params={"update": ""})
+            assert answer.status_code == 200
+            assert answer.json() == {
+                "project": {"name": "project", "path": "/" + path},
+                "changes": changes,
+            }
+
+        mock_update.assert_called_once_with(project)
+
+    def test_project_update_errors(self):
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        project.mkdir(parents=True)
+
+        with assert_http_error(404):
+            self.api_tester.post(["projects", path], body={}, params={"update": ""})
+
+        (project / "my-project.json").write_text(json.dumps({"name": "project"}))
+        # No manifest
+        with assert_http_error(409):
+            self.api_tester.post(["projects", path], body={}, params={"update": ""})
+
+        with mock.patch(
+            "jupyter_project.handlers.ProjectTemplate.update",
+            side_effect=CookiecutterException,
+        ):
+            with assert_http_error(500):
+                self.api_tester.post(["projects", path], body={}, params={"update": ""})
+
     def test_project_delete(self):
         path = generate_path()
 
@@ -456,3 +1211,170 @@ class TestProjectTemplate(ServerTest):
                 self.api_tester.delete(["projects", path])
 
         mock_configuration.assert_called_once_with(Path(self.notebook_dir) / path)
+
+
+class TestKernelPrespawn(ServerTest):
+
+    config = Config(
+        {
+            "NotebookApp": {"nbserver_extensions": {"jupyter_project": True}},
+            "JupyterProject": {
+                "kernel_prespawn_timeout": 60.0,
+                "project_template": {
+                    "configuration_filename": "my-project.json",
+                    "conda_pkgs": "ipykernel",
+                    "default_path": "notebooks/{{ jproject.name }}.ipynb",
+                    "template": "my-project-template",
+                },
+            },
+        }
+    )
+
+    def wait_for_kernels(self, count: int, timeout: float = 30.0) -> list:
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            kernels = self.request("GET", "api/kernels").json()
+            if len(kernels) == count:
+                return kernels
+            time.sleep(0.1)
+        raise TimeoutError(f"Expected {count} kernels; got {kernels}")
+
+    def test_project_get_prespawn_kernel(self):
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        (project / "notebooks").mkdir(parents=True)
+        (project / "my-project.json").write_text(
+            json.dumps({"name": "demo", "environment": "banana"})
+        )
+
+        with mock.patch(
+            "jupyter_project.handlers.ProjectsHandler.kernel_spec_manager"
+        ) as mocked_specs:
+            mocked_specs.default_kernel_name = "python3"
+            mocked_specs.get_all_specs.return_value = {
+                "python3": {"spec": {"metadata": {"conda_env_name": "banana"}}}
+            }
+            answer = self.api_tester.get(["projects", path])
+            assert answer.status_code == 200
+
+        kernels = self.wait_for_kernels(1)
+
+        # A notebook in the default folder adopts the prespawned kernel
+        answer = self.request(
+            "POST",
+            "api/sessions",
+            data=json.dumps(
+                {
+                    "path": url_path_join(path, "notebooks", "demo.ipynb"),
+                    "type": "notebook",
+                    "name": "demo.ipynb",
+                    "kernel": {"name": "python3"},
+                }
+            ),
+        )
+        assert answer.status_code == 201
+        session = answer.json()
+        assert session["kernel"]["id"] == kernels[0]["id"]
+        assert len(self.request("GET", "api/kernels").json()) == 1
+
+        self.request("DELETE", url_path_join("api/sessions", session["id"]))
+        self.wait_for_kernels(0)
+
+    def test_project_close_cull_prespawned_kernel(self):
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        project.mkdir(parents=True)
+        (project / "my-project.json").write_text(
+            json.dumps({"name": "demo", "environment": "banana"})
+        )
+
+        with mock.patch(
+            "jupyter_project.handlers.ProjectsHandler.kernel_spec_manager"
+        ) as mocked_specs:
+            mocked_specs.default_kernel_name = "python3"
+            mocked_specs.get_all_specs.return_value = {
+                "python3": {"spec": {"metadata": {"conda_env_name": "banana"}}}
+            }
+            answer = self.api_tester.get(["projects", path])
+            assert answer.status_code == 200
+        self.wait_for_kernels(1)
+
+        answer = self.request(
+            "GET", url_path_join(self.api_tester.url, "projects"), cookies=answer.cookies
+        )
+        assert answer.status_code == 200
+        self.wait_for_kernels(0)
+
+
+class TestGitInit(ServerTest):
+
+    config = Config(
+        {
+            "NotebookApp": {"nbserver_extensions": {"jupyter_project": True}},
+            "JupyterProject": {
+                "project_template": {
+                    "configuration_filename": "my-project.json",
+                    "git_init": True,
+                    "template": "my-project-template",
+                    "with_git": False,
+                },
+            },
+        }
+    )
+
+    def test_project_post_git_init(self):
+        path = generate_path()
+
+        def render(params, realpath):
+            project = realpath / "project_name"
+            (project / "src").mkdir(parents=True)
+            (project / "src" / "main.py").write_text("print('hello')\n")
+            (project / "my-project.json").write_text(json.dumps(params))
+            (project / MANIFEST_FILENAME).write_text("{}")
+            return "project_name", dict(params)
+
+        with mock.patch(
+            "jupyter_project.handlers.ProjectTemplate.render", side_effect=render
+        ):
+            answer = self.api_tester.post(["projects", path], body={"name": "Project"})
+            assert answer.status_code == 201
+
+        # The repository is committed before the answer
+        project = Path(self.notebook_dir) / path / "project_name"
+        files = subprocess.run(
+            ["git", "ls-tree", "-r", "--name-only", "HEAD"],
+            cwd=str(project),
+            stdout=subprocess.PIPE,
+            check=True,
+        ).stdout.decode("utf-8")
+        # The manifest is never committed
+        assert files.splitlines() == ["my-project.json", "src/main.py"]
+        status = subprocess.run(
+            ["git", "status", "--porcelain"],
+            cwd=str(project),
+            stdout=subprocess.PIPE,
+            check=True,
+        ).stdout.decode("utf-8")
+        assert status == ""
+
+    def test_project_post_git_init_failure(self):
+        path = generate_path()
+
+        def render(params, realpath):
+            (realpath / "project_name").mkdir(parents=True)
+            return "project_name", dict(params)
+
+        with mock.patch(
+            "jupyter_project.handlers.ProjectTemplate.render", side_effect=render
+        ), mock.patch(
+            "jupyter_project.handlers.init_repository",
+            side_effect=GitError("git init failed"),
+        ):
+            answer = self.api_tester.post(["projects", path], body={"name": "Project"})
+            assert answer.status_code == 201
+
+    def test_settings_git_init(self):
+        answer = self.api_tester.get(["settings"])
+        settings = answer.json()["projectTemplate"]
+        assert settings["gitInit"]
+        assert not settings["withGit"]
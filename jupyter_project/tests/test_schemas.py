@@ -0,0 +1,202 @@
+import json
+
+import jsonschema
+import pytest
+
+from jupyter_project.schemas import SchemaBundler, _resolve_pointer
+
+
+@pytest.fixture
+def schemas_dir(tmp_path):
+    (tmp_path / "shared").mkdir()
+    (tmp_path / "shared" / "common.json").write_text(
+        json.dumps(
+            {
+                "definitions": {
+                    "name": {"type": "string", "pattern": "^[a-z_]+$"},
+                    "person": {
+                        "type": "object",
+                        "properties": {
+                            "name": {"$ref": "#/definitions/name"},
+                            "email": {"$ref": "email.json"},
+                        },
+                    },
+                    "unused": {"type": "null"},
+                }
+            }
+        )
+    )
+    (tmp_path / "shared" / "email.json").write_text(
+        json.dumps({"type": "string", "format": "email"})
+    )
+    return tmp_path
+
+
+def test_resolve_pointer():
+    document = {"a": [{"b/c": 1}, {"d~e": 2}]}
+
+    assert _resolve_pointer(document, "") is document
+    assert _resolve_pointer(document, "/a/0/b~1c") == 1
+    assert _resolve_pointer(document, "/a/1/d~0e") == 2
+    with pytest.raises(ValueError):
+        _resolve_pointer(document, "/a/2")
+    with pytest.raises(ValueError):
+        _resolve_pointer(document, "a")
+
+
+def test_SchemaBundler_bundle(schemas_dir):
+    bundler = SchemaBundler(schemas_dir)
+    schema = {
+        "type": "object",
+        "properties": {
+            "author": {"$ref": "shared/common.json#/definitions/person"},
+            "default": {"$ref": "shared/common.json#/definitions/name"},
+            "local": {"$ref": "#/definitions/local"},
+        },
+        "definitions": {"local": {"type": "number"}},
+        "default": {"$ref": "not a reference"},
+    }
+
+    bundled = bundler.bundle(schema)
+
+    assert bundled == {
+        "type": "object",
+        "properties": {
+            "author": {"$ref": "#/definitions/common.definitions.person"},
+            "default": {"$ref": "#/definitions/common.definitions.name"},
+            "local": {"$ref": "#/definitions/local"},
+        },
+        "definitions": {
+            "local": {"type": "number"},
+            "common.definitions.name": {"type": "string", "pattern": "^[a-z_]+$"},
+            "common.definitions.person": {
+                "type": "object",
+                "properties": {
+                    "name": {"$ref": "#/definitions/common.definitions.name"},
+                    "email": {"$ref": "#/definitions/email"},
+                },
+            },
+            "email": {"type": "string", "format": "email"},
+        },
+        "default": {"$ref": "not a reference"},
+    }
+    # The original schema is not modified
+    assert schema["properties"]["author"] == {
+        "$ref": "shared/common.json#/definitions/person"
+    }
+
+    validator = jsonschema.Draft7Validator(bundled)
+    assert validator.is_valid({"author": {"name": "john", "email": "j@doe.com"}})
+    assert not validator.is_valid({"author": {"name": "John"}})
+
+
+def test_SchemaBundler_shared_definitions(schemas_dir):
+    bundler = SchemaBundler(schemas_dir)
+    uri = (schemas_dir / "shared" / "email.json").as_uri()
+
+    first = bundler.bundle({"properties": {"email": {"$ref": "shared/email.json"}}})
+    second = bundler.bundle({"properties": {"contact": {"$ref": uri}}})
+
+    assert first["definitions"]["email"] is second["definitions"]["email"]
+    assert bundler.bundle(
+        {"properties": {"email": {"$ref": "shared/email.json"}}}
+    ) is first
+
+
+def test_SchemaBundler_no_reference(schemas_dir):
+    bundler = SchemaBundler(schemas_dir)
+    schema = {
+        "properties": {
+            "a": {"$ref": "#/definitions/a"},
+            "b": {"$ref": "https://example.com/schema.json"},
+        },
+        "definitions": {"a": {"type": "string"}},
+    }
+
+    assert bundler.bundle(schema) is schema
+
+
+def test_SchemaBundler_recursive(tmp_path):
+    (tmp_path / "tree.json").write_text(
+        json.dumps(
+            {
+                "type": "object",
+                "properties": {
+                    "children": {"type": "array", "items": {"$ref": "#"}}
+                },
+            }
+        )
+    )
+    bundler = SchemaBundler(tmp_path)
+
+    bundled = bundler.bundle({"$ref": "tree.json"})
+
+    assert bundled == {
+        "$ref": "#/definitions/tree",
+        "definitions": {
+            "tree": {
+                "type": "object",
+                "properties": {
+                    "children": {
+                        "type": "array",
+                        "items": {"$ref": "#/definitions/tree"},
+                    }
+                },
+            }
+        },
+    }
+
+
+def test_SchemaBundler_root_definitions_clash(tmp_path):
+    (tmp_path / "address.json").write_text(json.dumps({"type": "string"}))
+    schema = {
+        "properties": {
+            "number": {"$ref": "#/definitions/address"},
+            "street": {"$ref": "address.json"},
+        },
+        "definitions": {"address": {"type": "integer"}},
+    }
+    bundler = SchemaBundler(tmp_path)
+
+    bundled = bundler.bundle(schema)
+
+    assert bundled["properties"]["street"] == {"$ref": "#/definitions/address_2"}
+    assert bundled["definitions"] == {
+        "address": {"type": "integer"},
+        "address_2": {"type": "string"},
+    }
+    validator = jsonschema.Draft7Validator(bundled)
+    assert validator.is_valid({"number": 1, "street": "main"})
+    assert not validator.is_valid({"number": "main", "street": 1})
+
+
+def test_SchemaBundler_root_definitions_clash_shared(tmp_path):
+    (tmp_path / "address.json").write_text(json.dumps({"type": "string"}))
+    bundler = SchemaBundler(tmp_path)
+    # The name is generated before a schema defining it is bundled
+    first = bundler.bundle({"properties": {"street": {"$ref": "address.json"}}})
+    schema = {
+        "properties": {
+            "number": {"$ref": "#/definitions/address"},
+            "street": {"$ref": "address.json"},
+        },
+        "definitions": {"address": {"type": "integer"}},
+    }
+
+    bundled = bundler.bundle(schema)
+
+    assert first["definitions"] == {"address": {"type": "string"}}
+    assert bundled["definitions"]["address"] == {"type": "integer"}
+    validator = jsonschema.Draft7Validator(bundled)
+    assert validator.is_valid({"number": 1, "street": "main"})
+    assert not validator.is_valid({"number": "main", "street": 1})
+
+
+@pytest.mark.parametrize(
+    "ref", ["missing.json", "shared/common.json#/definitions/missing"]
+)
+def test_SchemaBundler_invalid_reference(schemas_dir, ref):
+    bundler = SchemaBundler(schemas_dir)
+
+    with pytest.raises(ValueError):
+        bundler.bundle({"properties": {"a": {"$ref": ref}}})
@@ -1,3 +1,4 @@
+import json
 import sys
 import tempfile
 from pathlib import Path
@@ -9,7 +10,7 @@ import requests
 import tornado
 from traitlets.config import Config
 
-from utils import ServerTest, assert_http_error, url_path_join
+from utils import ServerTest, assert_http_error, generate_path, url_path_join
 
 
 template_folder = tempfile.TemporaryDirectory(suffix="settings")
@@ -141,11 +142,13 @@ class TestSettings(ServerTest):
                 "defaultCondaPackages": "python=3 ipykernel",
                 "defaultPath": "notebooks",
                 "editableInstall": False,
+                "gitInit": False,
                 "schema": {
                     "title": "My Project",
                     "description": "Project template description",
                     "properties": {"count": {"type": "number"}},
                 },
+                "serverProvisioning": False,
                 "withGit": True,
             },
         }
@@ -170,3 +173,105 @@ class TestEmptySettings(ServerTest):
 
         with assert_http_error(404):
             self.api_tester.delete(["projects"])
+
+
+schemas_folder = tempfile.TemporaryDirectory(suffix="schemas")
+
+
+class TestBundledSchemas(ServerTest):
+
+    config = Config(
+        {
+            "NotebookApp": {"nbserver_extensions": {"jupyter_project": True}},
+            "JupyterProject": {
+                "file_templates": [
+                    {
+                        "name": "template1",
+                        "location": schemas_folder.name,
+                        "files": [
+                            {
+                                "template": "file1.py",
+                                "schema": {
+                                    "properties": {
+                                        "name": {
+                                            "$ref": "common.json#/definitions/name"
+                                        }
+                                    }
+                                },
+                            },
+                        ],
+                    },
+                ],
+                "project_template": {
+                    "configuration_filename": "my-project.json",
+                    "configuration_schema": {
+                        "properties": {
+                            "name": {"$ref": "common.json#/definitions/name"},
+                            "count": {"$ref": "common.json#/definitions/count"},
+                        },
+                    },
+                    "schema": {
+                        "properties": {
+                            "name": {"$ref": "common.json#/definitions/name"}
+                        },
+                    },
+                    "template": "my_magic.package",
+                },
+                "schemas_dir": schemas_folder.name,
+            },
+        }
+    )
+
+    @classmethod
+    def setup_class(cls):
+        folder = Path(schemas_folder.name)
+        (folder / "file1.py").write_text("print('hello')\n")
+        (folder / "common.json").write_text(
+            json.dumps(
+                {
+                    "definitions": {
+                        "name": {"type": "string", "minLength": 1},
+                        "count": {"type": "integer", "minimum": 0},
+                    }
+                }
+            )
+        )
+        super().setup_class()
+
+    @classmethod
+    def teardown_class(cls):
+        super().teardown_class()
+        schemas_folder.cleanup()
+
+    def test_get_bundled_schemas(self):
+        answer = self.api_tester.get(["settings",])
+        assert answer.status_code == 200
+        settings = answer.json()
+        name = {"$ref": "#/definitions/common.definitions.name"}
+        definition = {"type": "string", "minLength": 1}
+        assert settings["fileTemplates"][0]["schema"] == {
+            "properties": {"name": name},
+            "definitions": {"common.definitions.name": definition},
+        }
+        assert settings["projectTemplate"]["schema"] == {
+            "properties": {"name": name},
+            "definitions": {"common.definitions.name": definition},
+        }
+
+    def test_validate_with_bundled_schema(self):
+        path = generate_path()
+        project = Path(self.notebook_dir) / path
+        project.mkdir(parents=True)
+        (project / "my-project.json").write_text(json.dumps({"name": "project"}))
+
+        url = url_path_join(self.api_tester.url, "projects", path)
+
+        answer = self.request(
+            "PATCH", url, data=json.dumps({"count": 2}), headers={"If-Match": "*"}
+        )
+        assert answer.status_code == 200
+
+        answer = self.request(
+            "PATCH", url, data=json.dumps({"count": -1}), headers={"If-Match": "*"}
+        )
+        assert answer.status_code == 422
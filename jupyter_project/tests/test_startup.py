@@ -0,0 +1,130 @@
+import threading
+import time
+from unittest import mock
+
+import pytest
+import tornado.ioloop
+from jinja2 import PrefixLoader
+from traitlets.config import Config
+
+from jupyter_project.events import ProjectsWatcher
+from jupyter_project.startup import ExtensionInitializer
+
+from utils import ServerTest, url_path_join
+
+
+def test_ExtensionInitializer_progress():
+    initializer = ExtensionInitializer(("first", "second"))
+    assert initializer.model() == {
+        "state": "pending",
+        "stage": None,
+        "progress": 0.0,
+        "durations": {},
+        "error": None,
+    }
+
+    with initializer.stage("first"):
+        initializer.set_progress(0.5)
+        assert initializer.model()["stage"] == "first"
+        assert initializer.progress == 0.25
+
+    assert initializer.progress == 0.5
+    with pytest.raises(ValueError):
+        with initializer.stage("second"):
+            raise ValueError()
+
+    model = initializer.model()
+    assert model["stage"] is None
+    assert set(model["durations"]) == {"first", "second"}
+    assert not initializer.ready
+
+
+class TestDeferredInitialization(ServerTest):
+
+    config = Config(
+        {
+            "NotebookApp": {"nbserver_extensions": {"jupyter_project": True}},
+            "JupyterProject": {
+                "project_template": {"template": "https://github.com/me/my-template"}
+            },
+        }
+    )
+
+    wait_ready = False
+
+    @classmethod
+    def setup_class(cls):
+        cls.gate = threading.Event()
+
+        def blocking_loader(*args, **kwargs):
+            cls.gate.wait(10)
+            return PrefixLoader(*args, **kwargs)
+
+        cls.watcher_loops = list()
+
+        def watcher(*args, **kwargs):
+            # Loop of the thread creating the watcher
+            cls.watcher_loops.append(tornado.ioloop.IOLoop.current(instance=False))
+            return ProjectsWatcher(*args, **kwargs)
+
+        cls.patchers = [
+            mock.patch(
+                "jupyter_project.jinja2.PrefixLoader", side_effect=blocking_loader
+            ),
+            mock.patch("jupyter_project.handlers.ProjectsWatcher", side_effect=watcher),
+        ]
+        for patcher in cls.patchers:
+            patcher.start()
+        super().setup_class()
+
+    @classmethod
+    def teardown_class(cls):
+        cls.gate.set()
+        super().teardown_class()
+        for patcher in cls.patchers:
+            patcher.stop()
+
+    def test_not_ready(self):
+        answer = self.request("GET", url_path_join(self.api_tester.url, "settings"))
+        assert answer.status_code == 503
+        assert answer.headers["Retry-After"] == "1"
+        answer = self.request(
+            "POST", url_path_join(self.api_tester.url, "projects", "my_project")
+        )
+        assert answer.status_code == 503
+
+        # Wait for the initialization to be blocked
+        for _ in range(500):
+            answer = self.request("GET", url_path_join(self.api_tester.url, "ready"))
+            assert answer.status_code == 503
+            model = answer.json()
+            if model["stage"] == "file_handlers":
+                break
+            time.sleep(0.01)
+        assert model["state"] == "pending"
+        assert model["stage"] == "file_handlers"
+        assert "configuration" in model["durations"]
+        assert 0.0 < model["progress"] < 1.0
+
+        self.gate.set()
+        answer = self.wait_until_ready()
+        assert answer.status_code == 200
+        model = answer.json()
+        assert model["state"] == "ready"
+        assert model["progress"] == 1.0
+        assert set(model["durations"]) == {
+            "configuration",
+            "file_templates",
+            "file_handlers",
+            "project_template",
+        }
+
+        answer = self.api_tester.get(["settings"])
+        assert answer.status_code == 200
+        assert answer.json()["projectTemplate"] is not None
+        # The objects bound to the server loop are not created in the thread
+        assert len(self.watcher_loops) == 1
+        assert self.watcher_loops[0] is not None
+        # Unknown endpoints are not found once ready
+        answer = self.request("GET", url_path_join(self.api_tester.url, "unknown"))
+        assert answer.status_code == 404
@@ -0,0 +1,76 @@
+import json
+import time
+
+import pytest
+from traitlets.config import Config
+
+from jupyter_project.timing import RequestTimer
+
+from utils import ServerTest
+
+
+def test_RequestTimer_phase():
+    timer = RequestTimer()
+
+    with timer.phase("filesystem"):
+        time.sleep(0.01)
+    with timer.phase("filesystem"):
+        time.sleep(0.01)
+    with pytest.raises(ValueError):
+        with timer.phase("render"):
+            raise ValueError()
+
+    breakdown = timer.breakdown()
+    assert set(breakdown) == {"filesystem", "render"}
+    assert breakdown["filesystem"] >= 20.0
+    assert breakdown["render"] < breakdown["filesystem"]
+
+
+@pytest.mark.asyncio
+async def test_RequestTimer_run_in_executor():
+    timer = RequestTimer()
+
+    def render():
+        time.sleep(0.01)
+        return "content"
+
+    assert await timer.run_in_executor(render, phase="render") == "content"
+
+    breakdown = timer.breakdown()
+    assert set(breakdown) == {"queued", "render"}
+    assert breakdown["render"] >= 10.0
+
+
+class TestSlowRequestLog(ServerTest):
+
+    config = Config(
+        {
+            "NotebookApp": {"nbserver_extensions": {"jupyter_project": True}},
+            "JupyterProject": {"slow_request_threshold": 1e-9},
+        }
+    )
+
+    def _wait_records(self, cm):
+        for _ in range(100):
+            records = [r for r in cm.records if "slow_request" in r.getMessage()]
+            if len(records) > 0:
+                return records
+            time.sleep(0.01)
+        return []
+
+    def test_settings_slow_request(self):
+        with self.assertLogs("NotebookApp", level="WARNING") as cm:
+            answer = self.api_tester.get(["settings"])
+            records = self._wait_records(cm)
+
+        assert len(records) == 1
+        record = json.loads(records[0].getMessage())
+        assert record["event"] == "jupyter_project.slow_request"
+        assert record["handler"] == "SettingsHandler"
+        assert record["method"] == "GET"
+        assert record["status"] == 200
+        assert record["template"] is None
+        assert record["duration_ms"] > 0
+        assert set(record["phases_ms"]) == {"queued", "render", "filesystem"}
+        assert record["params_size"] == 0
+        assert record["result_size"] == len(answer.content)
@@ -0,0 +1,155 @@
+import json
+import threading
+
+import cookiecutter.generate
+import cookiecutter.hooks
+import cookiecutter.main
+import pytest
+
+from jupyter_project.project import ProjectTemplate
+from jupyter_project.tracing import (
+    FileExporter,
+    Tracer,
+    bind_context,
+    current_span,
+    span,
+    trace_cookiecutter,
+)
+
+
+@pytest.fixture
+def spans():
+    return list()
+
+
+@pytest.fixture
+def tracer(spans):
+    return Tracer(spans.append)
+
+
+def test_Tracer_disabled():
+    tracer = Tracer()
+
+    with tracer.span("root") as root:
+        root.set_attribute("key", "value")
+        assert current_span() is None
+        with span("child") as child:
+            assert child.trace_id is None
+
+
+def test_span_without_root(spans):
+    with span("orphan"):
+        assert current_span() is None
+    assert spans == []
+
+
+def test_Tracer_nested_spans(tracer, spans):
+    with tracer.span("root", path="my/path") as root:
+        with span("child1"):
+            with span("grandchild") as grandchild:
+                grandchild.set_attribute("size", 42)
+        with pytest.raises(ValueError):
+            with span("child2"):
+                raise ValueError("failure")
+
+    assert current_span() is None
+    assert [s.name for s in spans] == ["grandchild", "child1", "child2", "root"]
+    grandchild, child1, child2, root = spans
+    assert root.parent_id is None
+    assert root.attributes == {"path": "my/path"}
+    assert {s.trace_id for s in spans} == {root.trace_id}
+    assert child1.parent_id == root.span_id
+    assert child2.parent_id == root.span_id
+    assert grandchild.parent_id == child1.span_id
+    assert grandchild.attributes == {"size": 42}
+    assert child2.status == "ERROR"
+    assert root.status == "OK"
+    assert all(s.start_time <= s.end_time for s in spans)
+
+
+def test_bind_context(tracer, spans):
+    def work():
+        with span("thread"):
+            pass
+
+    with tracer.span("root") as root:
+        thread = threading.Thread(target=bind_context(work))
+        thread.start()
+        thread.join()
+
+    assert [s.name for s in spans] == ["thread", "root"]
+    assert spans[0].parent_id == root.span_id
+
+
+def test_FileExporter(tmp_path):
+    traces = tmp_path / "traces.jsonl"
+    tracer = Tracer(FileExporter(str(traces)))
+
+    with tracer.span("root"):
+        with span("child"):
+            pass
+
+    lines = [json.loads(line) for line in traces.read_text().splitlines()]
+    assert [line["name"] for line in lines] == ["child", "root"]
+    assert lines[0]["parent_id"] == lines[1]["span_id"]
+
+
+def test_ProjectTemplate_render_traced(tmp_path, tracer, spans):
+    template = tmp_path / "template"
+    project = template / "{{ cookiecutter.name }}"
+    project.mkdir(parents=True)
+    (template / "cookiecutter.json").write_text(json.dumps({"name": "project"}))
+    (project / "README.md").write_text("# {{ cookiecutter.name }}\n")
+    (template / "hooks").mkdir()
+    (template / "hooks" / "post_gen_project.py").write_text(
+        "import os\n"
+        "with open('traceparent.txt', 'w') as f:\n"
+        "    f.write(os.environ.get('TRACEPARENT', ''))\n"
+    )
+    tpl = ProjectTemplate(template=str(template))
+
+    with tracer.span("root") as root:
+        folder, _ = tpl.render({"name": "my_project"}, tmp_path / "output")
+
+    names = [s.name for s in spans]
+    for phase in (
+        "template.resolve",
+        "cookiecutter",
+        "cookiecutter.fetch",
+        "cookiecutter.render",
+        "cookiecutter.hook",
+        "configuration.write",
+        "configuration.validate",
+        "manifest.write",
+    ):
+        assert phase in names
+    assert {s.trace_id for s in spans} == {root.trace_id}
+
+    traceparent = (tmp_path / "output" / folder / "traceparent.txt").read_text()
+    assert traceparent.startswith(f"00-{root.trace_id}-")
+
+
+def test_trace_cookiecutter_scoped(tracer):
+    originals = (
+        cookiecutter.main.generate_files,
+        cookiecutter.generate.run_hook_from_repo_dir,
+        cookiecutter.hooks.subprocess,
+    )
+
+    with trace_cookiecutter():
+        # Nothing is patched without a span
+        assert cookiecutter.main.generate_files is originals[0]
+
+    with tracer.span("root"):
+        with trace_cookiecutter():
+            with trace_cookiecutter():
+                assert cookiecutter.main.generate_files is not originals[0]
+            # Still patched for the outer render
+            assert cookiecutter.hooks.subprocess is not originals[2]
+
+    # The cookiecutter functions are restored for the other callers
+    assert (
+        cookiecutter.main.generate_files,
+        cookiecutter.generate.run_hook_from_repo_dir,
+        cookiecutter.hooks.subprocess,
+    ) == originals
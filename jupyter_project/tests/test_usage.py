@@ -0,0 +1,68 @@
+import os
+
+from jupyter_project.usage import DiskUsage
+
+
+def make_tree(root):
+    (root / "data" / "raw").mkdir(parents=True)
+    (root / "src").mkdir()
+    (root / "README.md").write_bytes(b"x" * 10)
+    (root / "data" / "small.csv").write_bytes(b"x" * 100)
+    (root / "data" / "raw" / "big.bin").write_bytes(b"x" * 1000)
+    (root / "src" / "main.py").write_bytes(b"x" * 20)
+    os.symlink(root / "data", root / "link")
+
+
+def test_DiskUsage_stats(tmp_path):
+    make_tree(tmp_path)
+    usage = DiskUsage(max_workers=2)
+
+    stats = usage.stats(tmp_path)
+
+    link_size = os.lstat(tmp_path / "link").st_size
+    assert stats == {
+        "files": 5,
+        "bytes": 1130 + link_size,
+        "folders": {
+            "data": {"files": 2, "bytes": 1100},
+            "src": {"files": 1, "bytes": 20},
+        },
+    }
+    assert usage.misses == 4
+
+
+def test_DiskUsage_rescan_changed_directories(tmp_path):
+    make_tree(tmp_path)
+    usage = DiskUsage()
+    usage.stats(tmp_path)
+    usage.hits = usage.misses = 0
+
+    stats = usage.stats(tmp_path)
+    assert usage.hits == 4
+    assert usage.misses == 0
+
+    (tmp_path / "data" / "raw" / "new.bin").write_bytes(b"x" * 5)
+    (tmp_path / "src" / "main.py").unlink()
+    usage.hits = usage.misses = 0
+
+    stats = usage.stats(tmp_path)
+    assert usage.misses == 2
+    assert stats["folders"] == {
+        "data": {"files": 3, "bytes": 1105},
+        "src": {"files": 0, "bytes": 0},
+    }
+
+
+def test_DiskUsage_max_directories(tmp_path):
+    make_tree(tmp_path)
+    usage = DiskUsage(max_directories=2)
+
+    usage.stats(tmp_path)
+
+    assert len(usage._cache) == 2
+
+
+def test_DiskUsage_missing_folder(tmp_path):
+    stats = DiskUsage().stats(tmp_path / "missing")
+
+    assert stats == {"files": 0, "bytes": 0, "folders": {}}
@@ -1,4 +1,5 @@
 import json
+import time
 import uuid
 from typing import List
 
@@ -67,9 +68,23 @@ class ServerTest(ServerTestBase):
     # Force extension enabling - Disabled by parent class otherwise
     config = Config({"NotebookApp": {"nbserver_extensions": {"jupyter_project": True}}})
 
+    # Wait for the extension initialization before each test
+    wait_ready = True
+
     def setUp(self):
         super(ServerTest, self).setUp()
         self.api_tester = APITester(self.request)
+        if self.wait_ready:
+            self.wait_until_ready()
+
+    def wait_until_ready(self, timeout: float = 10.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            answer = self.request("GET", url_path_join(APITester.url, "ready"))
+            if answer.status_code != 503:
+                return answer
+            time.sleep(0.01)
+        raise TimeoutError("jupyter_project extension is not ready.")
 
 
 def generate_path():
@@ -0,0 +1,74 @@
+import asyncio
+import contextlib
+import time
+from typing import Any, Callable, Dict, Iterator
+
+
+class RequestTimer:
+    """Time spent by a request in each of its phases.
+
+    Phases are accumulated in seconds. The time a function waits for an
+    executor thread is accounted in the ``queued`` phase.
+
+    Example:
+        with timer.phase("filesystem"):
+            path.write_text(content)
+
+        content = await timer.run_in_executor(render, phase="render")
+    """
+
+    def __init__(self):
+        # Phase name -> duration in seconds
+        self.phases = dict()
+
+    def add(self, phase: str, duration: float):
+        """Add a duration to a phase.
+
+        Args:
+            phase (str): Phase name
+            duration (float): Duration in seconds
+        """
+        self.phases[phase] = self.phases.get(phase, 0.0) + duration
+
+    @contextlib.contextmanager
+    def phase(self, name: str) -> Iterator[None]:
+        """Time the code block within a phase.
+
+        Args:
+            name (str): Phase name
+        """
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add(name, time.perf_counter() - start)
+
+    async def run_in_executor(self, func: Callable[[], Any], phase: str) -> Any:
+        """Run a function in the default executor and time it.
+
+        Args:
+            func (Callable[[], Any]): Function without argument to execute
+            phase (str): Phase in which the execution time is accounted
+
+        Returns:
+            Any: Function result
+        """
+        submitted = time.perf_counter()
+
+        def timed():
+            started = time.perf_counter()
+            self.add("queued", started - submitted)
+            try:
+                return func()
+            finally:
+                self.add(phase, time.perf_counter() - started)
+
+        return await asyncio.get_event_loop().run_in_executor(None, timed)
+
+    def breakdown(self) -> Dict[str, float]:
+        """Get the phase durations.
+
+        Returns:
+            Dict[str, float]: Phase name -> duration in milliseconds
+        """
+        return {name: round(value * 1000.0, 3) for name, value in self.phases.items()}
@@ -0,0 +1,323 @@
+"""
+Lightweight tracing of the project and file generations.
+
+Spans follow the OpenTelemetry data model (trace id, span id, parent span id,
+name, start and end times, attributes and status) and are exported as JSON
+lines to a file or to the extension logger when they end; no collector is
+needed.
+
+The current span is stored in a context variable. So nested spans find their
+parent automatically; use :py:func:`bind_context` to keep it in executor
+threads. Spans are only recorded within a root span opened by an enabled
+:py:class:`Tracer`; :py:func:`span` is a no-op otherwise.
+
+The cookiecutter phases (template fetch, render and hooks) are traced by
+wrapping the cookiecutter functions within :py:func:`trace_cookiecutter`; the
+hooks receive the W3C ``TRACEPARENT`` environment variable. The wrappers are
+removed once no traced render is running.
+"""
+import contextlib
+import contextvars
+import functools
+import json
+import logging
+import os
+import subprocess
+import threading
+import time
+from typing import Any, Callable, Dict, Iterator, NoReturn, Optional
+
+import cookiecutter.generate
+import cookiecutter.hooks
+import cookiecutter.main
+
+logger = logging.getLogger(__name__)
+
+# Environment variable passing the trace context to the cookiecutter hooks
+TRACEPARENT = "TRACEPARENT"
+
+_current_span = contextvars.ContextVar("jupyter_project_span", default=None)
+
+
+class Span:
+    """Trace span.
+
+    Attributes:
+        name (str): Span name
+        trace_id (str): Trace id (32 hexadecimal characters)
+        span_id (str): Span id (16 hexadecimal characters)
+        parent_id (str): Parent span id; None for the root span
+        attributes (Dict): Span attributes
+    """
+
+    def __init__(self, tracer: "Tracer", name: str, parent: Optional["Span"] = None):
+        self.tracer = tracer
+        self.name = name
+        self.trace_id = parent.trace_id if parent is not None else os.urandom(16).hex()
+        self.span_id = os.urandom(8).hex()
+        self.parent_id = parent.span_id if parent is not None else None
+        self.attributes = dict()
+        self.status = "OK"
+        self.start_time = time.time_ns()
+        self.end_time = None
+
+    @property
+    def traceparent(self) -> str:
+        """str: W3C trace context header value"""
+        return f"00-{self.trace_id}-{self.span_id}-01"
+
+    def set_attribute(self, key: str, value: Any) -> NoReturn:
+        """Set a span attribute.
+
+        Args:
+            key (str): Attribute name
+            value (Any): Attribute value; it must be JSON serializable
+        """
+        self.attributes[key] = value
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the span.
+
+        Returns:
+            Dict: JSON serializable span
+        """
+        return {
+            "name": self.name,
+            "trace_id": self.trace_id,
+            "span_id": self.span_id,
+            "parent_id": self.parent_id,
+            "start_time": self.start_time,
+            "end_time": self.end_time,
+            "attributes": self.attributes,
+            "status": self.status,
+        }
+
+
+class _NoopSpan:
+    """Span returned when tracing is disabled."""
+
+    trace_id = None
+    span_id = None
+
+    def set_attribute(self, key: str, value: Any) -> NoReturn:
+        pass
+
+
+_NOOP_SPAN = _NoopSpan()
+
+
+class FileExporter:
+    """Append the spans as JSON lines to a file."""
+
+    def __init__(self, filename: str):
+        """Initialize the exporter
+
+        Args:
+            filename (str): Traces file
+        """
+        self.filename = filename
+        self._lock = threading.Lock()
+
+    def __call__(self, span: Span) -> NoReturn:
+        line = json.dumps(span.to_dict(), default=str) + "\n"
+        try:
+            with self._lock:
+                with open(self.filename, "a") as traces:
+                    traces.write(line)
+        except OSError as error:
+            logger.debug(f"Unable to export span to {self.filename}:\n{error!s}")
+
+
+class LogExporter:
+    """Log the spans as JSON at INFO level."""
+
+    def __init__(self, log: logging.Logger = logger):
+        """Initialize the exporter
+
+        Args:
+            log (logging.Logger): Logger to use
+        """
+        self.log = log
+
+    def __call__(self, span: Span) -> NoReturn:
+        self.log.info(json.dumps(span.to_dict(), default=str))
+
+
+class Tracer:
+    """Open the root spans and export the finished spans."""
+
+    def __init__(self, exporter: Optional[Callable[[Span], NoReturn]] = None):
+        """Initialize the tracer
+
+        Args:
+            exporter (Callable[[Span], NoReturn]): Span exporter; None to disable tracing
+        """
+        self.exporter = exporter
+
+    @property
+    def enabled(self) -> bool:
+        """bool: Whether the spans are recorded or not"""
+        return self.exporter is not None
+
+    @contextlib.contextmanager
+    def span(self, name: str, **attributes) -> Iterator[Span]:
+        """Open a span; it is a child of the current span if any.
+
+        Args:
+            name (str): Span name
+            attributes: Span attributes
+        """
+        if not self.enabled:
+            yield _NOOP_SPAN
+            return
+
+        new_span = Span(self, name, _current_span.get())
+        new_span.attributes.update(attributes)
+        token = _current_span.set(new_span)
+        try:
+            yield new_span
+        except BaseException as error:
+            new_span.status = "ERROR"
+            new_span.set_attribute("exception", repr(error))
+            raise
+        finally:
+            _current_span.reset(token)
+            new_span.end_time = time.time_ns()
+            try:
+                self.exporter(new_span)
+            except Exception as error:
+                logger.debug(f"Fail to export span '{name}': {error!s}")
+
+
+def current_span() -> Optional[Span]:
+    """Get the current span.
+
+    Returns:
+        Optional[Span]: Current span or None if no trace is recorded
+    """
+    return _current_span.get()
+
+
+@contextlib.contextmanager
+def span(name: str, **attributes) -> Iterator[Span]:
+    """Open a child span of the current span.
+
+    It does nothing if no span is opened.
+
+    Args:
+        name (str): Span name
+        attributes: Span attributes
+    """
+    parent = _current_span.get()
+    if parent is None:
+        yield _NOOP_SPAN
+    else:
+        with parent.tracer.span(name, **attributes) as child:
+            yield child
+
+
+def bind_context(func: Callable, *args, **kwargs) -> Callable[[], Any]:
+    """Bind a function call to the current context.
+
+    This is needed to trace functions executed in another thread as
+    ``run_in_executor`` does not propagate the context variables.
+
+    Args:
+        func (Callable): Function to call
+        args: Function positional arguments
+        kwargs: Function keyword arguments
+
+    Returns:
+        Callable[[], Any]: Function without arguments calling func in the current context
+    """
+    return functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+
+
+class _SubprocessProxy:
+    """Proxy of the subprocess module used by cookiecutter.hooks.
+
+    It adds the trace context to the hook environment.
+    """
+
+    def __getattr__(self, name: str):
+        return getattr(subprocess, name)
+
+    @staticmethod
+    def Popen(*args, **kwargs) -> subprocess.Popen:
+        current = _current_span.get()
+        if current is not None:
+            env = dict(kwargs.get("env") or os.environ)
+            env[TRACEPARENT] = current.traceparent
+            kwargs["env"] = env
+        return subprocess.Popen(*args, **kwargs)
+
+
+def _traced(func: Callable, name: str) -> Callable:
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        if _current_span.get() is None:
+            return func(*args, **kwargs)
+        with span(name, function=func.__name__):
+            return func(*args, **kwargs)
+
+    return wrapper
+
+
+# (module, function name, span name) traced in cookiecutter
+_COOKIECUTTER_PHASES = (
+    (cookiecutter.main, "determine_repo_dir", "cookiecutter.fetch"),
+    (cookiecutter.main, "generate_context", "cookiecutter.context"),
+    (cookiecutter.main, "generate_files", "cookiecutter.render"),
+    (cookiecutter.main, "run_pre_prompt_hook", "cookiecutter.hook"),
+    (cookiecutter.generate, "run_hook_from_repo_dir", "cookiecutter.hook"),
+    (cookiecutter.generate, "_run_hook_from_repo_dir", "cookiecutter.hook"),
+)
+
+_install_lock = threading.Lock()
+# Number of running traced renders
+_install_count = 0
+# (module, attribute name, original value) replaced while tracing
+_originals = list()
+
+
+def _install() -> NoReturn:
+    global _install_count
+    with _install_lock:
+        if _install_count == 0:
+            for module, name, span_name in _COOKIECUTTER_PHASES:
+                func = getattr(module, name, None)
+                if func is not None:
+                    _originals.append((module, name, func))
+                    setattr(module, name, _traced(func, span_name))
+            _originals.append((cookiecutter.hooks, "subprocess", subprocess))
+            cookiecutter.hooks.subprocess = _SubprocessProxy()
+        _install_count += 1
+
+
+def _uninstall() -> NoReturn:
+    global _install_count
+    with _install_lock:
+        _install_count -= 1
+        if _install_count == 0:
+            while _originals:
+                module, name, value = _originals.pop()
+                setattr(module, name, value)
+
+
+@contextlib.contextmanager
+def trace_cookiecutter() -> Iterator[None]:
+    """Trace the cookiecutter phases within the context.
+
+    The cookiecutter functions are wrapped only while a traced render is
+    running; calls made outside a span are not traced. It does nothing if no
+    span is opened.
+    """
+    if _current_span.get() is None:
+        yield
+        return
+
+    _install()
+    try:
+        yield
+    finally:
+        _uninstall()
@@ -1,3 +1,4 @@
+import functools
 import json
 from pathlib import Path as PyPath
 
@@ -5,6 +6,13 @@ import jsonschema
 from traitlets import TraitType, validate
 
 
+@functools.lru_cache(maxsize=256)
+def _check_schema(serialized: str):
+    """Check a serialized JSON schema against its meta-schema; once per schema."""
+    schema = json.loads(serialized)
+    jsonschema.validators.validator_for(schema).check_schema(schema)
+
+
 class JSONSchema(TraitType):
     """A JSON schema trait"""
 
@@ -16,8 +24,7 @@ class JSONSchema(TraitType):
             if isinstance(value, str):
                 value = json.loads(value)
 
-            validator = jsonschema.validators.validator_for(value)
-            validator.check_schema(value)
+            _check_schema(json.dumps(value, sort_keys=True))
             return value
         except:
             self.error(obj, value)
@@ -0,0 +1,153 @@
+"""
+Disk usage of the projects.
+
+The directories are scanned in parallel with ``os.scandir`` and their content
+is cached with their modification time; so only the directories in which an
+entry was added, removed or renamed are scanned again.
+"""
+import collections
+import concurrent.futures
+import os
+import threading
+from typing import Any, Dict, NamedTuple, Optional, Tuple
+
+# Default maximal number of directories kept in cache
+MAX_DIRECTORIES = 100_000
+
+
+class _Directory(NamedTuple):
+    """Content of a directory (not recursive)."""
+
+    mtime_ns: int
+    files: int
+    size: int
+    subdirectories: Tuple[str, ...]
+
+
+class DiskUsage:
+    """Compute the disk usage of folders with a cache per directory.
+
+    The size of a file modified in place is not updated until an entry of
+    its directory is added, removed or renamed.
+    """
+
+    def __init__(
+        self, max_directories: int = MAX_DIRECTORIES, max_workers: Optional[int] = None
+    ):
+        """Initialize the disk usage cache
+
+        Args:
+            max_directories (int): Maximal number of directories kept in cache
+            max_workers (int): Maximal number of directories scanned concurrently [optional]
+        """
+        self.max_directories = max_directories
+        self.max_workers = max_workers
+        self._cache = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _scan(self, path: str) -> _Directory:
+        """Get the content of a directory; from the cache if it did not change.
+
+        Args:
+            path (str): Directory path
+
+        Returns:
+            _Directory: Directory content
+        """
+        try:
+            mtime_ns = os.stat(path).st_mtime_ns
+        except OSError:
+            return _Directory(0, 0, 0, tuple())
+
+        with self._lock:
+            cached = self._cache.get(path)
+            if cached is not None and cached.mtime_ns == mtime_ns:
+                self._cache.move_to_end(path)
+                self.hits += 1
+                return cached
+            self.misses += 1
+
+        files = 0
+        size = 0
+        subdirectories = list()
+        try:
+            with os.scandir(path) as entries:
+                for entry in entries:
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            subdirectories.append(entry.path)
+                        else:
+                            size += entry.stat(follow_symlinks=False).st_size
+                            files += 1
+                    except OSError:
+                        pass  # Removed in between
+        except OSError:
+            pass
+
+        directory = _Directory(mtime_ns, files, size, tuple(subdirectories))
+        with self._lock:
+            self._cache[path] = directory
+            self._cache.move_to_end(path)
+            while len(self._cache) > self.max_directories:
+                self._cache.popitem(last=False)
+        return directory
+
+    def _walk(self, root: str) -> Dict[str, _Directory]:
+        """Scan a folder tree level by level in parallel.
+
+        Args:
+            root (str): Root folder
+
+        Returns:
+            Dict[str, _Directory]: Directory path -> content
+        """
+        directories = dict()
+        with concurrent.futures.ThreadPoolExecutor(self.max_workers) as executor:
+            pending = [root]
+            while len(pending) > 0:
+                scanned = list(executor.map(self._scan, pending))
+                directories.update(zip(pending, scanned))
+                pending = [
+                    subdirectory
+                    for directory in scanned
+                    for subdirectory in directory.subdirectories
+                ]
+        return directories
+
+    def stats(self, root: os.PathLike) -> Dict[str, Any]:
+        """Get the disk usage of a folder.
+
+        Args:
+            root (os.PathLike): Folder
+
+        Returns:
+            Dict: {files: number of files, bytes: total size, folders: {name: {files, bytes}} for the top-level folders}
+        """
+        root = os.fspath(root)
+        directories = self._walk(root)
+
+        totals = dict()
+        # Children are listed after their parent
+        for path in reversed(list(directories)):
+            directory = directories[path]
+            files, size = directory.files, directory.size
+            for subdirectory in directory.subdirectories:
+                sub_files, sub_size = totals.get(subdirectory, (0, 0))
+                files += sub_files
+                size += sub_size
+            totals[path] = (files, size)
+
+        files, size = totals[root]
+        return {
+            "files": files,
+            "bytes": size,
+            "folders": {
+                os.path.basename(subdirectory): {
+                    "files": totals[subdirectory][0],
+                    "bytes": totals[subdirectory][1],
+                }
+                for subdirectory in sorted(directories[root].subdirectories)
+            },
+        }
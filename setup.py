@@ -19,7 +19,7 @@ HERE = os.path.abspath(os.path.dirname(__file__))
 name = "jupyter_project"
 
 # Ensure a valid python version
-ensure_python(">=3.6")
+ensure_python(">=3.7")
 
 # Get our version
 version = get_version(os.path.join(name, "_version.py"))
@@ -59,6 +59,7 @@ setup_args = dict(
     long_description_content_type="text/markdown",
     cmdclass=cmdclass,
     packages=setuptools.find_packages(),
+    python_requires=">=3.7",
     install_requires=[
         "cookiecutter",
         "jinja2~=2.9",
@@ -68,10 +69,14 @@ setup_args = dict(
     extras_require={
         "all": [
             "jupyter_conda~=3.3", 
-            "jupyterlab-git~=0.20"
+            "jupyterlab-git~=0.20",
+            "watchdog"
         ],
         "test": ["pytest", "pytest-asyncio"],
     },
+    entry_points={
+        "console_scripts": ["jupyter-project = jupyter_project.app:main"],
+    },
     zip_safe=False,
     include_package_data=True,
     license="BSD-3-Clause",
@@ -81,7 +86,6 @@ setup_args = dict(
         "License :: OSI Approved :: BSD License",
         "Programming Language :: Python",
         "Programming Language :: Python :: 3",
-        "Programming Language :: Python :: 3.6",
         "Programming Language :: Python :: 3.7",
         "Programming Language :: Python :: 3.8",
         "Framework :: Jupyter",
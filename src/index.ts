@@ -11,7 +11,7 @@ import { IStateDB } from '@jupyterlab/statedb';
 import { IStatusBar } from '@jupyterlab/statusbar';
 import { IEnvironmentManager } from 'jupyterlab_conda';
 import { activateFileGenerator } from './filetemplates';
-import { requestAPI } from './jupyter-project';
+import { requestAPI, setSessionHeader } from './jupyter-project';
 import { activateProjectManager } from './project';
 import { setCurrentTheme } from './theme';
 import { IProjectManager, PLUGIN_ID, Templates } from './tokens';
@@ -37,6 +37,9 @@ const extension: JupyterFrontEndPlugin<IProjectManager> = {
     const { commands } = app;
     let manager: IProjectManager | null = null;
 
+    // Identify this tab on the kernel specs listing and kernel start requests
+    setSessionHeader(app.serviceManager.serverSettings.init);
+
     try {
       const settings = await requestAPI<Templates.ISettings>('settings', {
         method: 'GET'
@@ -2,6 +2,35 @@ import { URLExt } from '@jupyterlab/coreutils';
 
 import { ServerConnection } from '@jupyterlab/services';
 
+/**
+ * Header identifying the project session of this browser tab
+ *
+ * The server stores the opened project per session; a cookie would be
+ * shared by all the tabs.
+ */
+export const SESSION_HEADER = 'X-Jupyter-Project-Session';
+
+/**
+ * Project session id of this browser tab
+ */
+export const SESSION_ID = Array.from(
+  window.crypto.getRandomValues(new Uint8Array(16)),
+  byte => ('0' + byte.toString(16)).slice(-2)
+).join('');
+
+/**
+ * Set the project session header on requests initial values
+ *
+ * @param init Initial values for the requests; modified in place
+ * @returns The initial values
+ */
+export function setSessionHeader(init: RequestInit): RequestInit {
+  const headers = new Headers(init.headers);
+  headers.set(SESSION_HEADER, SESSION_ID);
+  init.headers = headers;
+  return init;
+}
+
 /**
  * Call the API extension
  *
@@ -23,7 +52,11 @@ export async function requestAPI<T>(
 
   let response: Response;
   try {
-    response = await ServerConnection.makeRequest(requestUrl, init, settings);
+    response = await ServerConnection.makeRequest(
+      requestUrl,
+      setSessionHeader(init),
+      settings
+    );
   } catch (error) {
     throw new ServerConnection.NetworkError(error);
   }
@@ -108,6 +108,8 @@ class ProjectManager implements IProjectManager {
     }
 
     this._editableInstall = settings.editableInstall;
+    this._gitInit = settings.gitInit || false;
+    this._serverProvisioning = settings.serverProvisioning || false;
 
     if (settings.schema) {
       this._schema = new JSONSchemaBridge(
@@ -168,6 +170,20 @@ class ProjectManager implements IProjectManager {
     return this._editableInstall;
   }
 
+  /**
+   * Are the new projects committed in a git repository by the server?
+   */
+  get gitInit(): boolean {
+    return this._gitInit;
+  }
+
+  /**
+   * Are the conda environments of new projects created by the server?
+   */
+  get serverProvisioning(): boolean {
+    return this._serverProvisioning;
+  }
+
   /**
    * Active project
    */
@@ -313,10 +329,12 @@ class ProjectManager implements IProjectManager {
   private _defaultCondaPackages: string | null = null;
   private _defaultPath: string | null = null;
   private _editableInstall = true;
+  private _gitInit = false;
   private _project: Project.IModel | null = null;
   private _projectChanged = new Signal<this, Project.IChangedArgs>(this);
   private _restored = new PromiseDelegate<void>();
   private _schema: JSONSchemaBridge | null = null;
+  private _serverProvisioning = false;
   private _state: IStateDB;
 }
 
@@ -537,8 +555,8 @@ export function activateProjectManager(
         }
         const model = await manager.create(cwd, params);
 
-        // Initialize as Git repository
-        if (git) {
+        // Initialize as Git repository - if not done by the server
+        if (git && !manager.gitInit) {
           try {
             INotification.update({
               toastId,
@@ -561,7 +579,7 @@ export function activateProjectManager(
           toastId
         });
 
-        if (git) {
+        if (git && !manager.gitInit) {
           try {
             // Add all files and commit
             await git.addAllUntracked();
@@ -990,6 +1008,13 @@ namespace Private {
           toastId
         );
       }
+    } else if (manager.serverProvisioning) {
+      // The environment is being created by the server in the background
+      INotification.update({
+        toastId,
+        message: `Conda environment ${environmentName} is being created by the server...`
+      });
+      return toastId;
     } else {
       // Create the environment from the requirements
       INotification.update({
@@ -191,10 +191,18 @@ export namespace Templates {
      * in the conda environment?
      */
     editableInstall: boolean;
+    /**
+     * Are the new projects committed in a git repository by the server?
+     */
+    gitInit?: boolean;
     /**
      * JSON schema of the template parameter
      */
     schema?: JSONObject;
+    /**
+     * Are the conda environments of new projects created by the server?
+     */
+    serverProvisioning?: boolean;
     /**
      * Is the project connected to @jupyterlab/git?
      */